@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from statistics import mean, median
+from timeit import Timer
+from typing import Any, Callable, Mapping, Sequence
+
+
+@dataclass(frozen=True)
+class Result:
+    name: str
+
+    items: int
+
+    number: int
+
+    # Seconds per call, one for each repetition.
+    timings: Sequence[float]
+
+    @property
+    def best(self) -> float:
+        return min(self.timings)
+
+    @property
+    def throughput(self) -> float:
+        return self.items / self.best if self.best else 0.0
+
+    def to_dict(self) -> Mapping[str, Any]:
+        return {
+            "items": self.items,
+            "number": self.number,
+            "best": self.best,
+            "mean": mean(self.timings),
+            "median": median(self.timings),
+            "throughput": self.throughput,
+            "timings": list(self.timings)
+        }
+
+
+def measure(name: str, func: Callable[[], Any], items: int, number: int = 10, repeat: int = 5) -> Result:
+    timings = Timer(func).repeat(repeat=repeat, number=number)
+
+    return Result(name, items, number, tuple(map(lambda t: t / number, timings)))
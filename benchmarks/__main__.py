@@ -0,0 +1,82 @@
+import json
+import logging
+import platform
+import sys
+import tempfile
+from argparse import ArgumentParser
+from fnmatch import fnmatch
+from pathlib import Path
+
+import bpystubgen
+from benchmarks import measure
+from benchmarks.corpus import Corpus
+from benchmarks.suites import suites
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        prog="benchmarks",
+        description="Measure the performance of each layer of bpystubgen.")
+
+    parser.add_argument("names", type=str, nargs="*",
+                        help=f"Benchmarks to run, which may contain wildcards (default: all of {', '.join(suites)})")
+    parser.add_argument("--corpus", type=str, default=str(Path(__file__).parent.parent / "tests" / "fixtures" / "rst"),
+                        help="Directory where *.rst files to be used as input are located")
+    parser.add_argument("-o", "--output", type=str,
+                        help="Path of a JSON file where the results will be saved")
+    parser.add_argument("--compare", type=str,
+                        help="Path of a JSON file from a previous run to compare the results with")
+    parser.add_argument("-n", "--number", type=int, default=10,
+                        help="Number of calls to make in each repetition (default: 10)")
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="Number of repetitions, the best of which is reported (default: 5)")
+
+    args = parser.parse_args()
+
+    corpus_dir = Path(args.corpus).expanduser()
+
+    if not corpus_dir.is_dir():
+        sys.exit(f"The specified corpus is not a valid directory: {corpus_dir}")
+
+    names = tuple(filter(lambda n: not args.names or any(map(lambda p: fnmatch(n, p), args.names)), suites))
+
+    if not any(names):
+        sys.exit(f"No benchmark matches the given names: {', '.join(args.names)}")
+
+    baseline = json.loads(Path(args.compare).read_text("UTF-8"))["results"] if args.compare else {}
+
+    # Warnings about the corpus would be repeated on every call, and drown out the results.
+    logging.disable(logging.ERROR)
+
+    with tempfile.TemporaryDirectory(prefix="bpystubgen-benchmarks-") as dest_dir:
+        corpus = Corpus(corpus_dir, Path(dest_dir))
+
+        results = dict()
+
+        for name in names:
+            (func, items) = suites[name](corpus)
+            result = measure(name, func, items, number=args.number, repeat=args.repeat)
+
+            results[name] = result.to_dict()
+
+            line = f"{name:<24}{result.best * 1000:>10.3f} ms{result.throughput:>14.1f} items/s"
+
+            if name in baseline:
+                line += f"{result.best / baseline[name]['best']:>10.2f}x"
+
+            print(line)
+
+    report = {
+        "version": bpystubgen.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": str(corpus_dir),
+        "results": results
+    }
+
+    if args.output:
+        Path(args.output).expanduser().write_text(json.dumps(report, indent=2), "UTF-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple, cast
+
+from docutils.nodes import Element, document
+
+from bpystubgen import directives, patches
+from bpystubgen.directives import FunctionLikeDirective
+from bpystubgen.nodes import Class, Module
+from bpystubgen.runner import create_app, create_settings, create_writer
+from bpystubgen.tasks import ModuleTask, ParserTask, Task
+
+
+@contextmanager
+def recording(type_expressions: List[str], signatures: List[str]) -> Iterator[None]:
+    parse_type = directives.parse_type
+    parse_func = vars(FunctionLikeDirective)["parse_func"]
+
+    def record_type(text: str) -> Optional[str]:
+        type_expressions.append(text)
+        return parse_type(text)
+
+    def record_func(cls, line: str):
+        signatures.append(line)
+        return parse_func.__func__(cls, line)
+
+    directives.parse_type = record_type
+    FunctionLikeDirective.parse_func = classmethod(record_func)
+
+    try:
+        yield
+    finally:
+        directives.parse_type = parse_type
+        FunctionLikeDirective.parse_func = parse_func
+
+
+class Corpus:
+
+    def __init__(self, source_dir: Path, dest_dir: Path) -> None:
+        app = create_app(dest_dir, quiet=True)
+
+        self.source_dir = source_dir
+        self.dest_dir = dest_dir
+
+        self.settings = create_settings(app.env)
+        self.env = app.env
+        self.writer = create_writer(app)
+
+        self.root = Task.create(source_dir)
+
+        # Inputs of the type and signature parsers are collected while parsing the corpus,
+        # so that they can be measured separately from the rest of the process.
+        self.type_expressions: List[str] = []
+        self.signatures: List[str] = []
+
+        with recording(self.type_expressions, self.signatures):
+            for task in filter(lambda t: isinstance(t, ParserTask), self.root):
+                cast(ParserTask, task).parse(self.settings, self.env)
+
+    @property
+    def doctrees(self) -> Sequence[document]:
+        tasks = filter(lambda t: isinstance(t, ModuleTask) and t.doctree, self.root)
+        return tuple(map(lambda t: cast(ModuleTask, t).doctree, tasks))
+
+    @property
+    def modules(self) -> Sequence[Module]:
+        return tuple(map(lambda d: next(iter(d.traverse(Module))), self.doctrees))
+
+    @property
+    def patch_targets(self) -> Sequence[Tuple[str, Element]]:
+        targets: List[Tuple[str, Element]] = []
+
+        for task in filter(lambda t: isinstance(t, ModuleTask) and t.doctree, self.root):
+            doctree = cast(ModuleTask, task).doctree
+
+            if task.name in patches.patches:
+                targets.append((task.name, doctree))
+
+            for cls in filter(lambda c: c.full_name in patches.patches, doctree.traverse(Class)):
+                targets.append((cls.full_name, cls))
+
+        return tuple(targets)
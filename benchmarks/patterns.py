@@ -0,0 +1,169 @@
+import re
+from typing import Final, Optional
+
+from bpystubgen.parser import _array_of, _bracket_list, _container_of, _dictionary, _exp_list_value_of, \
+    _multi_array_of, _prop_collection_of, _qualified_list, _reference, _simple, _special_cases, _union
+
+# The chain of regular expressions which TypeParser replaced, which is kept to compare both in terms of speed
+# and to check that they give the same results.
+_simple_pattern: Final = re.compile(
+    "^(?:unsigned\\s)?(?P<type>[a-zA-Z]+)(?:\\s?\\([^)]+\\))?(?:\\sin\\s[\\[][^]]+[]])?(?:[,.\\s].*)?$")
+
+_container_of_pattern: Final = re.compile(
+    "^(?:[Aa][n]?\\s)?(?P<container>[a-zA-Z]+)\\sof\\s(?::class:`[~!]?(?P<reference>[^`]+)`|"
+    "(?P<data>[a-zA-Z]+))(?P<qualifier>[',.\\s].*)?$")
+
+_prop_collection_of_pattern: Final = re.compile(
+    "^(?:[Aa][n]?\\s)?(?::class:`[~!]?(?P<base>[^`]+)`\\s+)?:class:`bpy_prop_collection`\\sof\\s"
+    "(?::class:`[~!]?(?P<reference>[^`]+)`|(?P<data>[a-zA-Z]+))(?P<qualifier>[',.\\s].*)?$")
+
+_exp_list_value_of_pattern: Final = re.compile(
+    "^(?:[Aa][n]?\\s)?:class:`[~!]?bge.types.EXP_ListValue`\\sof\\s(?::class:`[~!]?(?P<reference>[^`]+)`|"
+    "(?P<data>[a-zA-Z]+))(?P<qualifier>[',.\\s].*)?$")
+
+_qualified_list_pattern: Final = re.compile(
+    "^(?:[Aa][n]?\\s)?list\\s*\\([a-zA-Z\\s]*vector\\sof\\s[0-9]+\\s(?P<data>[a-zA-Z]+)"
+    "(?:[,.\\s][^)]*)?\\)(?:[,.\\s].*)?$")
+
+_list_bracket_pattern: Final = re.compile(
+    "^list\\s*\\[(?::class:`[~!]?(?P<reference>[^`]+)`|(?P<data>[a-zA-Z]+))](?:[,.\\s].*)?$")
+
+_array_of_pattern: Final = re.compile(
+    "^(?:[Aa][n]?\\s)?(?P<data>[a-z]+)\\sarray\\sof\\s(?P<count>[0-9]+)\\sitems.*$")
+
+_multi_array_of_pattern: Final = re.compile(
+    "^(?:[Aa][n]?\\s)?(?P<data>[a-z]+)\\smulti-dimensional\\sarray\\sof\\s(?P<rows>[0-9]+)"
+    "\\s*\\*\\s*(?P<cols>[0-9]+)\\sitems.*$")
+
+_dictionary_pattern: Final = re.compile(
+    "^(?:[Aa]\\s)?dict(?:ionary)?\\s*[\\[(](?P<key>[^,\\s]+)\\s*,\\s*(?P<value>[^])]+)[])].*$")
+
+_reference_pattern: Final = re.compile(
+    "^:class:`[~!]?(?P<name>[a-zA-Z_0-9.\\s]+)(?:\\s*<(?P<target>[a-zA-Z_0-9.]+)>)?`(?:[,.\\s].*)?$")
+
+_reference_item_pattern: Final = re.compile(
+    "^[-\\s]*:class:`[~!]?(?P<name>[a-zA-Z_0-9.\\s]+)(?:\\s*<(?P<target>[a-zA-Z_0-9.]+)>)?`$")
+
+_union_pattern: Final = re.compile(
+    "^(?::class:`[~!]?[^`]+`|[a-zA-Z]+)(:?\\sor\\s(?::class:`[~!]?[^`]+`|[a-zA-Z]+))+(?:[,.\\s].*)?$")
+
+_matrix_pattern: Final = re.compile("^(?:[Aa]\\s)?(?:[0-9xX*]+\\s)?[Mm]atrix|"
+                                    "[Mm]atrix(?:\\s?[0-9a-z\\s\\[\\]()]+)?$")
+
+def parse_simple(text: str) -> Optional[str]:
+    result = _simple_pattern.match(text)
+
+    return _simple(result.group("type")) if result else None
+
+
+def parse_reference(text: str) -> Optional[str]:
+    result = _reference_pattern.match(text)
+
+    return _reference(result.group("name"), result.group("target")) if result else None
+
+
+def parse_qualified_list(text: str) -> Optional[str]:
+    result = _qualified_list_pattern.match(text)
+
+    return _qualified_list(result.group("data")) if result else None
+
+
+def parse_bracket_list(text: str) -> Optional[str]:
+    result = _list_bracket_pattern.match(text)
+
+    return _bracket_list(result.group("reference"), result.group("data")) if result else None
+
+
+def parse_prop_collection_of(text: str) -> Optional[str]:
+    result = _prop_collection_of_pattern.match(text)
+
+    if not result:
+        return None
+
+    return _prop_collection_of(*result.group("base", "reference", "data", "qualifier"))
+
+
+def parse_exp_list_value_of(text: str) -> Optional[str]:
+    result = _exp_list_value_of_pattern.match(text)
+
+    return _exp_list_value_of(*result.group("reference", "data", "qualifier")) if result else None
+
+
+def parse_container_of(text: str) -> Optional[str]:
+    result = _container_of_pattern.match(text)
+
+    return _container_of(*result.group("container", "reference", "data", "qualifier")) if result else None
+
+
+def parse_array_of(text: str) -> Optional[str]:
+    result = _array_of_pattern.match(text)
+
+    return _array_of(result.group("data"), result.group("count")) if result else None
+
+
+def parse_multi_array_of(text: str) -> Optional[str]:
+    result = _multi_array_of_pattern.match(text)
+
+    return _multi_array_of(*result.group("data", "rows", "cols")) if result else None
+
+
+def parse_matrix(text: str) -> Optional[str]:
+    if _matrix_pattern.match(text):
+        return "mathutils.Matrix"
+
+    return None
+
+
+def parse_dictionary(text: str) -> Optional[str]:
+    result = _dictionary_pattern.match(text)
+
+    return _dictionary(result.group("key"), result.group("value")) if result else None
+
+
+def parse_union(text: str) -> Optional[str]:
+    return _union(text) if _union_pattern.match(text) else None
+
+
+def parse_union_types(text: str) -> Optional[str]:
+    lines = text.split("\n")
+
+    if len(lines) < 3:
+        return None
+
+    parsed_types = []
+
+    for line in filter(lambda l: any(l.strip()), lines[1:]):
+        result = _reference_item_pattern.match(line)
+
+        if not result:
+            return None
+
+        type_info = result.group("target") or result.group("name") if result else None
+
+        parsed_types.append(type_info)
+
+    return f"typing.Union[{', '.join(parsed_types)}]"
+
+
+def parse_with_patterns(text: str) -> Optional[str]:
+    parsers = (
+        parse_array_of,
+        parse_multi_array_of,
+        parse_qualified_list,
+        parse_bracket_list,
+        parse_container_of,
+        parse_prop_collection_of,
+        parse_exp_list_value_of,
+        parse_dictionary,
+        parse_union,
+        parse_union_types,
+        parse_reference,
+        parse_simple,
+        parse_matrix,
+        _special_cases
+    )
+
+    try:
+        return next(filter(lambda r: r, map(lambda p: p(text), parsers)))
+    except StopIteration:
+        return None
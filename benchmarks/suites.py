@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import ast
+import random
+import re
+import subprocess
+import sys
+from functools import partial
+from itertools import chain
+from typing import Any, Callable, Final, List, Mapping, Tuple
+
+from docutils.io import StringOutput
+from docutils.utils import new_document
+from bpystubgen import patches
+from bpystubgen.batch import build
+from bpystubgen.directives import FunctionLikeDirective
+from bpystubgen.nodes import APIMember, Class, Data, DocString, Import, Module
+from bpystubgen.parser import TypeParser, parse_type, type_cache
+from bpystubgen.runner import Runner
+from bpystubgen.tasks import Task
+
+from benchmarks.corpus import Corpus
+from benchmarks.patterns import parse_with_patterns
+
+Benchmark = Tuple[Callable[[], Any], int]
+
+
+def bench_parse_type(corpus: Corpus) -> Benchmark:
+    expressions = tuple(corpus.type_expressions)
+
+    def run() -> None:
+        for text in expressions:
+            parse_type(text)
+
+    return run, len(expressions)
+
+
+def bench_parse_type_cold(corpus: Corpus) -> Benchmark:
+    expressions = tuple(corpus.type_expressions)
+
+    def run() -> None:
+        type_cache.clear()
+
+        for text in expressions:
+            parse_type(text)
+
+    return run, len(expressions)
+
+
+def bench_type_grammar(corpus: Corpus) -> Benchmark:
+    expressions = corpus.type_expressions
+
+    def run() -> None:
+        type_cache.clear()
+
+        for text in expressions:
+            TypeParser(text).parse()
+
+    return run, len(expressions)
+
+
+def bench_type_patterns(corpus: Corpus) -> Benchmark:
+    expressions = corpus.type_expressions
+
+    def run() -> None:
+        type_cache.clear()
+
+        for text in expressions:
+            parse_with_patterns(text)
+
+    return run, len(expressions)
+
+
+def bench_parse_func(corpus: Corpus) -> Benchmark:
+    signatures = tuple(corpus.signatures)
+
+    def run() -> None:
+        for line in signatures:
+            FunctionLikeDirective.parse_func(line)
+
+    return run, len(signatures)
+
+
+def bench_import_types(corpus: Corpus) -> Benchmark:
+    modules = corpus.modules
+
+    # Existing imports are replaced on each call, so the modules can be processed repeatedly.
+    def run() -> None:
+        for module in modules:
+            module.import_types()
+
+    return run, len(modules)
+
+
+def bench_referred_types(corpus: Corpus) -> Benchmark:
+    modules = corpus.modules
+
+    # Modules and their classes are queried repeatedly while being transformed.
+    def run() -> None:
+        for module in modules:
+            for member in (module, *module.members):
+                getattr(member, "referred_types")
+
+    return run, len(modules)
+
+
+def bench_sort_members(corpus: Corpus) -> Benchmark:
+    modules = corpus.modules
+
+    def run() -> None:
+        for module in modules:
+            module.sort_members()
+
+    return run, len(modules)
+
+
+def synthetic_module(count: int, seed: int = 0) -> Module:
+    rand = random.Random(seed)
+    names = tuple(map(lambda i: f"Class{i}", range(count)))
+
+    module = Module(name="bpy.types")
+    module += DocString(text="A synthetic module with as many classes as bpy.types.")
+
+    # Classes are added in the reverse order of their dependencies, so that all of them have to be moved.
+    for i in reversed(range(count)):
+        cls = Class(name=names[i])
+        cls.base_types = (f"bpy.types.{names[rand.randrange(i)]}",) if i else ()
+
+        module += cls
+
+        if i % 10 == 0:
+            module += Data(name=f"data{i}", type=names[i])
+
+    return module
+
+
+def bench_sort_synthetic(count: int, corpus: Corpus) -> Benchmark:
+    module = synthetic_module(count)
+
+    return module.sort_members, count
+
+
+def bench_signatures(corpus: Corpus) -> Benchmark:
+    members = tuple(chain.from_iterable(map(lambda d: d.traverse(APIMember), corpus.doctrees)))
+
+    def run() -> None:
+        for member in members:
+            getattr(member, "signature")
+
+    return run, len(members)
+
+
+def bench_name_lists(corpus: Corpus) -> Benchmark:
+    classes = tuple(filter(lambda m: isinstance(m, Class), synthetic_module(5000).members))
+    imports = tuple(map(lambda c: Import(module="bpy.types", types=", ".join((c.name, *c.base_types))), classes))
+
+    def run() -> None:
+        for cls in classes:
+            getattr(cls, "base_types")
+
+        for i in imports:
+            getattr(i, "types")
+
+    return run, len(classes) + len(imports)
+
+
+def synthetic_stubs(corpus: Corpus, count: int, split: int) -> Mapping[str, str]:
+    module = synthetic_module(count)
+    module.sort_members()
+
+    def render(part: Module) -> str:
+        doctree = new_document("", corpus.settings)
+        doctree += part
+
+        return corpus.writer.write(doctree, StringOutput(encoding="unicode"))
+
+    parts = module.split(split) if split else dict()
+
+    return {"__init__": render(module), **dict(map(lambda p: (p[0], render(p[1])), parts.items()))}
+
+
+def bench_load_stubs(split: int, corpus: Corpus) -> Benchmark:
+    stubs = synthetic_stubs(corpus, 2000, split)
+
+    # Measure the stubs a type checker has to parse to resolve a single class, as one which loads modules lazily
+    # would: the package itself, then the module which defines the class and those imported by it.
+    pending = [tuple(stubs.keys())[-1], "__init__"]
+    required: List[str] = []
+
+    while pending:
+        name = pending.pop()
+
+        if name in required:
+            continue
+
+        required.append(name)
+
+        if name != "__init__":
+            pending.extend(filter(lambda n: n not in required, re.findall("^from \\.(\\w+) import", stubs[name], re.M)))
+
+    sources = tuple(map(lambda n: stubs[n], required))
+
+    def run() -> None:
+        for source in sources:
+            ast.parse(source)
+
+    return run, len(sources)
+
+
+def bench_apply_patches(corpus: Corpus) -> Benchmark:
+    targets = corpus.patch_targets
+
+    def run() -> None:
+        for (name, target) in targets:
+            patches.apply(name, target, corpus.settings, corpus.env)
+
+    return run, len(targets)
+
+
+def bench_translate(corpus: Corpus) -> Benchmark:
+    doctrees = corpus.doctrees
+    writer = corpus.writer
+
+    def run() -> None:
+        for doctree in doctrees:
+            writer.document = doctree
+            writer.translate()
+
+    return run, len(doctrees)
+
+
+def bench_run(signatures_only: bool, corpus: Corpus, jobs: int = 1) -> Benchmark:
+    runner = Runner(corpus.dest_dir / "stubs", jobs=jobs, signatures_only=signatures_only)
+
+    def run() -> None:
+        runner.run(Task.create(corpus.source_dir))
+
+    return run, 1
+
+
+def bench_matrix(corpus: Corpus) -> Benchmark:
+    # Consecutive versions share most of their sources, which is simulated by building the same corpus twice.
+    sources = {"previous": corpus.source_dir, "current": corpus.source_dir}
+
+    def run() -> None:
+        build(sources, corpus.dest_dir / "matrix")
+
+    return run, len(sources)
+
+
+def _bench_command(*args: str) -> Benchmark:
+    # Imports have to be measured in a new interpreter each time, as they are cached once loaded.
+    command = (sys.executable, *args)
+
+    return lambda: subprocess.run(command, check=True, stdout=subprocess.DEVNULL), 1
+
+
+def bench_interpreter(corpus: Corpus) -> Benchmark:
+    return _bench_command("-c", "pass")
+
+
+def bench_import(corpus: Corpus) -> Benchmark:
+    return _bench_command("-c", "import bpystubgen")
+
+
+def bench_cli_help(corpus: Corpus) -> Benchmark:
+    return _bench_command("-m", "bpystubgen", "--help")
+
+
+suites: Final[Mapping[str, Callable[[Corpus], Benchmark]]] = {
+    "parser.parse_type": bench_parse_type,
+    "parser.parse_type_cold": bench_parse_type_cold,
+    "parser.grammar": bench_type_grammar,
+    "parser.patterns": bench_type_patterns,
+    "directives.parse_func": bench_parse_func,
+    "nodes.import_types": bench_import_types,
+    "nodes.referred_types": bench_referred_types,
+    "nodes.sort_members": bench_sort_members,
+    "nodes.sort_members_1k": partial(bench_sort_synthetic, 1000),
+    "nodes.sort_members_5k": partial(bench_sort_synthetic, 5000),
+    "nodes.signature": bench_signatures,
+    "nodes.name_lists": bench_name_lists,
+    "layout.single": partial(bench_load_stubs, 0),
+    "layout.split": partial(bench_load_stubs, 1),
+    "patches.apply": bench_apply_patches,
+    "writer.translate": bench_translate,
+    "runner.full": partial(bench_run, False),
+    "runner.signatures_only": partial(bench_run, True),
+    "runner.parallel": partial(bench_run, False, jobs=4),
+    "runner.matrix": bench_matrix,
+    "import.interpreter": bench_interpreter,
+    "import.bpystubgen": bench_import,
+    "import.cli_help": bench_cli_help
+}
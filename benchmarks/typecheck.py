@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import ast
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from functools import partial
+from importlib.util import find_spec
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, Final, List, Mapping, Optional, Sequence, Tuple
+
+import bpystubgen
+from benchmarks import Result
+
+# Classes which are looked up in the "types" module of each package, in the order of preference.
+_representative_classes: Final = ("Object", "KX_GameObject")
+
+_class_pattern: Final = re.compile("^class (\\w+)", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class Checker:
+    name: str
+
+    # Creates a command to check the snippet in the given working directory, which may contain a configuration file.
+    command: Callable[[Path, Path, Path], Sequence[str]]
+
+    # Name of a file in which the checker records the time spent on each module, if it supports it.
+    timing_file: Optional[str] = None
+
+
+def _mypy_command(stub_dir: Path, work_dir: Path, snippet: Path) -> Sequence[str]:
+    # Disable the cache, so that every run has to load the stubs from scratch.
+    return (
+        sys.executable, "-m", "mypy",
+        "--no-incremental",
+        "--cache-dir", os.devnull,
+        "--timing-stats", str(work_dir / "timings.txt"),
+        str(snippet))
+
+
+def _pyright_command(executable: str, stub_dir: Path, work_dir: Path, snippet: Path) -> Sequence[str]:
+    config = {"stubPath": str(stub_dir.resolve()), "include": [snippet.name]}
+
+    (work_dir / "pyrightconfig.json").write_text(json.dumps(config), "UTF-8")
+
+    return executable, "-p", str(work_dir)
+
+
+def checkers() -> Sequence[Checker]:
+    installed: List[Checker] = []
+
+    if find_spec("mypy"):
+        installed.append(Checker("mypy", _mypy_command, "timings.txt"))
+
+    pyright = shutil.which("pyright")
+
+    if pyright:
+        installed.append(Checker("pyright", partial(_pyright_command, pyright)))
+
+    return installed
+
+
+def module_name(stub_dir: Path, path: Path) -> str:
+    segments = path.relative_to(stub_dir).with_suffix("").parts
+
+    return ".".join(segments[:-1] if segments[-1] == "__init__" else segments)
+
+
+def default_snippets(stub_dir: Path) -> Mapping[str, str]:
+    snippets: Dict[str, str] = dict()
+
+    for package in sorted(filter(lambda p: (p / "__init__.pyi").exists(), stub_dir.iterdir())):
+        name = package.name
+
+        snippets[f"import {name}"] = f"import {name}\n"
+
+        sources = tuple(map(lambda p: p.read_text("UTF-8"), sorted(package.glob("types*/**/*.pyi"))))
+        sources += tuple(map(lambda p: p.read_text("UTF-8"), package.glob("types.pyi")))
+
+        classes = tuple(sorted(set(_class_pattern.findall("\n".join(sources)))))
+
+        if not any(classes):
+            continue
+
+        cls = next(filter(lambda c: c in classes, _representative_classes), classes[0])
+
+        snippets[f"{name}.types.{cls}"] = f"import {name}.types\n\nvalue: {name}.types.{cls}\n"
+
+    return snippets
+
+
+def parse_costs(stub_dir: Path, repeat: int = 5) -> Mapping[str, float]:
+    costs: Dict[str, float] = dict()
+
+    # The time it takes to parse each stub, regardless of the type checker.
+    for path in sorted(stub_dir.glob("**/*.pyi")):
+        source = path.read_text("UTF-8")
+        timings = []
+
+        for _ in range(repeat):
+            started = perf_counter()
+            ast.parse(source)
+            timings.append(perf_counter() - started)
+
+        costs[module_name(stub_dir, path)] = min(timings)
+
+    return costs
+
+
+def read_timings(path: Path) -> Mapping[str, float]:
+    timings: Dict[str, float] = dict()
+
+    # Each line consists of the name of a module and the time spent on it in microseconds.
+    for line in path.read_text("UTF-8").splitlines():
+        tokens = line.split()
+
+        if len(tokens) == 2 and tokens[1].isdigit():
+            timings[tokens[0]] = int(tokens[1]) / 1_000_000
+
+    return timings
+
+
+def run_checker(checker: Checker,
+                stub_dir: Path,
+                snippet: str,
+                repeat: int = 3) -> Tuple[Result, Mapping[str, float]]:
+    timings: List[float] = []
+    modules: Mapping[str, float] = dict()
+
+    with tempfile.TemporaryDirectory(prefix="bpystubgen-typecheck-") as work_dir:
+        path = Path(work_dir) / "snippet.py"
+        path.write_text(snippet, "UTF-8")
+
+        command = checker.command(stub_dir, Path(work_dir), path)
+
+        env = dict(os.environ)
+        env["MYPYPATH"] = str(stub_dir.resolve())
+
+        for _ in range(repeat):
+            started = perf_counter()
+
+            try:
+                process = subprocess.run(command, cwd=work_dir, env=env, stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.PIPE)
+            except OSError as e:
+                raise RuntimeError(f"Failed to run {checker.name}: {e}") from e
+
+            timings.append(perf_counter() - started)
+
+            # Both mypy and pyright exit with 1 when they find errors, and with a greater code when they fail to run.
+            if process.returncode > 1:
+                message = process.stderr.decode("UTF-8", "replace").strip()
+                raise RuntimeError(f"{checker.name} exited with code {process.returncode}: {message}")
+
+        if checker.timing_file and (Path(work_dir) / checker.timing_file).exists():
+            modules = read_timings(Path(work_dir) / checker.timing_file)
+
+    return Result(checker.name, 1, 1, tuple(timings)), modules
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        prog="benchmarks.typecheck",
+        description="Measure how long it takes type checkers to load the stubs generated by bpystubgen.")
+
+    parser.add_argument("stubs", type=str,
+                        help="Output directory of bpystubgen where the generated stubs are located")
+    parser.add_argument("--snippet", type=str, action="append",
+                        help="Code to type check, which may be given more than once (default: importing each "
+                             "package and referring to a class in its 'types' module)")
+    parser.add_argument("--checker", type=str, action="append", choices=("mypy", "pyright"),
+                        help="Type checker to use, which may be given more than once (default: all installed ones)")
+    parser.add_argument("-o", "--output", type=str,
+                        help="Path of a JSON file where the results will be saved")
+    parser.add_argument("--compare", type=str,
+                        help="Path of a JSON file from a previous run to compare the results with")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="Number of times to run each type checker, the best of which is reported (default: 3)")
+    parser.add_argument("--top", type=int, default=10,
+                        help="Number of the most expensive modules to print (default: 10)")
+
+    args = parser.parse_args()
+
+    stub_dir = Path(args.stubs).expanduser()
+
+    if not stub_dir.is_dir():
+        sys.exit(f"The specified stubs are not in a valid directory: {stub_dir}")
+
+    snippets = dict(map(lambda s: (s.strip(), s + "\n"), args.snippet)) if args.snippet else default_snippets(stub_dir)
+    selected = tuple(filter(lambda c: not args.checker or c.name in args.checker, checkers()))
+
+    if not any(selected):
+        print("No type checker is installed, so only the parse cost of each module is measured.", file=sys.stderr)
+
+    baseline = json.loads(Path(args.compare).read_text("UTF-8")) if args.compare else {}
+
+    results: Dict[str, Dict] = dict()
+    modules: Dict[str, Mapping[str, float]] = dict()
+
+    for checker in selected:
+        for (name, snippet) in snippets.items():
+            key = f"{checker.name}: {name}"
+
+            try:
+                (result, timings) = run_checker(checker, stub_dir, snippet, args.repeat)
+            except RuntimeError as e:
+                # A failed run would be much faster than a successful one, so it must not be compared with others.
+                print(f"{key}: {e}", file=sys.stderr)
+                continue
+
+            results[key] = result.to_dict()
+
+            if timings:
+                modules[key] = timings
+
+            line = f"{key:<48}{result.best * 1000:>10.1f} ms"
+
+            if key in baseline.get("results", {}):
+                line += f"{result.best / baseline['results'][key]['best']:>10.2f}x"
+
+            print(line)
+
+    costs = parse_costs(stub_dir)
+
+    print(f"{'parse: all modules':<48}{sum(costs.values()) * 1000:>10.1f} ms")
+
+    for (module, seconds) in sorted(costs.items(), key=lambda c: c[1], reverse=True)[:args.top]:
+        print(f"  {module:<46}{seconds * 1000:>10.1f} ms")
+
+    report = {
+        "version": bpystubgen.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stubs": str(stub_dir),
+        "results": results,
+        "modules": modules,
+        "parse": costs
+    }
+
+    if args.output:
+        Path(args.output).expanduser().write_text(json.dumps(report, indent=2), "UTF-8")
+
+
+if __name__ == "__main__":
+    main()
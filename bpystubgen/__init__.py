@@ -1,12 +1,7 @@
-from typing import Final
+from importlib import import_module
+from typing import Any, Final
 
-from docutils.parsers.rst.directives import register_directive
-from docutils.parsers.rst.roles import GenericRole, register_local_role
-
-from bpystubgen.directives import ClassDirective, CurrentModuleDirective, DataDirective, FunctionDirective, \
-    ModuleDirective, PropertyDirective
-from bpystubgen.nodes import AttributeRef, ClassRef, DataRef, DocString, Function, FunctionRef, MethodRef, Module, \
-    ModuleRef, PropertyRef, PythonRef, Reference
+__version__: Final = "0.2.7"
 
 lowercase_class_names: Final = {
     "bpy.types.bpy_prop_collection",
@@ -16,30 +11,64 @@ lowercase_class_names: Final = {
     "bpy.types.wmTools"
 }
 
-register_directive("module", ModuleDirective)
-register_directive("data", DataDirective)
-register_directive("attribute", DataDirective)
-register_directive("property", PropertyDirective)
-register_directive("function", FunctionDirective)
-register_directive("method", FunctionDirective)
-register_directive("classmethod", FunctionDirective)
-register_directive("staticmethod", FunctionDirective)
-register_directive("class", ClassDirective)
-register_directive("currentmodule", CurrentModuleDirective)
-
-_known_roles = (
-    ("ref", Reference),
-    ("mod", ModuleRef),
-    ("class", ClassRef),
-    ("func", FunctionRef),
-    ("meth", MethodRef),
-    ("data", DataRef),
-    ("attr", AttributeRef),
-    ("property", PropertyRef)
-)
-
-for (name, cls) in _known_roles:
-    register_local_role(name, GenericRole(name, cls))
-
-    if issubclass(cls, PythonRef):
-        register_local_role("py:" + name, GenericRole("py:" + name, cls))
+# Names which used to be imported here eagerly, and are now resolved on first access.
+_exports: Final = {
+    **dict.fromkeys(("ClassDirective", "CurrentModuleDirective", "DataDirective", "FunctionDirective",
+                     "ModuleDirective", "PropertyDirective"), "bpystubgen.directives"),
+    **dict.fromkeys(("AttributeRef", "ClassRef", "DataRef", "DocString", "Function", "FunctionRef", "MethodRef",
+                     "Module", "ModuleRef", "PropertyRef", "PythonRef", "Reference"), "bpystubgen.nodes")
+}
+
+_registered = False
+
+
+def register() -> None:
+    global _registered
+
+    if _registered:
+        return
+
+    _registered = True
+
+    from docutils.parsers.rst.directives import register_directive
+    from docutils.parsers.rst.roles import GenericRole, register_local_role
+
+    from bpystubgen.directives import ClassDirective, CurrentModuleDirective, DataDirective, FunctionDirective, \
+        ModuleDirective, PropertyDirective
+    from bpystubgen.nodes import AttributeRef, ClassRef, DataRef, FunctionRef, MethodRef, ModuleRef, PropertyRef, \
+        PythonRef, Reference
+
+    register_directive("module", ModuleDirective)
+    register_directive("data", DataDirective)
+    register_directive("attribute", DataDirective)
+    register_directive("property", PropertyDirective)
+    register_directive("function", FunctionDirective)
+    register_directive("method", FunctionDirective)
+    register_directive("classmethod", FunctionDirective)
+    register_directive("staticmethod", FunctionDirective)
+    register_directive("class", ClassDirective)
+    register_directive("currentmodule", CurrentModuleDirective)
+
+    known_roles = (
+        ("ref", Reference),
+        ("mod", ModuleRef),
+        ("class", ClassRef),
+        ("func", FunctionRef),
+        ("meth", MethodRef),
+        ("data", DataRef),
+        ("attr", AttributeRef),
+        ("property", PropertyRef)
+    )
+
+    for (name, cls) in known_roles:
+        register_local_role(name, GenericRole(name, cls))
+
+        if issubclass(cls, PythonRef):
+            register_local_role("py:" + name, GenericRole("py:" + name, cls))
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return getattr(import_module(_exports[name]), name)
@@ -4,94 +4,144 @@ import time
 from argparse import ArgumentParser
 from pathlib import Path
 
-from docutils.frontend import OptionParser
-from docutils.parsers.rst import Parser
-from sphinx.application import Sphinx
-from sphinxcontrib.builders.rst import RstBuilder
 
-from bpystubgen.patches import blacklist
-from bpystubgen.tasks import ModuleTask, ParserTask, Task
-from bpystubgen.writer import StubWriter
+def main() -> None:
+    parser = ArgumentParser(
+        prog="bpystubgen",
+        description="Generate Python API stubs from Blender's documentation.")
+
+    parser.add_argument("input", type=str,
+                        help="Source directory where *.rst files are located")
+    parser.add_argument("output", type=str, default=".",
+                        help="Output directory where generated modules will be saved")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of processes to use for parsing source files (default: 1)")
+    parser.add_argument("--incremental", default=False, action="store_true",
+                        help="Regenerate only the modules whose sources have changed since the last run")
+    parser.add_argument("--cache-dir", type=str,
+                        help="Directory where parsed source files will be cached for subsequent runs")
+    parser.add_argument("--streaming", default=False, action="store_true",
+                        help="Release parsed documents as soon as their modules are written to reduce memory usage")
+    parser.add_argument("--signatures-only", default=False, action="store_true",
+                        help="Generate stubs without docstrings, skipping the prose in the source files")
+    parser.add_argument("--shard", type=str, metavar="INDEX/COUNT",
+                        help="Generate only the INDEX-th of COUNT groups of top-level modules (e.g. 1/4), which can be "
+                             "merged with 'python -m bpystubgen.merge' later")
+    parser.add_argument("--split-classes", type=int, default=0, metavar="SIZE",
+                        help="Write the classes of each module to private modules of up to SIZE classes each")
+    parser.add_argument("--store-dir", type=str,
+                        help="Directory where each distinct file will be stored once, to which the generated files "
+                             "will be hard linked (see 'python -m bpystubgen.batch')")
+    parser.add_argument("--wheel", type=str, metavar="NAME==VERSION",
+                        help="Package the stubs into a wheel with the given name and version instead of writing them")
+    parser.add_argument("--profile-report", type=str,
+                        help="Save the time spent on each phase of every task to PATH.json and PATH.csv")
+    parser.add_argument("--profile-top", type=int, default=10,
+                        help="Number of the slowest tasks to include in the profile report (default: 10)")
+    parser.add_argument("--type-report", type=str,
+                        help="Save the rules which resolved each type field and the unresolved types to a JSON file")
+    parser.add_argument("--verbose", default=False, action="store_true", help="Print debug messages")
+    parser.add_argument("--quiet", default=False, action="store_true", help="Print only error messages")
 
-parser = ArgumentParser(
-    prog="bpystubgen",
-    description="Generate Python API stubs from Blender's documentation.")
+    args = parser.parse_args()
+
+    # Sphinx and the rest of the modules are imported only after the arguments are parsed,
+    # so that commands like "--help" can return quickly.
+    from bpystubgen.runner import Runner
+    from bpystubgen.tasks import Task
+
+    source = Path(args.input).expanduser()
+    dest = Path(args.output).expanduser()
+
+    if not source.is_dir():
+        sys.exit(f"The specified input is not a valid directory: {source}")
+
+    if dest.exists():
+        if dest.is_file():
+            sys.exit(f"The specified output already exists but it's not a valid directory: {dest}")
+    else:
+        dest.mkdir(parents=True)
+
+    if args.wheel and "==" not in args.wheel:
+        sys.exit(f"The wheel must be specified in the form of NAME==VERSION: {args.wheel}")
+
+    shard = None
+
+    if args.shard:
+        try:
+            (index, count) = map(int, args.shard.split("/"))
+        except ValueError:
+            sys.exit(f"The shard must be specified in the form of INDEX/COUNT: {args.shard}")
+
+        if not 0 < index <= count:
+            sys.exit(f"The shard index must be between 1 and the number of shards: {args.shard}")
+
+        shard = (index, count)
+
+    if args.split_classes < 0:
+        sys.exit(f"The number of classes per module must not be negative: {args.split_classes}")
+
+    if args.jobs < 1:
+        sys.exit(f"The number of jobs must be a positive integer: {args.jobs}")
+
+    if args.quiet:
+        log_level = logging.WARNING
+    elif args.verbose:
+        log_level = logging.DEBUG
+    else:
+        log_level = logging.INFO
+
+    logging.basicConfig(level=log_level, format="[%(levelname)s] %(name)s - %(message)s")
+    logger = logging.getLogger("bpystubgen")
+
+    logger.info("Reading *.rst files from the source location: %s", source)
+
+    started = time.perf_counter()
+
+    root = Task.create(source, shard=shard)
+    cache_dir = Path(args.cache_dir).expanduser() if args.cache_dir else None
+
+    runner = Runner(dest,
+                    jobs=args.jobs,
+                    incremental=args.incremental,
+                    cache_dir=cache_dir,
+                    streaming=args.streaming,
+                    signatures_only=args.signatures_only,
+                    wheel=args.wheel,
+                    split_classes=args.split_classes,
+                    store_dir=Path(args.store_dir).expanduser() if args.store_dir else None,
+                    profile=bool(args.profile_report),
+                    track_types=bool(args.type_report))
+    total = runner.run(root)
+
+    elapsed = time.perf_counter() - started
 
-parser.add_argument("input", type=str,
-                    help="Source directory where *.rst files are located")
-parser.add_argument("output", type=str, default=".",
-                    help="Output directory where generated modules will be saved")
-parser.add_argument("--verbose", default=False, action="store_true", help="Print debug messages")
-parser.add_argument("--quiet", default=False, action="store_true", help="Print only error messages")
+    logger.info("Finished processing %d entries in %d seconds.", total, elapsed)
 
-args = parser.parse_args()
+    if args.profile_report:
+        profiler = runner.profiler
 
-source = Path(args.input).expanduser()
-dest = Path(args.output).expanduser()
+        for (phase, seconds) in profiler.totals().items():
+            logger.info("Time spent on %s: %.2f seconds.", phase, seconds)
 
-if not source.is_dir():
-    sys.exit(f"The specified input is not a valid directory: {source}")
+        for (task, seconds) in profiler.slowest(args.profile_top):
+            logger.info("Slowest task: %s (%.2f seconds).", task, seconds)
 
-if dest.exists():
-    if dest.is_file():
-        sys.exit(f"The specified output already exists but it's not a valid directory: {dest}")
-else:
-    dest.mkdir(parents=True)
+        (json_path, csv_path) = profiler.save(Path(args.profile_report).expanduser(), args.profile_top)
 
-if args.quiet:
-    log_level = logging.WARNING
-elif args.verbose:
-    log_level = logging.DEBUG
-else:
-    log_level = logging.INFO
+        logger.info("Saved the profile report to %s and %s.", json_path, csv_path)
 
-logging.basicConfig(level=log_level, format="[%(levelname)s] %(name)s - %(message)s")
-logger = logging.getLogger("bpystubgen")
+    if args.type_report:
+        from bpystubgen.parser import type_stats
 
-logger.info("Reading *.rst files from the source location: %s", source)
+        report = type_stats.report()
 
-started = time.perf_counter()
+        logger.info("Resolved %(resolved)d of %(total)d type fields.", report["fields"])
 
-root = Task.create(source)
+        type_stats.save(Path(args.type_report).expanduser())
 
-# noinspection DuplicatedCode
-components = (Parser,)
+        logger.info("Saved the type report to %s.", args.type_report)
 
-app = Sphinx(srcdir=".", confdir=None, outdir=str(dest), doctreedir=".", buildername="text")
 
-settings = OptionParser(components=components).get_default_values()
-
-settings.line_length_limit = 15000
-settings.report_level = 5
-settings.traceback = True
-settings.env = app.env
-
-builder = RstBuilder(app)
-builder.config.rst_indent = 2
-
-writer = StubWriter(builder)
-
-total = len(tuple(root))
-done = 0
-
-for task in root:
-    done += 1
-
-    logger.info("Processing %s (%d of %d)", task.full_name, done, total)
-
-    if task.full_name in blacklist:
-        logger.info("Skipping blacklisted file: %s.", task)
-        continue
-
-    try:
-        if isinstance(task, ParserTask):
-            task.parse(settings, app.env)
-
-        if isinstance(task, ModuleTask):
-            task.generate(dest, writer)
-    except BaseException as e:
-        logger.error("Failed to process task: %s", task, exc_info=e)
-
-elapsed = time.perf_counter() - started
-
-logger.info("Finished processing %d entries in %d seconds.", total, elapsed)
+if __name__ == "__main__":
+    main()
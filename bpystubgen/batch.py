@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+import sys
+import time
+from argparse import ArgumentParser
+from itertools import chain
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Tuple
+
+if TYPE_CHECKING:
+    from bpystubgen.runner import Runner
+
+
+def parse_source(text: str) -> Tuple[str, Path]:
+    (name, separator, path) = text.partition("=")
+
+    if not separator:
+        (name, path) = (Path(text).expanduser().name, text)
+
+    if not name or name.startswith(".") or "/" in name or "\\" in name:
+        raise ValueError(f"Invalid name for the output directory of the source: {text}")
+
+    return name, Path(path).expanduser()
+
+
+def build(sources: Mapping[str, Path],
+          dest: Path,
+          cache_dir: Optional[Path] = None,
+          **options: Any) -> Mapping[str, Runner]:
+    # Sphinx and the rest of the modules are imported only when needed, so that "--help" can return quickly.
+    from bpystubgen.runner import Runner
+    from bpystubgen.store import Store
+    from bpystubgen.tasks import Task
+
+    store = Store(dest / ".bpystubgen" / "store")
+
+    # Sources which are identical between the versions are parsed only once, as the cache is keyed by their content.
+    cache_dir = cache_dir or dest / ".bpystubgen" / "cache"
+
+    runners: Dict[str, Runner] = dict()
+
+    for (name, source) in sources.items():
+        Runner.logger.info("Generating the stubs for %s from %s.", name, source)
+
+        runner = Runner(dest / name, cache_dir=cache_dir, store_dir=store.directory, **options)
+        runner.run(Task.create(source))
+
+        runners[name] = runner
+
+    removed = store.prune()
+
+    Runner.logger.debug("Removed %d files from the store which are no longer used.", removed)
+
+    return runners
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        prog="bpystubgen.batch",
+        description="Generate Python API stubs for several versions of Blender at once, storing each identical "
+                    "file only once.")
+
+    parser.add_argument("output", type=str,
+                        help="Output directory where the modules of each version will be saved in a subdirectory")
+    parser.add_argument("sources", type=str, nargs="+", metavar="[NAME=]SOURCE",
+                        help="Source directory where *.rst files of a version are located, optionally prefixed with "
+                             "the name of its output directory (default: the name of the source directory)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of processes to use for parsing source files (default: 1)")
+    parser.add_argument("--incremental", default=False, action="store_true",
+                        help="Regenerate only the modules whose sources have changed since the last run")
+    parser.add_argument("--cache-dir", type=str,
+                        help="Directory where parsed source files will be cached for all versions "
+                             "(default: .bpystubgen/cache under the output directory)")
+    parser.add_argument("--streaming", default=False, action="store_true",
+                        help="Release parsed documents as soon as their modules are written to reduce memory usage")
+    parser.add_argument("--signatures-only", default=False, action="store_true",
+                        help="Generate stubs without docstrings, skipping the prose in the source files")
+    parser.add_argument("--split-classes", type=int, default=0, metavar="SIZE",
+                        help="Write the classes of each module to private modules of up to SIZE classes each")
+    parser.add_argument("--verbose", default=False, action="store_true", help="Print debug messages")
+    parser.add_argument("--quiet", default=False, action="store_true", help="Print only error messages")
+
+    args = parser.parse_args()
+
+    dest = Path(args.output).expanduser()
+
+    try:
+        sources = dict(map(parse_source, args.sources))
+    except ValueError as e:
+        sys.exit(str(e))
+
+    if len(sources) < len(args.sources):
+        sys.exit("Each source must have a different name, which can be specified as NAME=SOURCE.")
+
+    for source in filter(lambda s: not s.is_dir(), sources.values()):
+        sys.exit(f"The specified input is not a valid directory: {source}")
+
+    if dest.is_file():
+        sys.exit(f"The specified output already exists but it's not a valid directory: {dest}")
+
+    if args.split_classes < 0:
+        sys.exit(f"The number of classes per module must not be negative: {args.split_classes}")
+
+    if args.jobs < 1:
+        sys.exit(f"The number of jobs must be a positive integer: {args.jobs}")
+
+    if args.quiet:
+        log_level = logging.WARNING
+    elif args.verbose:
+        log_level = logging.DEBUG
+    else:
+        log_level = logging.INFO
+
+    logging.basicConfig(level=log_level, format="[%(levelname)s] %(name)s - %(message)s")
+    logger = logging.getLogger("bpystubgen")
+
+    started = time.perf_counter()
+
+    runners = build(sources, dest,
+                    cache_dir=Path(args.cache_dir).expanduser() if args.cache_dir else None,
+                    jobs=args.jobs,
+                    incremental=args.incremental,
+                    streaming=args.streaming,
+                    signatures_only=args.signatures_only,
+                    split_classes=args.split_classes)
+
+    elapsed = time.perf_counter() - started
+
+    files = chain.from_iterable(map(lambda r: r.manifest.files.items(), runners.values()))
+    stubs = tuple(filter(lambda f: f[0].endswith(".pyi"), files))
+
+    logger.info("Generated %d stubs for %d versions in %d seconds, %d of which are unique.",
+                len(stubs), len(runners), elapsed, len(set(map(lambda s: s[1], stubs))))
+
+
+if __name__ == "__main__":
+    main()
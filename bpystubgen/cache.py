@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from hashlib import sha256
+from pathlib import Path
+from typing import Final, Optional
+
+import docutils
+import sphinx
+from docutils.frontend import Values
+from docutils.nodes import document
+
+import bpystubgen
+from bpystubgen import nodes, patches
+from bpystubgen.files import replace_file
+
+_versions: Final = " ".join((
+    "bpystubgen", bpystubgen.__version__,
+    "docutils", docutils.__version__,
+    "sphinx", sphinx.__version__))
+
+
+class DoctreeCache:
+
+    def __init__(self, directory: Path, signatures_only: bool = False) -> None:
+        self.directory = directory
+        self.signatures_only = signatures_only
+
+    def key(self, source: Path, patch: Optional[str] = None) -> str:
+        digest = sha256(_versions.encode("UTF-8"))
+
+        # Documents parsed without docstrings must not be used to generate complete stubs.
+        if self.signatures_only:
+            digest.update(b"signatures-only")
+
+        digest.update(source.read_bytes())
+
+        if patch and patch in patches.patches:
+            digest.update(patches.source(patch))
+
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / (key[2:] + ".pickle")
+
+    def load(self, key: str, settings: Values) -> Optional[document]:
+        try:
+            data = self.path(key).read_bytes()
+        except OSError:
+            return None
+
+        try:
+            return nodes.loads(data, settings)
+        except Exception:
+            # Treat corrupt or incompatible entries as if they do not exist.
+            return None
+
+    def save(self, key: str, doctree: document) -> None:
+        replace_file(self.path(key), nodes.dumps(doctree))
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Final, Mapping, Optional, Sequence
+
+import bpystubgen
+from bpystubgen.tasks import ParserTask
+
+# Weight of the latest measurement, which smooths out the noise between runs (e.g. doctree cache hits).
+_smoothing: Final = 0.5
+
+
+class CostModel:
+
+    @classmethod
+    def load(cls, path: Path) -> CostModel:
+        try:
+            data = json.loads(path.read_text("UTF-8"))
+            timings = data["timings"] if data.get("version") == bpystubgen.__version__ else {}
+        except (OSError, ValueError, KeyError, TypeError):
+            timings = {}
+
+        return CostModel(path, timings)
+
+    def __init__(self, path: Path, timings: Optional[Mapping[str, float]] = None) -> None:
+        self.path = path
+
+        self._timings: Dict[str, float] = dict(timings) if timings else dict()
+
+    @property
+    def timings(self) -> Mapping[str, float]:
+        return self._timings
+
+    def estimate(self, tasks: Sequence[ParserTask]) -> Mapping[ParserTask, float]:
+        sizes = dict(map(lambda t: (t, t.source.stat().st_size if t.source else 0), tasks))
+        known = tuple(filter(lambda t: t.full_name in self._timings, tasks))
+
+        # Convert the sizes of the tasks which have never been measured to seconds using the average throughput
+        # of those which have, so that both can be compared with each other.
+        total_size = sum(map(lambda t: sizes[t], known))
+        rate = sum(map(lambda t: self._timings[t.full_name], known)) / total_size if total_size else 1.0
+
+        return dict(map(lambda t: (t, self._timings.get(t.full_name, sizes[t] * rate)), tasks))
+
+    def order(self, tasks: Sequence[ParserTask]) -> Sequence[ParserTask]:
+        costs = self.estimate(tasks)
+
+        return tuple(sorted(tasks, key=lambda t: (-costs[t], t.full_name)))
+
+    def record(self, task: ParserTask, elapsed: float) -> None:
+        previous = self._timings.get(task.full_name)
+
+        self._timings[task.full_name] = \
+            elapsed if previous is None else previous * (1 - _smoothing) + elapsed * _smoothing
+
+    def save(self) -> None:
+        data = {
+            "version": bpystubgen.__version__,
+            "timings": dict(sorted(self._timings.items()))
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(data, indent=2), "UTF-8")
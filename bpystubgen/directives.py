@@ -9,11 +9,13 @@ from typing import Any, List, Mapping, Optional, OrderedDict, Sequence, cast
 from docutils import nodes
 from docutils.nodes import Element, Node, field_list, paragraph
 from docutils.parsers.rst import Directive
+from docutils.statemachine import StringList
 from docutils.transforms import Transform
 
+import bpystubgen
 from bpystubgen.nodes import APIMember, Argument, Class, ClassRef, Data, DocString, Function, FunctionScope, \
-    Module, Property
-from bpystubgen.parser import parse_type
+    Module, Property, signature_lines
+from bpystubgen.parser import parse_type, type_stats
 
 
 class ModuleTransform(Transform):
@@ -112,7 +114,13 @@ class APIMemberDirective(Directive, ABC):
         docstring = DocString()
         members = []
 
-        self.state.nested_parse(self.content, self.content_offset, docstring)
+        content = self.content
+
+        if getattr(self.state.document.settings, "signatures_only", False):
+            lines = signature_lines(content)
+            content = StringList(list(map(lambda i: content[i], lines)), items=list(map(content.info, lines)))
+
+        self.state.nested_parse(content, self.content_offset, docstring)
 
         for member in tuple(filter(lambda c: isinstance(c, APIMember), docstring.children)):
             members.append(cast(APIMember, member))
@@ -157,6 +165,7 @@ class DataLikeDirective(APIMemberDirective, ABC):
 
         if "type" in ds.fields:
             type_info = parse_type(ds.fields["type"])
+            type_stats.record(ds.fields["type"], type_info)
 
             if type_info:
                 elem.type = type_info
@@ -250,6 +259,7 @@ class FunctionLikeDirective(APIMemberDirective, ABC):
 
             if key in fields:
                 type_info = parse_type(fields[key])
+                type_stats.record(fields[key], type_info)
 
                 if type_info:
                     elem.type = type_info
@@ -304,6 +314,7 @@ class FunctionDirective(FunctionLikeDirective):
 
                 if "rtype" in ds.fields:
                     type_info = parse_type(ds.fields["rtype"])
+                    type_stats.record(ds.fields["rtype"], type_info)
 
                     if type_info:
                         elem.type = type_info
@@ -429,3 +440,6 @@ class CurrentModuleDirective(Directive):
 
     def run(self) -> List[Node]:
         return []
+
+
+bpystubgen.register()
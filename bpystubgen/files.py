@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+
+def _current_umask() -> int:
+    # Linux reports the umask of the process, which can be read without changing it.
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+
+    # Otherwise, it can only be read by setting it, so it is restored right away.
+    umask = os.umask(0)
+    os.umask(umask)
+
+    return umask
+
+
+@lru_cache(maxsize=None)
+def file_mode() -> int:
+    # Mode of the files created by open(), which is what write_file() gives to the files it writes.
+    return 0o666 & ~_current_umask()
+
+
+def replace_file(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file first, so that concurrent readers never see a partially written file.
+    with NamedTemporaryFile("wb", dir=path.parent, delete=False) as file:
+        file.write(data)
+
+    # Temporary files are only readable by their owner, which would prevent the file from being shared.
+    os.chmod(file.name, file_mode())
+    os.replace(file.name, path)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+import bpystubgen
+from bpystubgen.tasks import ModuleTask
+
+
+class BuildState:
+
+    @classmethod
+    def load(cls, path: Path, mode: str = "full") -> BuildState:
+        try:
+            data = json.loads(path.read_text("UTF-8"))
+            current = data.get("version") == bpystubgen.__version__ and data.get("mode", "full") == mode
+            checksums = data["checksums"] if current else {}
+        except (OSError, ValueError, KeyError):
+            checksums = {}
+
+        return BuildState(path, checksums, mode)
+
+    def __init__(self, path: Path, checksums: Optional[Mapping[str, str]] = None, mode: str = "full") -> None:
+        self.path = path
+        self.mode = mode
+
+        self._previous: Mapping[str, str] = dict(checksums) if checksums else dict()
+        self._current: Dict[str, str] = dict()
+
+    @property
+    def checksums(self) -> Mapping[str, str]:
+        return self._current
+
+    def is_current(self, task: ModuleTask, dest_dir: Path) -> bool:
+        if self._previous.get(task.full_name) != task.checksum():
+            return False
+
+        return task.target_path(dest_dir).exists()
+
+    def update(self, task: ModuleTask) -> None:
+        self._current[task.full_name] = task.checksum()
+
+    def save(self) -> None:
+        data = {
+            "version": bpystubgen.__version__,
+            "mode": self.mode,
+            "checksums": dict(sorted(self._current.items()))
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(data, indent=2), "UTF-8")
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import bpystubgen
+from bpystubgen.store import Store
+
+
+def write_file(path: Path, data: bytes) -> bool:
+    try:
+        # Leave the file untouched if it already has the same content, so that its timestamp is preserved.
+        if path.read_bytes() == data:
+            return False
+
+        # Replace the file rather than writing to it, as it may be a hard link to a file in a store.
+        path.unlink()
+    except OSError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    path.write_bytes(data)
+
+    return True
+
+
+class Output(ABC):
+
+    @abstractmethod
+    def write(self, path: Path, data: bytes) -> bool:
+        pass
+
+
+class Manifest(Output):
+
+    @classmethod
+    def load(cls, dest_dir: Path, store: Optional[Store] = None) -> Manifest:
+        manifest = Manifest(dest_dir, store=store)
+
+        try:
+            data = json.loads(manifest.path.read_text("UTF-8"))
+            manifest._previous = dict(data["files"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        return manifest
+
+    def __init__(self,
+                 dest_dir: Path,
+                 files: Optional[Mapping[str, str]] = None,
+                 store: Optional[Store] = None) -> None:
+        self.dest_dir = dest_dir
+        self.store = store
+        self.path = dest_dir / ".bpystubgen" / "manifest.json"
+
+        self._previous: Mapping[str, str] = dict(files) if files else dict()
+        self._current: Dict[str, str] = dict()
+
+        self._changed: List[str] = []
+        self._removed: List[str] = []
+
+    @property
+    def previous(self) -> Mapping[str, str]:
+        return self._previous
+
+    @property
+    def files(self) -> Mapping[str, str]:
+        return self._current
+
+    @property
+    def changed(self) -> Sequence[str]:
+        return self._changed
+
+    @property
+    def removed(self) -> Sequence[str]:
+        return self._removed
+
+    def key(self, path: Path) -> str:
+        return path.resolve().relative_to(self.dest_dir.resolve()).as_posix()
+
+    def write(self, path: Path, data: bytes) -> bool:
+        key = self.key(path)
+        checksum = sha256(data).hexdigest()
+
+        # The same file (e.g. py.typed) may be written by more than one module.
+        if self._current.get(key) == checksum:
+            return False
+
+        self._current[key] = checksum
+
+        if not (self.store.link(path, data) if self.store else write_file(path, data)):
+            return False
+
+        self._changed.append(key)
+
+        return True
+
+    def keep(self, path: Path) -> None:
+        key = self.key(path)
+
+        if key in self._current:
+            return
+
+        if key in self._previous:
+            self._current[key] = self._previous[key]
+        elif path.exists():
+            self._current[key] = sha256(path.read_bytes()).hexdigest()
+
+    def prune(self) -> Sequence[str]:
+        root = self.dest_dir.resolve()
+
+        for key in sorted(self._previous.keys() - self._current.keys()):
+            path = (root / key).resolve()
+
+            if root not in path.parents:
+                continue
+
+            path.unlink(missing_ok=True)
+
+            self._removed.append(key)
+
+            # Remove the directories which are left empty, but never the output directory itself.
+            parent = path.parent
+
+            while parent != root and parent.is_dir() and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+
+        return self._removed
+
+    def save(self) -> None:
+        data = {
+            "version": bpystubgen.__version__,
+            "files": dict(sorted(self._current.items())),
+            "changed": sorted(self._changed),
+            "removed": sorted(self._removed)
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(data, indent=2), "UTF-8")
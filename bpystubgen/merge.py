@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import logging
+import sys
+from argparse import ArgumentParser
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, Sequence
+
+from bpystubgen.manifest import Manifest
+
+
+def merge(shard_dirs: Sequence[Path], dest: Path) -> Manifest:
+    sources: Dict[str, Path] = dict()
+    checksums: Dict[str, str] = dict()
+
+    # Collect the files first, so that nothing is written if the shards cannot be merged.
+    for shard_dir in shard_dirs:
+        manifest = Manifest.load(shard_dir)
+
+        if not manifest.path.exists():
+            raise ValueError(f"No manifest found in the shard: {shard_dir}")
+
+        for (key, checksum) in manifest.previous.items():
+            if checksums.get(key, checksum) != checksum:
+                raise ValueError(f"The shards have different contents for the same file: {key}")
+
+            sources[key] = shard_dir / key
+            checksums[key] = checksum
+
+    merged = Manifest.load(dest)
+
+    for (key, source) in sorted(sources.items()):
+        data = source.read_bytes()
+
+        if sha256(data).hexdigest() != checksums[key]:
+            raise ValueError(f"The file has been modified since the shard was generated: {source}")
+
+        merged.write(dest / key, data)
+
+    merged.prune()
+    merged.save()
+
+    return merged
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        prog="bpystubgen.merge",
+        description="Merge the outputs of bpystubgen generated with --shard into a single directory.")
+
+    parser.add_argument("output", type=str,
+                        help="Output directory where the merged modules will be saved")
+    parser.add_argument("shards", type=str, nargs="+",
+                        help="Output directories of the shards to merge")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(name)s - %(message)s")
+    logger = logging.getLogger("bpystubgen")
+
+    dest = Path(args.output).expanduser()
+    shard_dirs = tuple(map(lambda s: Path(s).expanduser(), args.shards))
+
+    if dest.resolve() in map(lambda s: s.resolve(), shard_dirs):
+        sys.exit(f"The output directory must be different from those of the shards: {dest}")
+
+    try:
+        manifest = merge(shard_dirs, dest)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    logger.info("Merged %d files from %d shards, updated %d and removed %d.",
+                len(manifest.files), len(shard_dirs), len(manifest.changed), len(manifest.removed))
+
+
+if __name__ == "__main__":
+    main()
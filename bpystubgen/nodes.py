@@ -1,20 +1,37 @@
 from __future__ import annotations
 
+import pickle
+import re
 from abc import ABC, abstractmethod
+from collections import defaultdict
 from enum import Enum
 from graphlib import TopologicalSorter
 from io import StringIO
+from itertools import chain
 from pathlib import Path
-from typing import Final, Mapping, Optional, Sequence, Set, TextIO, Tuple, cast
+from typing import TYPE_CHECKING, AbstractSet, Any, Dict, Final, FrozenSet, Iterable, List, Mapping, Optional, \
+    Sequence, Set, TextIO, Tuple, cast
 
 from docutils.core import publish_doctree
 from docutils.frontend import Values
 from docutils.io import FileInput
-from docutils.nodes import Element, Inline, TextElement, document
-from sphinx.environment import BuildEnvironment
+from docutils.nodes import Element, Inline, Node, TextElement, document
+from docutils.transforms import Transformer
+from docutils.utils import new_reporter
 
 from bpystubgen.parser import _known_types
 
+if TYPE_CHECKING:
+    from sphinx.environment import BuildEnvironment
+
+_type_name_pattern: Final = re.compile("[\\w.]+")
+
+_signature_block_pattern: Final = re.compile(
+    "\\.\\. (?:module|currentmodule|data|attribute|property|function|method|classmethod|staticmethod|class)::|"
+    ":[^:`]+:(?:\\s|$)|"
+    "B\\{|"
+    "base class")
+
 
 def from_path(source: Path, settings: Values, env: BuildEnvironment) -> Optional[document]:
     return from_io(source.open("r"), str(source), settings, env)
@@ -24,6 +41,10 @@ def from_io(source: TextIO, source_path: str, settings: Values, env: BuildEnviro
     env.project.docnames.add(source_path)
     env.prepare_settings(source_path)
 
+    if getattr(settings, "signatures_only", False):
+        lines = source.read().splitlines()
+        source = StringIO("\n".join(map(lambda i: lines[i], signature_lines(lines))))
+
     doctree = publish_doctree(
         source,
         source_class=FileInput,
@@ -33,14 +54,156 @@ def from_io(source: TextIO, source_path: str, settings: Values, env: BuildEnviro
     return doctree
 
 
-class Referencing(ABC):
+def signature_lines(lines: Sequence[str]) -> Sequence[int]:
+    kept: List[int] = []
+
+    keep = False
+    new_block = True
+
+    # Keep only the blocks which are needed to generate signatures (i.e. API directives, field lists, aliases and base
+    # classes), along with their indented contents.
+    for (index, line) in enumerate(lines):
+        if not line.strip():
+            new_block = True
+        else:
+            if new_block and not line[0].isspace():
+                keep = _signature_block_pattern.match(line) is not None
+
+            new_block = False
+
+        if keep:
+            kept.append(index)
+
+    return kept
+
+
+def dumps(doctree: document) -> bytes:
+    state = (doctree.settings, doctree.reporter, doctree.transformer)
+
+    # Settings and the reporter refer to the build environment and output streams which cannot be pickled.
+    doctree.settings = None
+    doctree.reporter = None
+    doctree.transformer = None
+
+    try:
+        return pickle.dumps(doctree, pickle.HIGHEST_PROTOCOL)
+    finally:
+        (doctree.settings, doctree.reporter, doctree.transformer) = state
+
+
+def loads(data: bytes, settings: Values) -> document:
+    doctree = cast(document, pickle.loads(data))
+
+    doctree.settings = settings
+    doctree.reporter = new_reporter(doctree.get("source", ""), settings)
+    doctree.transformer = Transformer(doctree)
+
+    return doctree
+
+
+def _split_names(node: Element, key: str) -> Tuple[str, ...]:
+    value = node.attributes.get(key)
+
+    if not value:
+        return ()
+
+    # Lists of names are stored as comma separated strings, so that they can be serialised like other attributes,
+    # and split only when the value has been changed since the last access.
+    cached = getattr(node, "_names", None)
+
+    if cached and cached[0] is value:
+        return cached[1]
+
+    names = tuple(map(lambda v: v.strip(), str(value).split(",")))
+
+    setattr(node, "_names", (value, names))
+
+    return names
+
+
+# Replaced whenever a node is attached to or detached from an API node, or renamed, so that the values derived from
+# the ancestors of a node can be cached until then. It is not a counter, so that the values cached by another process
+# never match after being unpickled.
+_structure_version: object = object()
+
+
+def _structure_changed() -> None:
+    global _structure_version
+    _structure_version = object()
+
+
+class Referencing(Element, ABC):
+    _referred_types: Optional[FrozenSet[str]] = None
 
     @property
-    def referred_types(self) -> Set[str]:
+    def referred_types(self) -> AbstractSet[str]:
+        # Computed once and cached until the node, or any of its descendants which can refer to a type changes.
+        if self._referred_types is None:
+            self._referred_types = frozenset(self.collect_referred_types())
+
+        return self._referred_types
+
+    def collect_referred_types(self) -> Set[str]:
         return {"typing"}
 
+    def invalidate_referred_types(self) -> None:
+        node = self
+
+        while node is not None:
+            if isinstance(node, Referencing):
+                node._referred_types = None
+
+            node = node.parent
+
+    def setup_child(self, child: Node) -> None:
+        super().setup_child(child)
+
+        _structure_changed()
+
+        if isinstance(child, Referencing):
+            self.invalidate_referred_types()
+
+    def __setitem__(self, key: Any, item: Any) -> None:
+        super().__setitem__(key, item)
+
+        _structure_changed()
+
+        self.invalidate_referred_types()
+
+    def __delitem__(self, key: Any) -> None:
+        super().__delitem__(key)
+
+        _structure_changed()
+
+        self.invalidate_referred_types()
+
+    def pop(self, i: int = -1) -> Node:
+        child = super().pop(i)
+
+        _structure_changed()
+
+        if isinstance(child, Referencing):
+            self.invalidate_referred_types()
+
+        return child
+
+    def remove(self, item: Node) -> None:
+        super().remove(item)
+
+        _structure_changed()
+
+        if isinstance(item, Referencing):
+            self.invalidate_referred_types()
+
+    def clear(self) -> None:
+        super().clear()
+
+        _structure_changed()
 
-class Typed(Element, Referencing, ABC):
+        self.invalidate_referred_types()
+
+
+class Typed(Referencing, ABC):
 
     @property
     def type(self) -> Optional[str]:
@@ -53,9 +216,10 @@ class Typed(Element, Referencing, ABC):
         elif "type" in self.attributes:
             del self.attributes["type"]
 
-    @property
-    def referred_types(self) -> Set[str]:
-        references = super().referred_types
+        self.invalidate_referred_types()
+
+    def collect_referred_types(self) -> Set[str]:
+        references = super().collect_referred_types()
 
         rtype = self.type
 
@@ -66,6 +230,7 @@ class Typed(Element, Referencing, ABC):
 
 
 class Named(Element, ABC):
+    _full_name: Tuple[Optional[object], Optional[str]] = (None, None)
 
     @property
     def name(self) -> Optional[str]:
@@ -78,29 +243,29 @@ class Named(Element, ABC):
         elif "name" in self.attributes:
             del self.attributes["name"]
 
+        _structure_changed()
+
     @property
     def full_name(self) -> Optional[str]:
-        name = self.name
+        (version, full_name) = self._full_name
 
-        if not name:
-            return None
+        if version is _structure_version:
+            return full_name
 
-        identifiers = [name]
+        name = self.name
         parent = self.parent
 
-        while isinstance(parent, Named):
-            name = parent.name
-
-            if name:
-                identifiers.append(name)
-            else:
-                return None
-
-            parent = parent.parent
+        if not name:
+            full_name = None
+        elif isinstance(parent, Named):
+            prefix = parent.full_name
+            full_name = ".".join((prefix, name)) if prefix else None
+        else:
+            full_name = name
 
-        identifiers.reverse()
+        self._full_name = (_structure_version, full_name)
 
-        return ".".join(identifiers)
+        return full_name
 
 
 class Documentable(Element, ABC):
@@ -123,6 +288,7 @@ class Referencable(Named, ABC):
 
 
 class APIMember(Documentable, Referencable, Typed, Element, ABC):
+    _module: Tuple[Optional[object], Optional[Module]] = (None, None)
 
     @property
     @abstractmethod
@@ -136,15 +302,21 @@ class APIMember(Documentable, Referencable, Typed, Element, ABC):
 
     @property
     def module(self) -> Optional[Module]:
-        parent = self.parent
+        (version, module) = self._module
 
-        while parent:
-            if isinstance(parent, Module):
-                return parent
+        if version is _structure_version:
+            return module
+
+        parent = self.parent
 
+        while parent and not isinstance(parent, (Module, APIMember)):
             parent = parent.parent
 
-        return None
+        module = parent.module if isinstance(parent, APIMember) else parent
+
+        self._module = (_structure_version, module)
+
+        return module
 
     def localise_name(self, name: str) -> str:
         module = self.module
@@ -162,6 +334,9 @@ class APICollection(Element, ABC):
 class Module(Referencable, Referencing, Documentable, APICollection):
     tagname = "module"
 
+    # Classes of the module which are written to separate files, mapped to the names of those files.
+    _split_classes: Mapping[str, str] = dict()
+
     def create_ref(self, simple: bool = False) -> Optional[Reference]:
         name = self.name
 
@@ -173,12 +348,11 @@ class Module(Referencable, Referencing, Documentable, APICollection):
 
         return ModuleRef(text=name)
 
-    @property
-    def referred_types(self) -> Set[str]:
-        references = super().referred_types
+    def collect_referred_types(self) -> Set[str]:
+        references = super().collect_referred_types()
 
         for member in self.members:
-            references = references.union(member.referred_types)
+            references.update(member.referred_types)
 
         return references
 
@@ -186,7 +360,7 @@ class Module(Referencable, Referencing, Documentable, APICollection):
     def imports(self) -> Sequence[Import]:
         return tuple(self.traverse(Import, include_self=False, ascend=False))
 
-    def import_types(self):
+    def import_types(self) -> None:
         types_to_imports = set()
 
         local_types = set(map(lambda c: c.name, filter(lambda m: isinstance(m, Class), self.members)))
@@ -208,11 +382,29 @@ class Module(Referencable, Referencing, Documentable, APICollection):
 
             types_to_imports.add(name.split(".")[0])
 
+        split_classes = self._split_classes
+        classes_to_imports: Dict[str, Set[str]] = defaultdict(set)
+
+        # Classes of the same module which are written to other files have to be imported from them. The module
+        # itself, which has none of them left, re-exports all of them explicitly as type checkers do not do it
+        # for the names imported in stubs otherwise.
+        if split_classes and not local_types:
+            for (name, module) in split_classes.items():
+                classes_to_imports["." + module].add(f"{name} as {name}")
+        elif split_classes:
+            for tpe in self.referred_types:
+                for name in map(self.localise_name, _type_name_pattern.findall(tpe)):
+                    if name in split_classes and name not in local_types:
+                        classes_to_imports["." + split_classes[name]].add(name)
+
         for i in self.imports:
             i.parent.remove(i)
 
         index = 1 if self.docstring else 0
 
+        for (module, names) in sorted(classes_to_imports.items(), reverse=True):
+            self.insert(index, Import(module=module, types=", ".join(sorted(names))))
+
         for tpe in sorted(types_to_imports):
             self.insert(index, Import(module=tpe))
 
@@ -224,11 +416,54 @@ class Module(Referencable, Referencing, Documentable, APICollection):
 
         # XXX: Hack to replace types in containers (e.g. typing.List[bge.types.KX_GameObject])
         if prefix in name and "typing" in name:
-            for cls in filter(lambda m: isinstance(m, Class), self.members):
-                name = name.replace(cls.full_name, cls.name)
+            names: Iterable[str]
+
+            if self._split_classes:
+                names = self._split_classes.keys()
+            else:
+                names = [m.name for m in self.members if isinstance(m, Class) and m.name]
+
+            for cls_name in names:
+                name = name.replace(prefix + cls_name, cls_name)
 
         return name
 
+    def split(self, size: int) -> Mapping[str, Module]:
+        classes = [(m.name, m) for m in self.members if isinstance(m, Class) and m.name]
+
+        if not any(classes) or size < 1:
+            return dict()
+
+        groups = tuple(map(lambda i: classes[i:i + size], range(0, len(classes), size)))
+        split_classes = dict(chain.from_iterable(map(lambda g: map(lambda c: (c[0], "_" + g[0][0]), g), groups)))
+
+        # Remove all classes at once, rather than one by one.
+        self[:] = tuple(filter(lambda c: not isinstance(c, Class), self.children))
+        self._split_classes = split_classes
+
+        parts: Dict[str, Module] = dict()
+
+        for group in groups:
+            part = Module(name=self.name)
+            part._split_classes = split_classes
+
+            part.extend(tuple(map(lambda c: c[1], group)))
+            part.import_types()
+
+            parts["_" + group[0][0]] = part
+
+        # Imports of the submodules are added after the types are imported, so they have to be restored.
+        submodules = tuple(filter(lambda i: i.module == ".", self.imports))
+
+        self.import_types()
+
+        index = 1 if self.docstring else 0
+
+        for i in reversed(submodules):
+            self.insert(index, i)
+
+        return parts
+
     def sort_members(self) -> None:
         classes = tuple(filter(lambda m: isinstance(m, Class), self.members))
 
@@ -237,33 +472,19 @@ class Module(Referencable, Referencing, Documentable, APICollection):
 
         local_types: Mapping[str, Class] = dict(map(lambda cl: (cl.name, cl), classes))
 
-        def collect_deps(tpe: str, deps: Set[str], add_self: bool = True) -> Set[str]:
-            if tpe in local_types:
-                if add_self:
-                    deps.add(tpe)
-
-                for r in local_types[tpe].referred_types:
-                    local_name = self.localise_name(r)
-                    deps = deps.union(collect_deps(local_name, deps))
-
-            return deps
-
         def create_entry(m: APIMember) -> Tuple[str, Set[str]]:
             cls = cast(Class, m)
             types = set(filter(lambda t: t in local_types and t != m.name, map(self.localise_name, cls.base_types)))
             return m.name, types
 
         graph = dict(map(create_entry, classes))
-        ordered = TopologicalSorter(graph).static_order()
+        ordered = map(lambda n: local_types[n], TopologicalSorter(graph).static_order())
 
+        # Rebuild the list of children at once, rather than moving each class around.
         pos = self.children.index(classes[0])
+        others = tuple(filter(lambda c: not isinstance(c, Class), self.children))
 
-        for ch in classes:
-            ch.parent.remove(ch)
-
-        for name in ordered:
-            self.insert(pos, local_types[name])
-            pos += 1
+        self.children[:] = (*others[:pos], *ordered, *others[pos:])
 
 
 class Data(APIMember):
@@ -346,9 +567,8 @@ class FunctionLike(APIMember, ABC):
     def has_body(self) -> bool:
         return True
 
-    @property
-    def referred_types(self) -> Set[str]:
-        references = super().referred_types
+    def collect_referred_types(self) -> Set[str]:
+        references = super().collect_referred_types()
 
         for arg in self.arguments:
             rtype = arg.type
@@ -364,12 +584,7 @@ class Class(FunctionLike, APICollection):
 
     @property
     def base_types(self) -> Sequence[str]:
-        if not self.hasattr("base_types"):
-            return ()
-
-        value = str(self.attributes["base_types"]).split(",")
-
-        return tuple(map(lambda v: v.strip(), value))
+        return _split_names(self, "base_types")
 
     @base_types.setter
     def base_types(self, value: Sequence[str]) -> None:
@@ -378,14 +593,15 @@ class Class(FunctionLike, APICollection):
         elif "base_types" in self.attributes:
             del self.attributes["base_types"]
 
-    @property
-    def referred_types(self) -> Set[str]:
-        references = super().referred_types
+        self.invalidate_referred_types()
+
+    def collect_referred_types(self) -> Set[str]:
+        references = super().collect_referred_types()
 
         for member in self.members:
-            references = references.union(member.referred_types)
+            references.update(member.referred_types)
 
-        references = references.union(self.base_types)
+        references.update(self.base_types)
 
         return references
 
@@ -527,12 +743,7 @@ class Import(TextElement):
 
     @property
     def types(self) -> Sequence[str]:
-        if not self.hasattr("types"):
-            return ()
-
-        value = str(self.attributes["types"]).split(",")
-
-        return tuple(map(lambda v: v.strip(), value))
+        return _split_names(self, "types")
 
     @types.setter
     def types(self, value: Sequence[str]) -> None:
@@ -619,3 +830,7 @@ class MethodRef(PythonRef):
 
 class AttributeRef(PythonRef):
     tagname = "attrref"
+
+
+# Directives and roles which create the nodes above are registered when they are first imported.
+from bpystubgen import directives
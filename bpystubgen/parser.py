@@ -1,50 +1,16 @@
+from __future__ import annotations
+
+import json
 import re
+from collections import Counter, OrderedDict
+from hashlib import sha256
 from itertools import repeat
-from typing import Final, Optional
-
-_simple_pattern: Final = re.compile(
-    "^(?:unsigned\\s)?(?P<type>[a-zA-Z]+)(?:\\s?\\([^)]+\\))?(?:\\sin\\s[\\[][^]]+[]])?(?:[,.\\s].*)?$")
-
-_container_of_pattern: Final = re.compile(
-    "^(?:[Aa][n]?\\s)?(?P<container>[a-zA-Z]+)\\sof\\s(?::class:`[~!]?(?P<reference>[^`]+)`|"
-    "(?P<data>[a-zA-Z]+))(?P<qualifier>[',.\\s].*)?$")
-
-_prop_collection_of_pattern: Final = re.compile(
-    "^(?:[Aa][n]?\\s)?(?::class:`[~!]?(?P<base>[^`]+)`\\s+)?:class:`bpy_prop_collection`\\sof\\s"
-    "(?::class:`[~!]?(?P<reference>[^`]+)`|(?P<data>[a-zA-Z]+))(?P<qualifier>[',.\\s].*)?$")
-
-_exp_list_value_of_pattern: Final = re.compile(
-    "^(?:[Aa][n]?\\s)?:class:`[~!]?bge.types.EXP_ListValue`\\sof\\s(?::class:`[~!]?(?P<reference>[^`]+)`|"
-    "(?P<data>[a-zA-Z]+))(?P<qualifier>[',.\\s].*)?$")
-
-_qualified_list_pattern: Final = re.compile(
-    "^(?:[Aa][n]?\\s)?list\\s*\\([a-zA-Z\\s]*vector\\sof\\s[0-9]+\\s(?P<data>[a-zA-Z]+)"
-    "(?:[,.\\s][^)]*)?\\)(?:[,.\\s].*)?$")
-
-_list_bracket_pattern: Final = re.compile(
-    "^list\\s*\\[(?::class:`[~!]?(?P<reference>[^`]+)`|(?P<data>[a-zA-Z]+))](?:[,.\\s].*)?$")
-
-_array_of_pattern: Final = re.compile(
-    "^(?:[Aa][n]?\\s)?(?P<data>[a-z]+)\\sarray\\sof\\s(?P<count>[0-9]+)\\sitems.*$")
-
-_multi_array_of_pattern: Final = re.compile(
-    "^(?:[Aa][n]?\\s)?(?P<data>[a-z]+)\\smulti-dimensional\\sarray\\sof\\s(?P<rows>[0-9]+)"
-    "\\s*\\*\\s*(?P<cols>[0-9]+)\\sitems.*$")
-
-_dictionary_pattern: Final = re.compile(
-    "^(?:[Aa]\\s)?dict(?:ionary)?\\s*[\\[(](?P<key>[^,\\s]+)\\s*,\\s*(?P<value>[^])]+)[])].*$")
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, Final, Iterable, List, Mapping, Optional, Sequence, Tuple
 
-_reference_pattern: Final = re.compile(
-    "^:class:`[~!]?(?P<name>[a-zA-Z_0-9.\\s]+)(?:\\s*<(?P<target>[a-zA-Z_0-9.]+)>)?`(?:[,.\\s].*)?$")
-
-_reference_item_pattern: Final = re.compile(
-    "^[-\\s]*:class:`[~!]?(?P<name>[a-zA-Z_0-9.\\s]+)(?:\\s*<(?P<target>[a-zA-Z_0-9.]+)>)?`$")
-
-_union_pattern: Final = re.compile(
-    "^(?::class:`[~!]?[^`]+`|[a-zA-Z]+)(:?\\sor\\s(?::class:`[~!]?[^`]+`|[a-zA-Z]+))+(?:[,.\\s].*)?$")
-
-_matrix_pattern: Final = re.compile("^(?:[Aa]\\s)?(?:[0-9xX*]+\\s)?[Mm]atrix|"
-                                    "[Mm]atrix(?:\\s?[0-9a-z\\s\\[\\]()]+)?$")
+import bpystubgen
+from bpystubgen.files import replace_file
 
 _known_types: Final = {
     "any": "typing.Any",
@@ -99,54 +65,65 @@ _container_types: Final = {
     "tuple": "typing.Tuple[#T#, ...]"
 }
 
+_reference_content_pattern: Final = re.compile(
+    "[~!]?(?P<name>[a-zA-Z_0-9.\\s]+)(?:\\s*<(?P<target>[a-zA-Z_0-9.]+)>)?")
 
-def parse_simple(text: str) -> Optional[str]:
-    result = _simple_pattern.match(text)
+_exp_list_value_name_pattern: Final = re.compile("[~!]?bge.types.EXP_ListValue")
 
-    if result:
-        type_info = result.group("type").lower()
+_token_pattern: Final = re.compile(
+    ":class:`(?P<ref>[^`]+)`|(?P<word>[a-zA-Z0-9_]+(?:-[a-zA-Z0-9_]+)*)|(?P<punct>\\S)")
 
-        if type_info in _known_types:
-            return _known_types[type_info]
+_articles: Final = ("a", "A", "an", "An")
 
-    return None
 
+def _qualify(data_type: str, qualifier: Optional[str]) -> str:
+    if qualifier:
+        qualifier = qualifier.strip()
 
-def parse_reference(text: str) -> Optional[str]:
-    result = _reference_pattern.match(text)
+        if qualifier.startswith("tuple"):
+            return f"typing.Tuple[{data_type}, ...]"
+        elif qualifier.startswith("list"):
+            return f"typing.List[{data_type}]"
+        elif qualifier.startswith("sequence"):
+            return f"typing.Sequence[{data_type}]"
 
-    type_info = result.group("target") or result.group("name") if result else None
+    return data_type
 
-    return "typing.Any" if type_info == "AnyType" else type_info
 
+def _item_type(reference: Optional[str], data: Optional[str]) -> Optional[str]:
+    if data in _known_types:
+        return _known_types[data]
 
-def parse_qualified_list(text: str) -> Optional[str]:
-    result = _qualified_list_pattern.match(text)
+    result = _reference_content_pattern.fullmatch(reference) if reference else None
 
-    if not result:
-        return None
+    return _reference(*result.group("name", "target")) if result else None
 
-    data_type = result.group("data")
 
-    if data_type in _known_types:
-        return f"typing.List[{_known_types[data_type]}]"
+def _simple(type_info: str) -> Optional[str]:
+    type_info = type_info.lower()
 
-    return None
+    return _known_types[type_info] if type_info in _known_types else None
 
 
-def parse_bracket_list(text: str) -> Optional[str]:
-    result = _list_bracket_pattern.match(text)
+def _reference(name: str, target: Optional[str]) -> Optional[str]:
+    type_info = target or name
 
-    if not result:
-        return None
+    return "typing.Any" if type_info == "AnyType" else type_info
+
+
+def _qualified_list(data_type: str) -> Optional[str]:
+    if data_type in _known_types:
+        return f"typing.List[{_known_types[data_type]}]"
+
+    return None
 
-    data_type = result.group("data")
 
+def _bracket_list(reference: Optional[str], data_type: Optional[str]) -> Optional[str]:
     if data_type in _known_types:
         data_type = _known_types[data_type]
 
     if not data_type:
-        data_type = result.group("reference")
+        data_type = reference
 
     if data_type:
         return f"typing.List[{data_type}]"
@@ -154,36 +131,16 @@ def parse_bracket_list(text: str) -> Optional[str]:
     return None
 
 
-def parse_prop_collection_of(text: str) -> Optional[str]:
-    result = _prop_collection_of_pattern.match(text)
-
-    if not result:
-        return None
-
-    base_type = result.group("base")
-
-    # noinspection DuplicatedCode
-    data_type = result.group("data")
-    qualifier = result.group("qualifier")
-
-    if data_type in _known_types:
-        data_type = _known_types[data_type]
-    else:
-        reference = result.group("reference")
-        data_type = parse_reference("".join((":class:`", reference, "`"))) if reference else None
+def _prop_collection_of(base_type: Optional[str],
+                        reference: Optional[str],
+                        data: Optional[str],
+                        qualifier: Optional[str]) -> Optional[str]:
+    data_type = _item_type(reference, data)
 
     if not data_type:
         return None
 
-    if qualifier:
-        qualifier = qualifier.strip()
-
-        if qualifier.startswith("tuple"):
-            data_type = f"typing.Tuple[{data_type}, ...]"
-        elif qualifier.startswith("list"):
-            data_type = f"typing.List[{data_type}]"
-        elif qualifier.startswith("sequence"):
-            data_type = f"typing.Sequence[{data_type}]"
+    data_type = _qualify(data_type, qualifier)
 
     types = [base_type] if base_type else []
     types.append(f"typing.Sequence[{data_type}]")
@@ -193,35 +150,13 @@ def parse_prop_collection_of(text: str) -> Optional[str]:
     return f"typing.Union[{', '.join(types)}]"
 
 
-def parse_exp_list_value_of(text: str) -> Optional[str]:
-    result = _exp_list_value_of_pattern.match(text)
-
-    if not result:
-        return None
-
-    data_type = result.group("data")
-
-    # noinspection DuplicatedCode
-    qualifier = result.group("qualifier")
-
-    if data_type in _known_types:
-        data_type = _known_types[data_type]
-    else:
-        reference = result.group("reference")
-        data_type = parse_reference("".join((":class:`", reference, "`"))) if reference else None
+def _exp_list_value_of(reference: Optional[str], data: Optional[str], qualifier: Optional[str]) -> Optional[str]:
+    data_type = _item_type(reference, data)
 
     if not data_type:
         return None
 
-    if qualifier:
-        qualifier = qualifier.strip()
-
-        if qualifier.startswith("tuple"):
-            data_type = f"typing.Tuple[{data_type}, ...]"
-        elif qualifier.startswith("list"):
-            data_type = f"typing.List[{data_type}]"
-        elif qualifier.startswith("sequence"):
-            data_type = f"typing.Sequence[{data_type}]"
+    data_type = _qualify(data_type, qualifier)
 
     types = (
         f"typing.Sequence[{data_type}]",
@@ -232,197 +167,733 @@ def parse_exp_list_value_of(text: str) -> Optional[str]:
     return f"typing.Union[{', '.join(types)}]"
 
 
-def parse_container_of(text: str) -> Optional[str]:
-    result = _container_of_pattern.match(text)
+def _container_of(container_type: str,
+                  reference: Optional[str],
+                  data: Optional[str],
+                  qualifier: Optional[str]) -> Optional[str]:
+    container_type = _container_types.get(container_type)
+    data_type = _item_type(reference, data)
 
-    if not result:
+    if not data_type or not container_type:
         return None
 
-    container_type = result.group("container")
+    return container_type.replace("#T#", _qualify(data_type, qualifier))
 
-    data_type = result.group("data")
-    qualifier = result.group("qualifier")
 
-    if container_type in _container_types:
-        container_type = _container_types[container_type]
-    else:
-        container_type = None
+def _make_tuple(data_type: str, count: int) -> str:
+    if count > 5:
+        return f"typing.Tuple[{data_type}, ...]"
 
-    if data_type in _known_types:
-        data_type = _known_types[data_type]
-    else:
-        reference = result.group("reference")
-        data_type = parse_reference("".join((":class:`", reference, "`"))) if reference else None
+    return f"typing.Tuple[{', '.join(repeat(data_type, count))}]"
 
-    if not data_type or not container_type:
+
+def _array_of(data_type: str, count: str) -> Optional[str]:
+    if data_type not in _known_types:
         return None
 
-    if qualifier:
-        qualifier = qualifier.strip()
+    return _make_tuple(_known_types[data_type], int(count))
+
+
+def _multi_array_of(data_type: str, rows: str, cols: str) -> Optional[str]:
+    if data_type not in _known_types:
+        return None
+
+    return _make_tuple(_make_tuple(_known_types[data_type], int(cols)), int(rows))
 
-        if qualifier.startswith("tuple"):
-            data_type = f"typing.Tuple[{data_type}, ...]"
-        elif qualifier.startswith("list"):
-            data_type = f"typing.List[{data_type}]"
-        elif qualifier.startswith("sequence"):
-            data_type = f"typing.Sequence[{data_type}]"
 
-    return container_type.replace("#T#", data_type)
+def _dictionary(key: str, value: str) -> Optional[str]:
+    def guess_type(v):
+        if not v:
+            return "typing.Any"
+
+        if v in _known_types:
+            return _known_types[v]
+
+        return _parse_reference(v) or "typing.Any"
 
+    return f"typing.Dict[{guess_type(key)}, {guess_type(value)}]"
 
-def parse_array_of(text: str) -> Optional[str]:
-    result = _array_of_pattern.match(text)
 
-    if not result:
+def _union(text: str) -> Optional[str]:
+    expressions = tuple(text.replace("\n", "").split(" or "))
+
+    # Alternatives separated by other kinds of whitespace would otherwise be parsed recursively without an end.
+    if len(expressions) < 2 or "None" in expressions:
         return None
 
-    data_type = result.group("data")
-    count = int(result.group("count"))
+    parsed_types = tuple(map(parse_type, expressions))
 
-    if data_type in _known_types:
-        data_type = _known_types[data_type]
-    else:
+    if None in parsed_types or len(expressions) != len(set(parsed_types)):
         return None
 
-    if count > 5:
-        return f"typing.Tuple[{data_type}, ...]"
+    return f"typing.Union[{', '.join(parsed_types)}]"
 
-    return f"typing.Tuple[{', '.join(repeat(data_type, count))}]"
 
+def _union_types(*names: str) -> Optional[str]:
+    return f"typing.Union[{', '.join(names)}]"
 
-def parse_multi_array_of(text: str) -> Optional[str]:
-    result = _multi_array_of_pattern.match(text)
 
-    if not result:
-        return None
+def _special_cases(text: str) -> Optional[str]:
+    text = text.lower()
 
-    data_type = result.group("data")
-    rows = int(result.group("rows"))
-    cols = int(result.group("cols"))
+    if "enum in" in text:
+        return "str"
+    elif "enum set in" in text:
+        return "typing.Set[str]"
 
-    if data_type in _known_types:
-        data_type = _known_types[data_type]
+    if text.startswith("function"):
+        return "typing.Callable"
+
+    if text.startswith("vector"):
+        return "mathutils.Vector"
     else:
-        return None
+        segments = text.split(" ")
 
-    def make_tuple(t, n):
-        if n > 5:
-            return f"typing.Tuple[{t}, ...]"
+        if len(segments) > 1 and segments[1] == "vector":
+            return "mathutils.Vector"
 
-        return f"typing.Tuple[{', '.join(repeat(t, n))}]"
+    return None
 
-    return make_tuple(make_tuple(data_type, cols), rows)
 
+def _parse_reference(text: str) -> Optional[str]:
+    parser = TypeParser(text)
+    groups = parser.match_reference(0) if parser.tokens and parser.tokens[0][2] == 0 else None
 
-def parse_matrix(text: str) -> Optional[str]:
-    if _matrix_pattern.match(text):
-        return "mathutils.Matrix"
+    return _reference(*groups) if groups else None
 
-    return None
 
+Token = Tuple[str, str, int, int]
 
-def parse_dictionary(text: str) -> Optional[str]:
-    result = _dictionary_pattern.match(text)
 
-    if not result:
-        return None
+# noinspection PyMethodMayBeStatic
+class TypeParser:
 
-    def guess_type(v):
-        if not v:
-            return "typing.Any"
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.size = len(text)
 
-        if v in _known_types:
-            return _known_types[v]
+        # Each token consists of its kind (i.e. "ref", "word" or "punct"), text, start and end position.
+        self.tokens: Sequence[Token] = tuple(map(
+            lambda m: (m.lastgroup, m.group(m.lastgroup), m.start(), m.end()), _token_pattern.finditer(text)))
 
-        return parse_reference(v) or "typing.Any"
+        # Position of the last line break, not counting the one at the end of the text.
+        self.last_break = text.rfind("\n", 0, self.size - 1)
 
-    key = guess_type(result.group("key"))
-    value = guess_type(result.group("value"))
+        # Name of the rule which matched the text, if any.
+        self.rule: Optional[str] = None
 
-    return f"typing.Dict[{key}, {value}]"
+    def parse(self) -> Optional[str]:
+        tokens = self.tokens
+        stats = type_stats if type_stats.enabled else None
 
+        # Every rule is anchored at the start of the text, except for the union types and the special cases.
+        (kind, first) = tokens[0][:2] if tokens and tokens[0][2] == 0 else ("other", "")
 
-def parse_union(text: str) -> Optional[str]:
-    result = _union_pattern.match(text)
+        article = kind == "word" and first in _articles and self.is_separated(0)
 
-    if not result:
-        return None
+        count = len(tokens)
 
-    expressions = tuple(text.replace("\n", "").split(" or "))
+        for (name, match, render, articles, minimum) in _rules[kind]:
+            if count < minimum:
+                continue
+
+            started = perf_counter() if stats else 0.0
+
+            groups = match(self, 1) if article and first in articles else None
+
+            if groups is None:
+                groups = match(self, 0)
+
+            result = render(*groups) if groups is not None else None
+
+            if stats:
+                stats.add_time(name, perf_counter() - started)
+
+            if result:
+                self.rule = name
+                return result
+
+        started = perf_counter() if stats else 0.0
+
+        result = _special_cases(self.text)
+
+        if stats:
+            stats.add_time("special_cases", perf_counter() - started)
+
+        self.rule = "special_cases" if result else None
+
+        return result
+
+    def match_array_of(self, i: int) -> Optional[Tuple[str, str]]:
+        if not self.is_lower(i) or not self.is_sequence(i + 1, "array", "of") or not self.is_digits(i + 3):
+            return None
+
+        if not self.is_separated(i + 3) or not self.is_word(i + 4) or not self.tokens[i + 4][1].startswith("items"):
+            return None
+
+        if not self.is_last_line(self.tokens[i + 4][2] + 5):
+            return None
+
+        return self.tokens[i][1], self.tokens[i + 3][1]
+
+    def match_multi_array_of(self, i: int) -> Optional[Tuple[str, str, str]]:
+        if not self.is_lower(i) or not self.is_sequence(i + 1, "multi-dimensional", "array", "of"):
+            return None
+
+        if not self.is_digits(i + 4) or not self.is_punct(i + 5, "*") or not self.is_digits(i + 6):
+            return None
+
+        if not self.is_separated(i + 6) or not self.is_word(i + 7) or not self.tokens[i + 7][1].startswith("items"):
+            return None
+
+        if not self.is_last_line(self.tokens[i + 7][2] + 5):
+            return None
+
+        return self.tokens[i][1], self.tokens[i + 4][1], self.tokens[i + 6][1]
+
+    def match_qualified_list(self, i: int) -> Optional[Tuple[str]]:
+        tokens = self.tokens
+
+        if not self.is_word(i, "list") or not self.is_punct(i + 1, "("):
+            return None
+
+        words = i + 2
+
+        while self.is_alpha(words):
+            words += 1
+
+        # The description of the vector may consist of several words, so try the last occurrence first.
+        for j in range(words - 1, i + 1, -1):
+            if not tokens[j][1].endswith("vector") or not self.is_sequence(j + 1, "of"):
+                continue
+
+            if not self.is_digits(j + 2) or not self.is_separated(j + 2) or not self.is_alpha(j + 3):
+                continue
+
+            end = tokens[j + 3][3]
+            close = end if end < self.size and self.text[end] == ")" else -1
+
+            if close < 0 and self.is_delimiter(end):
+                close = self.text.find(")", end + 1)
+
+            if close >= 0 and self.is_tail(close + 1):
+                return tokens[j + 3][1],
 
-    if "None" in expressions:
         return None
 
-    parsed_types = tuple(map(parse_type, expressions))
+    def match_bracket_list(self, i: int) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        tokens = self.tokens
+
+        if not self.is_word(i, "list") or not self.is_punct(i + 1, "[") or not self.is_punct(i + 3, "]"):
+            return None
+
+        if not self.is_adjacent(i + 1) or not self.is_adjacent(i + 2) or not self.is_tail(tokens[i + 3][3]):
+            return None
+
+        if self.is_ref(i + 2):
+            return self.strip_prefix(tokens[i + 2][1]), None
+
+        return (None, tokens[i + 2][1]) if self.is_alpha(i + 2) else None
+
+    def match_container_of(self, i: int) -> Optional[Tuple[str, Optional[str], Optional[str], Optional[str]]]:
+        if not self.is_alpha(i) or not self.is_sequence(i + 1, "of"):
+            return None
+
+        item = self.match_item(i + 2)
+
+        return (self.tokens[i][1], *item) if item else None
+
+    def match_prop_collection_of(self, i: int) -> Optional[Tuple[Optional[str], ...]]:
+        tokens = self.tokens
+
+        # The collection may be preceded by a reference to its base type.
+        for (base, start) in ((i, i + 1), (None, i)):
+            if base is not None and (not self.is_ref(base) or self.is_adjacent(base)):
+                continue
+
+            if not self.is_ref(start) or tokens[start][1] != "bpy_prop_collection":
+                continue
+
+            item = self.match_item(start + 2) if self.is_sequence(start + 1, "of") else None
+
+            if item:
+                return (self.strip_prefix(tokens[base][1]) if base is not None else None, *item)
 
-    if None in parsed_types or len(expressions) != len(set(parsed_types)):
         return None
 
-    return f"typing.Union[{', '.join(parsed_types)}]"
+    def match_exp_list_value_of(self, i: int) -> Optional[Tuple[Optional[str], Optional[str], Optional[str]]]:
+        if not self.is_ref(i) or not _exp_list_value_name_pattern.fullmatch(self.tokens[i][1]):
+            return None
+
+        return self.match_item(i + 2) if self.is_sequence(i + 1, "of") else None
+
+    def match_dictionary(self, i: int) -> Optional[Tuple[str, str]]:
+        (text, size) = (self.text, self.size)
+
+        if not self.is_word(i, "dict") and not self.is_word(i, "dictionary"):
+            return None
+
+        if not self.is_punct(i + 1, "[") and not self.is_punct(i + 1, "("):
+            return None
+
+        start = self.tokens[i + 1][3]
+        end = start
+
+        while end < size and text[end] != "," and not text[end].isspace():
+            end += 1
+
+        key = text[start:end]
+
+        while end < size and text[end].isspace():
+            end += 1
+
+        if not key or end == size or text[end] != ",":
+            return None
+
+        start = end + 1
+        end = start
+
+        while end < size and text[end].isspace():
+            end += 1
+
+        value_start = end
+
+        while end < size and text[end] not in "])":
+            end += 1
+
+        if end == size or not self.is_last_line(end + 1):
+            return None
 
+        # The value consists of a single whitespace, if there is nothing else before the closing bracket.
+        if value_start == end:
+            if value_start == start:
+                return None
 
-def parse_union_types(text: str) -> Optional[str]:
-    lines = text.split("\n")
+            value_start -= 1
+
+        return key, text[value_start:end]
+
+    def match_union(self, i: int) -> Optional[Tuple[str]]:
+        tokens = self.tokens
+
+        if not self.is_ref(i) and not self.is_alpha(i):
+            return None
+
+        while True:
+            conjunction = i + 1
+
+            if self.is_punct(conjunction, ":") and self.is_adjacent(i):
+                conjunction += 1
+
+            if not self.is_word(conjunction, "or") or not self.is_separated(conjunction):
+                return None
+
+            if tokens[conjunction][2] - tokens[conjunction - 1][3] != 1:
+                return None
+
+            i = conjunction + 1
+
+            if not self.is_ref(i) and not self.is_alpha(i):
+                return None
+
+            if self.is_tail(tokens[i][3]):
+                return self.text,
+
+    def match_union_types(self, i: int) -> Optional[Tuple[str, ...]]:
+        lines = self.text.split("\n")
+
+        if len(lines) < 3:
+            return None
+
+        names = []
+
+        # The first line describes the types (e.g. "one of:"), each of which is given in a line of its own.
+        for line in filter(lambda l: any(l.strip()), lines[1:]):
+            start = 0
+
+            while start < len(line) and (line[start] == "-" or line[start].isspace()):
+                start += 1
+
+            if not line.startswith(":class:`", start) or not line.endswith("`") or "`" in line[start + 8:-1]:
+                return None
+
+            result = _reference_content_pattern.fullmatch(line, start + 8, len(line) - 1)
+
+            if not result:
+                return None
+
+            names.append(result.group("target") or result.group("name"))
+
+        return tuple(names)
+
+    def match_reference(self, i: int) -> Optional[Tuple[str, Optional[str]]]:
+        if not self.is_ref(i) or not self.is_tail(self.tokens[i][3]):
+            return None
+
+        result = _reference_content_pattern.fullmatch(self.tokens[i][1])
+
+        return result.group("name", "target") if result else None
+
+    def match_simple(self, i: int) -> Optional[Tuple[str]]:
+        (text, size) = (self.text, self.size)
+
+        def match_parentheses(pos: int) -> Optional[int]:
+            pos += 1 if pos < size and text[pos].isspace() else 0
+
+            close = text.find(")", pos + 1) if pos < size and text[pos] == "(" else -1
+
+            return close + 1 if close > pos + 1 else None
+
+        def match_range(pos: int) -> Optional[int]:
+            if pos + 4 >= size or not text[pos].isspace() or not text.startswith("in", pos + 1):
+                return None
+
+            close = text.find("]", pos + 5) if text[pos + 3].isspace() and text[pos + 4] == "[" else -1
+
+            return close + 1 if close > pos + 5 else None
+
+        def match(start: int) -> Optional[Tuple[str]]:
+            end = start
+
+            while end < size and text[end].isascii() and text[end].isalpha():
+                end += 1
+
+            if end == start:
+                return None
+
+            # The type may be followed by a description in parentheses and a range of values, either of which can
+            # be where the rest of the text starts.
+            ends = [end, match_parentheses(end)]
+            ends.extend(map(lambda e: match_range(e) if e is not None else None, tuple(ends)))
+
+            if any(map(lambda e: e is not None and self.is_tail(e), ends)):
+                return text[start:end],
+
+            return None
+
+        result = match(9) if text.startswith("unsigned") and size > 8 and text[8].isspace() else None
+
+        return result or match(0)
+
+    def match_matrix(self, i: int) -> Optional[Tuple]:
+        (text, size) = (self.text, self.size)
+
+        for start in ((0, 2) if size > 1 and text[0] in "Aa" and text[1].isspace() else (0,)):
+            end = start
+
+            while end < size and text[end] in "0123456789xX*":
+                end += 1
+
+            candidates = (start, end + 1) if start < end < size and text[end].isspace() else (start,)
+
+            if any(map(lambda c: text.startswith(("Matrix", "matrix"), c), candidates)):
+                return ()
 
-    if len(lines) < 3:
         return None
 
-    parsed_types = []
+    def match_item(self, i: int) -> Optional[Tuple[Optional[str], Optional[str], Optional[str]]]:
+        tokens = self.tokens
+
+        if self.is_ref(i):
+            (reference, data) = (self.strip_prefix(tokens[i][1]), None)
+        elif self.is_alpha(i):
+            (reference, data) = (None, tokens[i][1])
+        else:
+            return None
 
-    for line in filter(lambda l: any(l.strip()), lines[1:]):
-        result = _reference_item_pattern.match(line)
+        end = tokens[i][3]
 
-        if not result:
+        if end < self.size and (self.text[end] != "'" and not self.is_delimiter(end) or not self.is_last_line(end + 1)):
             return None
 
-        type_info = result.group("target") or result.group("name") if result else None
+        return reference, data, self.text[end:] or None
+
+    def strip_prefix(self, text: str) -> str:
+        return text[1:] if len(text) > 1 and text[0] in "~!" else text
+
+    def is_word(self, i: int, value: Optional[str] = None) -> bool:
+        tokens = self.tokens
+        return i < len(tokens) and tokens[i][0] == "word" and (value is None or tokens[i][1] == value)
+
+    def is_alpha(self, i: int) -> bool:
+        return self.is_word(i) and self.tokens[i][1].isalpha()
+
+    def is_lower(self, i: int) -> bool:
+        return self.is_alpha(i) and self.tokens[i][1].islower()
+
+    def is_digits(self, i: int) -> bool:
+        return self.is_word(i) and self.tokens[i][1].isdigit()
+
+    def is_ref(self, i: int) -> bool:
+        return i < len(self.tokens) and self.tokens[i][0] == "ref"
+
+    def is_punct(self, i: int, value: str) -> bool:
+        tokens = self.tokens
+        return i < len(tokens) and tokens[i][0] == "punct" and tokens[i][1] == value
+
+    def is_sequence(self, i: int, *words: str) -> bool:
+        # Check if the words follow the token before the index, each of which is separated by a single whitespace.
+        for (offset, word) in enumerate(words):
+            if not self.is_word(i + offset, word) or not self.is_separated(i + offset - 1):
+                return False
+
+        return self.is_separated(i + len(words) - 1)
+
+    def is_separated(self, i: int) -> bool:
+        tokens = self.tokens
+        return 0 <= i < len(tokens) - 1 and tokens[i + 1][2] - tokens[i][3] == 1
+
+    def is_adjacent(self, i: int) -> bool:
+        tokens = self.tokens
+        return 0 <= i < len(tokens) - 1 and tokens[i + 1][2] == tokens[i][3]
+
+    def is_delimiter(self, pos: int) -> bool:
+        return pos < self.size and (self.text[pos] in ",." or self.text[pos].isspace())
+
+    def is_tail(self, pos: int) -> bool:
+        return pos == self.size or self.is_delimiter(pos) and self.is_last_line(pos + 1)
+
+    def is_last_line(self, pos: int) -> bool:
+        # Check if the rest of the text from the position has no line break, except for one at the end.
+        return self.last_break < pos
+
+
+Rule = Tuple[str, Callable[[TypeParser, int], Optional[Tuple]], Callable[..., Optional[str]], Sequence[str], int]
+
+# Rules are tried in the order of precedence, skipping those which cannot match the first token or need more tokens
+# than the text has.
+_rules: Final[Mapping[str, Sequence[Rule]]] = {
+    "word": (
+        ("array_of", TypeParser.match_array_of, _array_of, _articles, 5),
+        ("multi_array_of", TypeParser.match_multi_array_of, _multi_array_of, _articles, 8),
+        ("qualified_list", TypeParser.match_qualified_list, _qualified_list, _articles, 7),
+        ("bracket_list", TypeParser.match_bracket_list, _bracket_list, (), 4),
+        ("container_of", TypeParser.match_container_of, _container_of, _articles, 3),
+        ("prop_collection_of", TypeParser.match_prop_collection_of, _prop_collection_of, _articles, 3),
+        ("exp_list_value_of", TypeParser.match_exp_list_value_of, _exp_list_value_of, _articles, 3),
+        ("dictionary", TypeParser.match_dictionary, _dictionary, ("a", "A"), 4),
+        ("union", TypeParser.match_union, _union, (), 3),
+        ("union_types", TypeParser.match_union_types, _union_types, (), 1),
+        ("simple", TypeParser.match_simple, _simple, (), 1),
+        ("matrix", TypeParser.match_matrix, lambda: "mathutils.Matrix", (), 1)
+    ),
+    "ref": (
+        ("prop_collection_of", TypeParser.match_prop_collection_of, _prop_collection_of, (), 3),
+        ("exp_list_value_of", TypeParser.match_exp_list_value_of, _exp_list_value_of, (), 3),
+        ("union", TypeParser.match_union, _union, (), 3),
+        ("union_types", TypeParser.match_union_types, _union_types, (), 1),
+        ("reference", TypeParser.match_reference, _reference, (), 1)
+    ),
+    "punct": (
+        ("union_types", TypeParser.match_union_types, _union_types, (), 1),
+        ("matrix", TypeParser.match_matrix, lambda: "mathutils.Matrix", (), 1)
+    ),
+    # Texts which are empty or start with a whitespace.
+    "other": (
+        ("union_types", TypeParser.match_union_types, _union_types, (), 0),
+    )
+}
 
-        parsed_types.append(type_info)
+# Resolved types saved by an older version, or with a different set of known types are discarded when loaded.
+type_table_signature: Final = sha256(json.dumps(
+    (bpystubgen.__version__, _known_types, _container_types), sort_keys=True).encode("UTF-8")).hexdigest()
 
-    return f"typing.Union[{', '.join(parsed_types)}]"
 
+class TypeCache:
 
-def parse_special_cases(text: str) -> Optional[str]:
-    text = text.lower()
+    def __init__(self, maxsize: int = 16384) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
 
-    if "enum in" in text:
-        return "str"
-    elif "enum set in" in text:
-        return "typing.Set[str]"
+        self._entries: OrderedDict[str, Optional[str]] = OrderedDict()
+        self._added: Dict[str, Optional[str]] = dict()
 
-    if text.startswith("function"):
-        return "typing.Callable"
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
 
-    if text.startswith("vector"):
-        return "mathutils.Vector"
-    else:
-        segments = text.split(" ")
+    def get(self, text: str, parse: Callable[[str], Optional[str]]) -> Optional[str]:
+        entries = self._entries
 
-        if len(segments) > 1 and segments[1] == "vector":
-            return "mathutils.Vector"
+        if text in entries:
+            self.hits += 1
+            entries.move_to_end(text)
 
-    return None
+            return entries[text]
+
+        self.misses += 1
+
+        # Failed attempts are cached as well, since they are the most expensive to compute.
+        value = parse(text)
+        entries[text] = value
+
+        self._added[text] = value
+
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+        return value
+
+    def update(self, entries: Mapping[str, Optional[str]]) -> None:
+        self._entries.update(entries)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def drain(self) -> Mapping[str, Optional[str]]:
+        # Return the entries resolved since the last call, so that a worker process can send them back to its parent.
+        (added, self._added) = (self._added, dict())
+        return added
+
+    def load(self, path: Path) -> int:
+        try:
+            data = json.loads(path.read_text("UTF-8"))
+            types = data["types"] if data.get("signature") == type_table_signature else {}
+        except (OSError, ValueError, KeyError):
+            types = {}
+
+        self.update(types)
+
+        return len(types)
+
+    def save(self, path: Path) -> None:
+        data = {
+            "signature": type_table_signature,
+            "types": dict(sorted(self._entries.items()))
+        }
+
+        replace_file(path, json.dumps(data, indent=2).encode("UTF-8"))
+
+    def clear(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._entries.clear()
+        self._added.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+type_cache: Final = TypeCache()
+
+
+class TypeStats:
+
+    def __init__(self) -> None:
+        self.enabled = False
+
+        # Number of distinct expressions and fields resolved by each rule, and the time spent on trying it.
+        self.expressions: Counter[str] = Counter()
+        self.fields: Counter[str] = Counter()
+        self.timings: Counter[str] = Counter()
+
+        self.unresolved: Counter[str] = Counter()
+
+        self._rules: Dict[str, str] = dict()
+        self._resolved: Dict[str, str] = dict()
+
+    def add_time(self, rule: str, elapsed: float) -> None:
+        self.timings[rule] += elapsed
+
+    def resolve(self, text: str, rule: Optional[str]) -> None:
+        if rule:
+            self.expressions[rule] += 1
+
+            self._rules[text] = rule
+            self._resolved[text] = rule
+
+    def record(self, text: str, value: Optional[str]) -> None:
+        if not self.enabled:
+            return
+
+        if value:
+            # Expressions resolved by the persisted table of an earlier run are not attributed to any rule.
+            self.fields[self._rules.get(text, "cache")] += 1
+        else:
+            self.unresolved[text] += 1
+
+    def drain(self) -> Mapping[str, Mapping[str, Any]]:
+        data = {
+            "expressions": dict(self.expressions),
+            "fields": dict(self.fields),
+            "timings": dict(self.timings),
+            "unresolved": dict(self.unresolved),
+            "resolved": self._resolved
+        }
+
+        self.expressions.clear()
+        self.fields.clear()
+        self.timings.clear()
+        self.unresolved.clear()
+
+        self._resolved = dict()
+
+        return data
+
+    def update(self, data: Mapping[str, Mapping[str, Any]]) -> None:
+        self.expressions.update(data["expressions"])
+        self.fields.update(data["fields"])
+        self.timings.update(data["timings"])
+        self.unresolved.update(data["unresolved"])
+
+        # Expressions resolved by a worker process may be looked up from the type cache of its parent later.
+        self._rules.update(data["resolved"])
+
+    def report(self, top: int = 50) -> Mapping[str, Any]:
+        rules = sorted(set(self.fields) | set(self.timings), key=lambda r: (-self.fields[r], -self.timings[r], r))
+
+        resolved = sum(self.fields.values())
+        unresolved = sum(self.unresolved.values())
+
+        return {
+            "fields": {"total": resolved + unresolved, "resolved": resolved, "unresolved": unresolved},
+            "rules": list(map(lambda r: {
+                "rule": r,
+                "fields": self.fields[r],
+                "expressions": self.expressions[r],
+                "time": self.timings[r]
+            }, rules)),
+            "unresolved": list(map(lambda t: {"text": t[0], "count": t[1]}, self.unresolved.most_common(top)))
+        }
+
+    def save(self, path: Path, top: int = 50) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(top), indent=2), "UTF-8")
+
+    def clear(self) -> None:
+        self.drain()
+        self._rules.clear()
+
+
+type_stats: Final = TypeStats()
 
 
 def parse_type(text: str) -> Optional[str]:
-    parsers = (
-        parse_array_of,
-        parse_multi_array_of,
-        parse_qualified_list,
-        parse_bracket_list,
-        parse_container_of,
-        parse_prop_collection_of,
-        parse_exp_list_value_of,
-        parse_dictionary,
-        parse_union,
-        parse_union_types,
-        parse_reference,
-        parse_simple,
-        parse_matrix,
-        parse_special_cases
-    )
+    return type_cache.get(text, _parse_type)
 
-    try:
-        return next(filter(lambda r: r, map(lambda p: p(text), parsers)))
-    except StopIteration:
-        return None
+
+def parse_types(texts: Iterable[str]) -> Tuple[Mapping[str, str], Sequence[str]]:
+    resolved: Dict[str, str] = dict()
+    unresolved: List[str] = []
+
+    for text in dict.fromkeys(texts):
+        value = parse_type(text)
+
+        if value:
+            resolved[text] = value
+        else:
+            unresolved.append(text)
+
+    return resolved, tuple(unresolved)
+
+
+def _parse_type(text: str) -> Optional[str]:
+    parser = TypeParser(text)
+    value = parser.parse()
+
+    if type_stats.enabled:
+        type_stats.resolve(text, parser.rule)
+
+    return value
@@ -1,33 +1,57 @@
-from typing import Final, Mapping, Union
+from __future__ import annotations
+
+from functools import lru_cache
+from importlib.resources import files
+from typing import TYPE_CHECKING, Any, Mapping, Set, Union
 
 from docutils.frontend import Values
 from docutils.nodes import Element
-from pkg_resources import resource_listdir, resource_stream, resource_string
-from sphinx.environment import BuildEnvironment
-
-from bpystubgen import Module, nodes
-from bpystubgen.nodes import APIMember, Class
 
-blacklist: Final = set(map(lambda b: b.decode("UTF-8"),
-                           resource_string(__name__, "blacklist.txt").splitlines()))
+from bpystubgen import nodes
+from bpystubgen.nodes import APIMember, Class, Module
 
-patches: Final = set(map(lambda n: n[:-4],
-                         filter(lambda f: f.endswith(".rst"), resource_listdir(__name__, "."))))
+if TYPE_CHECKING:
+    from sphinx.environment import BuildEnvironment
 
 Patchable = Union[Module, Class]
 
 
+@lru_cache(maxsize=None)
+def _read_blacklist() -> Set[str]:
+    return set(files(__name__).joinpath("blacklist.txt").read_text("UTF-8").splitlines())
+
+
+@lru_cache(maxsize=None)
+def _list_patches() -> Set[str]:
+    names = map(lambda f: f.name, files(__name__).iterdir())
+    return set(map(lambda n: n[:-4], filter(lambda n: n.endswith(".rst"), names)))
+
+
+def __getattr__(name: str) -> Any:
+    # The resources are read when they are first accessed, rather than when the module is imported.
+    if name == "blacklist":
+        return _read_blacklist()
+    elif name == "patches":
+        return _list_patches()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def source(name: str) -> bytes:
+    return files(__name__).joinpath(name + ".rst").read_bytes()
+
+
 def apply(name: str, target: Element, settings: Values, env: BuildEnvironment) -> Element:
-    if name not in patches:
+    if name not in _list_patches():
         return target
 
     source_path = name + ".rst"
-    source = resource_stream(__name__, source_path)
 
     def members_of(elem: Element) -> Mapping[str, APIMember]:
         return dict(map(lambda m: (m.name, m), elem.traverse(APIMember)))
 
-    patch = members_of(nodes.from_io(source, source_path, settings, env))
+    with files(__name__).joinpath(source_path).open("r", encoding="UTF-8") as source:
+        patch = members_of(nodes.from_io(source, source_path, settings, env))
     members = members_of(target)
 
     for member in members.values():
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import csv
+import json
+from collections import defaultdict
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, Final, Iterator, Mapping, Sequence, Tuple
+
+phases: Final = ("cache", "parse", "patch", "merge", "import_types", "sort_members", "write")
+
+
+class Profiler:
+
+    def __init__(self) -> None:
+        # Timings are sent back from worker processes, so they must be picklable.
+        self._timings: Dict[str, Dict[str, float]] = defaultdict(partial(defaultdict, float))
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    @property
+    def timings(self) -> Mapping[str, Mapping[str, float]]:
+        return self._timings
+
+    def measure(self, task: str, phase: str) -> AbstractContextManager:
+        return self._measure(task, phase)
+
+    @contextmanager
+    def _measure(self, task: str, phase: str) -> Iterator[None]:
+        started = perf_counter()
+
+        try:
+            yield
+        finally:
+            self._timings[task][phase] += perf_counter() - started
+
+    def update(self, timings: Mapping[str, Mapping[str, float]]) -> None:
+        for (task, values) in timings.items():
+            for (phase, elapsed) in values.items():
+                self._timings[task][phase] += elapsed
+
+    def totals(self) -> Mapping[str, float]:
+        totals: Dict[str, float] = dict.fromkeys(phases, 0.0)
+
+        for values in self._timings.values():
+            for (phase, elapsed) in values.items():
+                totals[phase] = totals.get(phase, 0.0) + elapsed
+
+        return totals
+
+    def slowest(self, count: int) -> Sequence[Tuple[str, float]]:
+        totals = map(lambda t: (t[0], sum(t[1].values())), self._timings.items())
+
+        return tuple(sorted(totals, key=lambda t: (-t[1], t[0]))[:count])
+
+    def save(self, path: Path, top: int = 10) -> Tuple[Path, Path]:
+        json_path = path.with_suffix(".json")
+        csv_path = path.with_suffix(".csv")
+
+        totals = self.totals()
+        columns = tuple(totals.keys())
+
+        report = {
+            "total": totals,
+            "slowest": list(map(lambda t: {"task": t[0], "total": t[1], **self._timings[t[0]]}, self.slowest(top))),
+            "tasks": dict(map(lambda t: (t[0], dict(t[1])), sorted(self._timings.items())))
+        }
+
+        json_path.write_text(json.dumps(report, indent=2), "UTF-8")
+
+        with csv_path.open("w", newline="", encoding="UTF-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(("task",) + columns + ("total",))
+
+            for (task, values) in sorted(self._timings.items()):
+                row = tuple(map(lambda c: values.get(c, 0.0), columns))
+                writer.writerow((task,) + row + (sum(row),))
+
+        return json_path, csv_path
+
+
+class NullProfiler(Profiler):
+    _context: Final = nullcontext()
+
+    @property
+    def enabled(self) -> bool:
+        return False
+
+    def measure(self, task: str, phase: str) -> AbstractContextManager:
+        return self._context
+
+
+disabled: Final = NullProfiler()
@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from logging import Logger, getLogger
+from pathlib import Path
+from time import perf_counter
+from typing import Deque, Dict, Iterator, Mapping, Optional, Sequence, Set, Tuple
+
+from docutils.frontend import OptionParser, Values
+from docutils.parsers.rst import Parser
+from sphinx.application import Sphinx
+from sphinx.environment import BuildEnvironment
+from sphinxcontrib.builders.rst import RstBuilder
+
+from bpystubgen import nodes, profiling
+from bpystubgen.cache import DoctreeCache
+from bpystubgen.costs import CostModel
+from bpystubgen.incremental import BuildState
+from bpystubgen.manifest import Manifest
+from bpystubgen.parser import type_cache, type_stats
+from bpystubgen.patches import blacklist
+from bpystubgen.profiling import Profiler
+from bpystubgen.store import Store
+from bpystubgen.tasks import ClassTask, ModuleTask, ParserTask, Task
+from bpystubgen.wheel import WheelWriter, parse_requirement
+from bpystubgen.writer import StubWriter
+
+
+def create_app(dest: Path, quiet: bool = False) -> Sphinx:
+    return Sphinx(srcdir=".", confdir=None, outdir=str(dest), doctreedir=".", buildername="text",
+                  status=None if quiet else sys.stdout)
+
+
+def create_settings(env: BuildEnvironment, signatures_only: bool = False) -> Values:
+    # noinspection DuplicatedCode
+    components = (Parser,)
+
+    settings = OptionParser(components=components).get_default_values()
+
+    settings.line_length_limit = 15000
+    settings.report_level = 5
+    settings.traceback = True
+    settings.env = env
+    settings.signatures_only = signatures_only
+
+    return settings
+
+
+def create_writer(app: Sphinx) -> StubWriter:
+    builder = RstBuilder(app)
+    builder.config.rst_indent = 2
+
+    return StubWriter(builder)
+
+
+_worker_context: Optional[Tuple[Values, BuildEnvironment, Optional[DoctreeCache], bool]] = None
+
+
+def _init_worker(dest: Path,
+                 cache_dir: Optional[Path],
+                 profile: bool = False,
+                 track_types: bool = False,
+                 signatures_only: bool = False) -> None:
+    global _worker_context
+
+    app = create_app(dest, quiet=True)
+
+    if cache_dir:
+        type_cache.load(type_table_path(cache_dir))
+
+    # Only the types resolved by this process need to be sent back to the parent.
+    type_cache.drain()
+
+    type_stats.enabled = track_types
+    type_stats.clear()
+
+    settings = create_settings(app.env, signatures_only)
+    cache = DoctreeCache(cache_dir, signatures_only) if cache_dir else None
+
+    _worker_context = (settings, app.env, cache, profile)
+
+
+def _parse_in_worker(task: ParserTask) -> Tuple[
+    Optional[bytes], float, Mapping[str, Mapping[str, float]], Mapping[str, Optional[str]], Mapping[str, Mapping]]:
+    assert _worker_context
+
+    (settings, env, cache, profile) = _worker_context
+
+    # Timings are collected per task, and merged into the profiler of the main process.
+    profiler = Profiler() if profile else profiling.disabled
+
+    started = perf_counter()
+    doctree = task.parse(settings, env, cache, profiler)
+    elapsed = perf_counter() - started
+
+    return (nodes.dumps(doctree) if doctree else None, elapsed, profiler.timings,
+            type_cache.drain(), type_stats.drain())
+
+
+def type_table_path(cache_dir: Path) -> Path:
+    return cache_dir / "types.json"
+
+
+def peak_memory() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # The value is reported in bytes on macOS, and in kilobytes on other platforms.
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def is_leaf(task: Task) -> bool:
+    if isinstance(task, ClassTask):
+        return True
+
+    return isinstance(task, ModuleTask) and not any(task.values())
+
+
+class Runner:
+    logger: Logger = getLogger("bpystubgen")
+
+    def __init__(self,
+                 dest: Path,
+                 jobs: int = 1,
+                 incremental: bool = False,
+                 cache_dir: Optional[Path] = None,
+                 streaming: bool = False,
+                 profile: bool = False,
+                 track_types: bool = False,
+                 signatures_only: bool = False,
+                 wheel: Optional[str] = None,
+                 split_classes: int = 0,
+                 store_dir: Optional[Path] = None) -> None:
+        self.dest = dest
+        self.jobs = max(jobs, 1)
+        self.streaming = streaming
+        self.signatures_only = signatures_only
+        self.split_classes = max(split_classes, 0)
+        self.cache = DoctreeCache(cache_dir, signatures_only) if cache_dir else None
+        self.profiler = Profiler() if profile else profiling.disabled
+        self.fallbacks = 0
+
+        type_stats.enabled = track_types
+        type_stats.clear()
+
+        if cache_dir:
+            count = type_cache.load(type_table_path(cache_dir))
+            self.logger.debug("Loaded %d resolved types from the cache.", count)
+
+        self.app = create_app(dest)
+        self.settings = create_settings(self.app.env, signatures_only)
+        self.writer = create_writer(self.app)
+
+        mode = "signatures" if signatures_only else "full"
+
+        if self.split_classes:
+            mode += f"-split-{self.split_classes}"
+
+        # A wheel is always built from scratch, as it cannot be updated in place.
+        self.wheel = parse_requirement(wheel) if wheel else None
+
+        self.state = BuildState.load(dest / ".bpystubgen" / "state.json", mode) \
+            if incremental and not self.wheel else None
+        self.manifest = Manifest.load(dest, Store(store_dir) if store_dir else None)
+        self.costs = CostModel.load(dest / ".bpystubgen" / "costs.json")
+
+    def run(self, root: Task) -> int:
+        tasks = tuple(root)
+        total = len(tasks)
+
+        for module in [t for t in tasks if isinstance(t, ModuleTask)]:
+            module.split_size = self.split_classes
+
+        initial_memory = peak_memory()
+
+        (to_parse, to_generate) = self.plan(tasks)
+
+        wheel = WheelWriter(self.dest, *self.wheel) if self.wheel else None
+        output = wheel or self.manifest
+
+        self.fallbacks = 0
+
+        scheduled = self.dispatch(tasks, to_parse) if self.jobs > 1 else map(lambda t: (t, False), tasks)
+        failed: Set[Task] = set()
+
+        for (done, (task, parsed)) in enumerate(scheduled, start=1):
+            self.logger.info("Processing %s (%d of %d)", task.full_name, done, total)
+
+            if task.full_name in blacklist:
+                self.logger.info("Skipping blacklisted file: %s.", task)
+                continue
+
+            if task not in to_parse and task not in to_generate:
+                self.logger.debug("Skipping unchanged task: %s.", task)
+
+                if isinstance(task, ModuleTask):
+                    self.keep_outputs(task)
+
+                    if self.state:
+                        self.state.update(task)
+
+                continue
+
+            try:
+                if isinstance(task, ParserTask) and not parsed:
+                    started = perf_counter()
+                    task.parse(self.settings, self.app.env, self.cache, self.profiler)
+
+                    if task.source:
+                        self.costs.record(task, perf_counter() - started)
+
+                if isinstance(task, ModuleTask) and task in to_generate:
+                    task.generate(self.dest, self.writer, self.profiler, output)
+                elif isinstance(task, ModuleTask):
+                    self.keep_outputs(task)
+            except BaseException as e:
+                failed.add(task)
+                self.logger.error("Failed to process task: %s", task, exc_info=e)
+
+                # Keep the stubs generated by the previous run rather than removing them as stale.
+                if isinstance(task, ModuleTask):
+                    self.keep_outputs(task)
+
+            if self.streaming and isinstance(task, ModuleTask):
+                for child in [c for c in (task, *task.values()) if isinstance(c, ParserTask)]:
+                    child.release()
+
+            if self.state and isinstance(task, ModuleTask) and task not in failed:
+                if not any(filter(lambda c: c in failed, task.values())):
+                    self.state.update(task)
+
+        if self.state:
+            self.state.save()
+
+        if wheel:
+            wheel.close()
+            self.logger.info("Saved the stubs to %s.", wheel.path)
+        else:
+            removed = self.manifest.prune()
+            self.manifest.save()
+            self.costs.save()
+
+            self.logger.info("Updated %d of %d output files, removed %d stale ones.",
+                             len(self.manifest.changed), len(self.manifest.files), len(removed))
+
+        if self.fallbacks:
+            self.logger.warning("Parsed %d source files again in the main process after failing in worker processes.",
+                                self.fallbacks)
+
+        if self.cache:
+            type_cache.save(type_table_path(self.cache.directory))
+
+        final_memory = peak_memory()
+
+        if initial_memory and final_memory:
+            self.logger.info("Peak memory usage: %.1f MiB (%.1f MiB before processing).",
+                             final_memory / 1024 ** 2, initial_memory / 1024 ** 2)
+
+        self.logger.debug("Type cache: %d entries, %.1f%% hit rate.", len(type_cache), type_cache.hit_rate * 100)
+
+        return total
+
+    def keep_outputs(self, task: ModuleTask) -> None:
+        for path in task.output_paths(self.dest):
+            self.manifest.keep(path)
+
+    def plan(self, tasks: Sequence[Task]) -> Tuple[Set[Task], Set[ModuleTask]]:
+        modules = [t for t in tasks if isinstance(t, ModuleTask)]
+
+        to_generate: Set[ModuleTask]
+
+        if self.state:
+            state = self.state
+            to_generate = {m for m in modules if not state.is_current(m, self.dest)}
+        else:
+            to_generate = set(modules)
+
+        # Children of a module which needs to be regenerated must be parsed regardless of their own state.
+        to_parse: Set[Task] = {t for t in tasks if isinstance(t, ParserTask) and
+                               (t in to_generate or t.parent in to_generate)}
+
+        self.logger.info("%d of %d modules need to be generated.", len(to_generate), len(modules))
+
+        return to_parse, to_generate
+
+    def dispatch(self, tasks: Sequence[Task], to_parse: Set[Task]) -> Iterator[Tuple[Task, bool]]:
+        # Yield each task as soon as it becomes ready, rather than waiting for all the leaves to be parsed first,
+        # along with whether it has already been parsed in a worker process.
+        leaves = [t for t in tasks if isinstance(t, ParserTask) and t in to_parse and t.source and is_leaf(t) and
+                  t.full_name not in blacklist]
+
+        self.logger.info("Parsing %d source files using %d processes.", len(leaves), self.jobs)
+
+        cache_dir = self.cache.directory if self.cache else None
+
+        initargs = (self.dest, cache_dir, self.profiler.enabled, type_stats.enabled, self.signatures_only)
+
+        order = dict(map(lambda i: (i[1], i[0]), enumerate(tasks)))
+        waiting = dict(map(lambda t: (t, len(t.values())), tasks))
+
+        # Tasks which have neither children nor anything to parse in a worker process are ready from the start.
+        dispatched = set(leaves)
+        ready: Deque[Task] = deque(filter(lambda t: waiting[t] == 0 and t not in dispatched, tasks))
+        completed: Dict[ParserTask, Future] = dict()
+
+        with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker, initargs=initargs) as executor:
+            # Dispatch the most expensive leaves first, so that a large one does not end up as the last to finish.
+            pending = {executor.submit(_parse_in_worker, t): t for t in self.costs.order(leaves)}
+
+            while ready or pending:
+                if not ready:
+                    (finished, _) = wait(pending.keys(), return_when=FIRST_COMPLETED)
+
+                    for future in sorted(finished, key=lambda f: order[pending[f]]):
+                        leaf = pending.pop(future)
+
+                        completed[leaf] = future
+                        ready.append(leaf)
+
+                    continue
+
+                task = ready.popleft()
+
+                if isinstance(task, ParserTask) and task in completed:
+                    yield task, self.receive(task, completed.pop(task))
+                else:
+                    yield task, False
+
+                parent = task.parent
+
+                if parent in waiting:
+                    waiting[parent] -= 1
+
+                    if waiting[parent] == 0:
+                        ready.append(parent)
+
+    def receive(self, task: ParserTask, future: Future) -> bool:
+        try:
+            (data, elapsed, timings, types, stats) = future.result()
+            task.doctree = nodes.loads(data, self.settings) if data else None
+
+            self.costs.record(task, elapsed)
+            self.profiler.update(timings)
+
+            type_cache.update(types)
+            type_stats.update(stats)
+
+            return True
+        except Exception as e:
+            # Failed tasks will be parsed again in the main process to report the error.
+            self.logger.warning("Failed to parse %s in a worker process.", task, exc_info=e)
+            self.fallbacks += 1
+
+            return False
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import os
+import shutil
+from hashlib import sha256
+from pathlib import Path
+from typing import Iterator
+
+from bpystubgen.files import replace_file
+
+
+class Store:
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def path(self, checksum: str) -> Path:
+        return self.directory / checksum[:2] / checksum[2:]
+
+    def __iter__(self) -> Iterator[Path]:
+        return iter(sorted(filter(lambda p: p.is_file(), self.directory.glob("*/*"))))
+
+    def add(self, data: bytes) -> Path:
+        path = self.path(sha256(data).hexdigest())
+
+        # Concurrent builds never link to a partially written file, as it is replaced at once.
+        if not path.exists():
+            replace_file(path, data)
+
+        return path
+
+    def link(self, path: Path, data: bytes) -> bool:
+        source = self.add(data)
+
+        try:
+            if os.path.samefile(source, path):
+                return False
+
+            changed = path.read_bytes() != data
+            path.unlink()
+        except OSError:
+            changed = True
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            os.link(source, path)
+        except OSError:
+            # Fall back to a copy if the file system does not support hard links (e.g. across devices).
+            shutil.copyfile(source, path)
+
+        return changed
+
+    def prune(self) -> int:
+        count = 0
+
+        # Files which are no longer linked from any output directory are only referred to by the store itself.
+        for path in self:
+            if path.stat().st_nlink == 1:
+                path.unlink()
+                count += 1
+
+        for directory in filter(lambda d: d.is_dir() and not any(d.iterdir()), self.directory.glob("*")):
+            directory.rmdir()
+
+        return count
@@ -1,24 +1,101 @@
 from __future__ import annotations
 
+from hashlib import sha256
 from pathlib import Path
-from typing import AbstractSet, Iterable, MutableMapping, Optional, Sequence, ValuesView, cast
+from typing import TYPE_CHECKING, AbstractSet, Dict, Iterable, Iterator, List, MutableMapping, Optional, Sequence, \
+    Tuple, ValuesView
 
 from docutils.frontend import Values
-from docutils.io import FileOutput
+from docutils.io import StringOutput
 from docutils.nodes import document
 from docutils.utils import new_document
 from docutils.writers import Writer
-from sphinx.environment import BuildEnvironment
 
 import bpystubgen
-from bpystubgen import nodes, patches
+from bpystubgen import nodes, patches, profiling
+from bpystubgen.manifest import write_file
 from bpystubgen.nodes import Class, DocString, Import, Module
+from bpystubgen.profiling import Profiler
+
+if TYPE_CHECKING:
+    from _hashlib import HASH
+    from sphinx.environment import BuildEnvironment
+
+    from bpystubgen.cache import DoctreeCache
+    from bpystubgen.manifest import Output
+
+
+class TaskRegistry:
+
+    def __init__(self, root: Task) -> None:
+        tasks: List[Task] = []
+        spans: Dict[str, Tuple[int, int]] = dict()
+
+        # Walk the tree without recursion, recording the range of each subtree in the post-order list.
+        stack = [(root, iter(tuple(root.values())), 0)]
+
+        while stack:
+            (task, children, start) = stack[-1]
+            child = next(children, None)
+
+            if child:
+                stack.append((child, iter(tuple(child.values())), len(tasks)))
+                continue
+
+            stack.pop()
+            spans[task.full_name] = (start, len(tasks))
+
+            if task is not root:
+                tasks.append(task)
+
+        self._tasks: Sequence[Task] = tuple(tasks)
+        self._index: Dict[str, Task] = dict(map(lambda t: (t.full_name, t), tasks))
+        self._spans = spans
+
+    def descendants(self, task: Task) -> Sequence[Task]:
+        (start, end) = self._spans[task.full_name]
+        return self._tasks[start:end]
+
+    def get(self, full_name: str) -> Optional[Task]:
+        return self._index.get(full_name)
+
+    def __getitem__(self, full_name: str) -> Task:
+        return self._index[full_name]
+
+    def __contains__(self, full_name: object) -> bool:
+        return full_name in self._index
+
+    def __iter__(self) -> Iterator[Task]:
+        return iter(self._tasks)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+def partition(tasks: Sequence[Task], count: int) -> Sequence[Sequence[Task]]:
+    def source_size(task: Task) -> int:
+        sources = map(lambda t: t.source, filter(lambda t: isinstance(t, ParserTask) and t.source, (task, *task)))
+        return sum(map(lambda s: s.stat().st_size, sources))
+
+    costs = sorted(map(lambda t: (t, source_size(t)), tasks), key=lambda c: (-c[1], c[0].full_name))
+
+    shards: List[List[Task]] = list(map(lambda _: [], range(count)))
+    totals = [0] * count
+
+    # Assign the largest subtrees first, each to the shard with the least amount of sources so far.
+    for (task, cost) in costs:
+        index = min(range(count), key=lambda i: (totals[i], i))
+
+        shards[index].append(task)
+        totals[index] += cost
+
+    return tuple(map(lambda s: tuple(sorted(s, key=lambda t: t.full_name)), shards))
 
 
 class Task:
 
     @classmethod
-    def create(cls, src_dir: Path, pattern: str = "*.rst") -> Task:
+    def create(cls, src_dir: Path, pattern: str = "*.rst", shard: Optional[Tuple[int, int]] = None) -> Task:
         root = Task()
 
         def resolve(path: Sequence[str], context: Task) -> Task:
@@ -52,20 +129,46 @@ class Task:
             task = resolve(segments, root)
             task.source = file
 
+        # Top-level modules do not depend on each other, so each shard can be generated separately.
+        if shard:
+            (index, count) = shard
+
+            if not 0 < index <= count:
+                raise ValueError(f"Invalid shard {index} of {count}.")
+
+            selected = partition(tuple(root.values()), count)[index - 1]
+
+            root._children = dict(filter(lambda c: c[1] in selected, root._children.items()))
+            root._classes = None
+            root._submodules = None
+            root.invalidate()
+
+        root._registry = TaskRegistry(root)
+
         return root
 
     def __init__(self, name: str = "", parent: Optional[Task] = None) -> None:
         self._name = name
         self._parent = parent
         self._children: MutableMapping[str, Task] = dict()
+        self._checksum: Optional[str] = None
+
+        self._root: Optional[Task] = None
+        self._registry: Optional[TaskRegistry] = None
+
+        self._classes: Optional[Sequence[ClassTask]] = None
+        self._submodules: Optional[Sequence[ModuleTask]] = None
 
         if parent:
             parent._children[self.name] = self
+            parent._classes = None
+            parent._submodules = None
+            parent.invalidate()
 
-            segments = list(filter(any, map(lambda a: a.name, self.ancestors)))
-            segments.append(self.name)
+            self._root = parent.root
+            self._root._registry = None
 
-            self._full_name = ".".join(segments)
+            self._full_name = ".".join((parent.full_name, name)) if parent.full_name else name
         else:
             self._full_name = name
 
@@ -87,6 +190,53 @@ class Task:
             yield from self.parent.ancestors
             yield self.parent
 
+    @property
+    def root(self) -> Task:
+        return self._root or self
+
+    @property
+    def registry(self) -> TaskRegistry:
+        root = self.root
+
+        if not root._registry:
+            root._registry = TaskRegistry(root)
+
+        return root._registry
+
+    @property
+    def classes(self) -> Sequence[ClassTask]:
+        if self._classes is None:
+            self._classes = tuple(c for c in self.values() if isinstance(c, ClassTask))
+
+        return self._classes
+
+    @property
+    def submodules(self) -> Sequence[ModuleTask]:
+        if self._submodules is None:
+            self._submodules = tuple(c for c in self.values() if isinstance(c, ModuleTask))
+
+        return self._submodules
+
+    def checksum(self) -> str:
+        if not self._checksum:
+            digest = sha256(self.name.encode("UTF-8"))
+
+            self.update_checksum(digest)
+
+            self._checksum = digest.hexdigest()
+
+        return self._checksum
+
+    def update_checksum(self, digest: HASH) -> None:
+        for child in sorted(self.values(), key=lambda c: c.name):
+            digest.update(child.checksum().encode("UTF-8"))
+
+    def invalidate(self) -> None:
+        self._checksum = None
+
+        if self.parent:
+            self.parent.invalidate()
+
     def keys(self) -> AbstractSet[str]:
         return self._children.keys()
 
@@ -96,10 +246,8 @@ class Task:
     def __getitem__(self, key: str) -> Task:
         return self._children[key]
 
-    def __iter__(self) -> Iterable[Task]:
-        for child in self.values():
-            yield from child.__iter__()
-            yield child
+    def __iter__(self) -> Iterator[Task]:
+        return iter(self.registry.descendants(self))
 
     def __len__(self) -> int:
         return len(self._children)
@@ -110,25 +258,87 @@ class Task:
     def __bool__(self) -> bool:
         return True
 
+    def __getstate__(self) -> dict:
+        # A task is shipped to a worker process detached from the rest of the tree.
+        state = dict(self.__dict__)
+
+        state["_parent"] = None
+        state["_children"] = dict()
+        state["_root"] = None
+        state["_registry"] = None
+        state["_classes"] = None
+        state["_submodules"] = None
+
+        return state
+
 
 class ParserTask(Task):
 
     def __init__(self, name: str = "", parent: Optional[Task] = None) -> None:
+        self._source: Optional[Path] = None
+
         super().__init__(name, parent)
 
-        self.source: Optional[Path] = None
         self.doctree: Optional[document] = None
 
-    def parse(self, settings: Values, env: BuildEnvironment) -> Optional[document]:
+    @property
+    def source(self) -> Optional[Path]:
+        return self._source
+
+    @source.setter
+    def source(self, value: Optional[Path]) -> None:
+        self._source = value
+        self.invalidate()
+
+    @property
+    def patch_names(self) -> Sequence[str]:
+        prefix = self.full_name + "."
+        names = filter(lambda n: n in (self.name, self.full_name) or n.startswith(prefix), patches.patches)
+
+        return tuple(sorted(names))
+
+    def update_checksum(self, digest: HASH) -> None:
+        super().update_checksum(digest)
+
+        digest.update(bpystubgen.__version__.encode("UTF-8"))
+        digest.update("\n".join(sorted(patches.blacklist)).encode("UTF-8"))
+
+        if self.source:
+            digest.update(self.source.read_bytes())
+
+        for name in self.patch_names:
+            digest.update(patches.source(name))
+
+    def parse(self,
+              settings: Values,
+              env: BuildEnvironment,
+              cache: Optional[DoctreeCache] = None,
+              profiler: Profiler = profiling.disabled) -> Optional[document]:
         if self.source:
-            doc = nodes.from_path(self.source, settings, env)
+            with profiler.measure(self.full_name, "cache"):
+                key = cache.key(self.source, self.name) if cache else None
+                doc = cache.load(key, settings) if cache and key else None
+
+            if doc is None:
+                with profiler.measure(self.full_name, "parse"):
+                    doc = nodes.from_path(self.source, settings, env)
 
-            self.doctree = patches.apply(self.name, doc, settings, env)
+                with profiler.measure(self.full_name, "patch"):
+                    doc = patches.apply(self.name, doc, settings, env)
+
+                if cache and key:
+                    with profiler.measure(self.full_name, "cache"):
+                        cache.save(key, doc)
+
+            self.doctree = doc
         else:
             self.doctree = None
 
         return self.doctree
 
+    def release(self) -> None:
+        self.doctree = None
+
 
 class ClassTask(ParserTask):
     pass
@@ -136,12 +346,33 @@ class ClassTask(ParserTask):
 
 class ModuleTask(ParserTask):
 
-    def parse(self, settings: Values, env: BuildEnvironment) -> Optional[document]:
-        doctree = super().parse(settings, env)
+    def __init__(self, name: str = "", parent: Optional[Task] = None) -> None:
+        super().__init__(name, parent)
+
+        self._module_names: Sequence[str] = ()
+
+        # Maximum number of classes to write to each private module, or 0 to write all of them to the module itself.
+        self.split_size = 0
+
+    @property
+    def module_names(self) -> Sequence[str]:
+        if self.doctree:
+            return tuple(map(lambda m: m.name, self.doctree.traverse(Module)))
+
+        return self._module_names
+
+    def parse(self,
+              settings: Values,
+              env: BuildEnvironment,
+              cache: Optional[DoctreeCache] = None,
+              profiler: Profiler = profiling.disabled) -> Optional[document]:
+        doctree = super().parse(settings, env, cache, profiler)
 
         if not doctree:
             doctree = new_document("", settings=settings)
-            doctree += patches.apply(self.full_name, Module(name=self.full_name), settings, env)
+
+            with profiler.measure(self.full_name, "patch"):
+                doctree += patches.apply(self.full_name, Module(name=self.full_name), settings, env)
 
         self.doctree = doctree
 
@@ -158,59 +389,101 @@ class ModuleTask(ParserTask):
 
             module += docstring
 
-            doctree += patches.apply(self.full_name, module, settings, env)
+            with profiler.measure(self.full_name, "patch"):
+                doctree += patches.apply(self.full_name, module, settings, env)
 
             doctree.transformer.apply_transforms()
 
-        for cls in module.traverse(Class):
-            patches.apply(cls.full_name, cls, settings, env)
+        with profiler.measure(self.full_name, "patch"):
+            for cls in module.traverse(Class):
+                patches.apply(cls.full_name, cls, settings, env)
 
-        classes = filter(lambda c: isinstance(c, ClassTask) and c.doctree, self.values())
-        submodules = filter(lambda c: isinstance(c, ModuleTask) and c.doctree, self.values())
+        classes = filter(lambda c: c.doctree, self.classes)
+        submodules = filter(lambda c: c.module_names, self.submodules)
 
-        for child in classes:
-            for node in cast(ClassTask, child).doctree.traverse(Class):
-                node.parent.remove(node)
-                module += node
+        with profiler.measure(self.full_name, "merge"):
+            for child in classes:
+                for node in child.doctree.traverse(Class):
+                    node.parent.remove(node)
+                    module += node
 
-        module.import_types()
-        module.sort_members()
+        with profiler.measure(self.full_name, "import_types"):
+            module.import_types()
+
+        with profiler.measure(self.full_name, "sort_members"):
+            module.sort_members()
 
         index = 1 if module.docstring else 0
 
-        for child in submodules:
-            for node in cast(ModuleTask, child).doctree.traverse(Module):
-                module.insert(index, Import(module=".", types=module.localise_name(node.name)))
+        with profiler.measure(self.full_name, "merge"):
+            for child in submodules:
+                for name in child.module_names:
+                    module.insert(index, Import(module=".", types=module.localise_name(name)))
 
         return doctree
 
+    def release(self) -> None:
+        # Keep the names so that the parent module can import them even after the doctree has been released.
+        self._module_names = self.module_names
+
+        super().release()
+
     def target_path(self, dest_dir: Path) -> Path:
-        top_level = not self.parent or not any(self.parent.ancestors)
-        has_submodule = any(filter(lambda c: isinstance(c, ModuleTask), self.values()))
+        top_level = not self.parent or not self.parent.parent
 
-        if top_level or has_submodule:
+        if top_level or any(self.submodules) or self.split_size:
             parent_dir = Path(dest_dir, "/".join(self.full_name.split("."))).resolve()
             return parent_dir / "__init__.pyi"
         else:
             parent_dir = Path(dest_dir, "/".join(self.full_name.split(".")[:-1])).resolve()
             return parent_dir / (self.name + ".pyi")
 
-    def generate(self, dest_dir: Path, writer: Writer) -> Optional[Path]:
+    def output_paths(self, dest_dir: Path) -> Sequence[Path]:
         target = self.target_path(dest_dir)
+        marker = target.parent / "py.typed"
 
-        target.parent.mkdir(parents=True, exist_ok=True)
+        # Names of the private modules are not known until the classes are parsed, so use those written before.
+        if self.split_size:
+            return marker, target, *sorted(target.parent.glob("_*.pyi"))
 
-        marker = target.parent / "py.typed"
+        return marker, target
 
-        with open(marker, "w"):
-            pass
+    def render(self,
+               writer: Writer,
+               profiler: Profiler = profiling.disabled,
+               doctree: Optional[document] = None) -> str:
+        with profiler.measure(self.full_name, "write"):
+            return writer.write(doctree or self.doctree, StringOutput(encoding="unicode"))
 
-        fout = FileOutput(destination_path=str(target), encoding="utf-8")
+    def generate(self,
+                 dest_dir: Path,
+                 writer: Writer,
+                 profiler: Profiler = profiling.disabled,
+                 output: Optional[Output] = None) -> Optional[Path]:
+        assert self.doctree is not None
 
-        try:
-            writer.write(self.doctree, fout)
-            writer.assemble_parts()
-        finally:
-            fout.close()
+        target = self.target_path(dest_dir)
+        files: List[Tuple[Path, bytes]] = [(target.parent / "py.typed", b"")]
+
+        module = next(iter(self.doctree.traverse(Module)), None)
+
+        if module and self.split_size:
+            with profiler.measure(self.full_name, "merge"):
+                parts = module.split(self.split_size)
+
+            for (name, part) in parts.items():
+                doctree = new_document(self.doctree.get("source", ""), self.doctree.settings)
+                doctree += part
+
+                files.append((target.parent / (name + ".pyi"), self.render(writer, profiler, doctree).encode("UTF-8")))
+
+        files.append((target, self.render(writer, profiler).encode("UTF-8")))
+
+        with profiler.measure(self.full_name, "write"):
+            for (path, data) in files:
+                if output:
+                    output.write(path, data)
+                else:
+                    write_file(path, data)
 
         return target
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import re
+from base64 import urlsafe_b64encode
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, Final, Iterable, Set, Tuple
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+import bpystubgen
+from bpystubgen.manifest import Output
+
+_metadata: Final = (
+    ("Summary", "API stubs for Blender and UPBGE generated with bpystubgen."),
+    ("Home-page", "https://github.com/mysticfall/bpystubgen"),
+    ("Author", "Xavier Cho"),
+    ("Author-email", "mysticfallband@gmail.com"),
+    ("Classifier", "Programming Language :: Python :: 3"),
+    ("Classifier", "License :: OSI Approved :: GNU General Public License v3 or later (GPLv3+)"),
+    ("Classifier", "Operating System :: OS Independent"),
+    ("Classifier", "Topic :: Multimedia :: Graphics :: 3D Modeling"),
+    ("Classifier", "Topic :: Multimedia :: Graphics :: 3D Rendering"),
+    ("Classifier", "Topic :: Text Editors :: Integrated Development Environments (IDE)"))
+
+# Use a fixed timestamp, so that the same stubs always result in the same archive.
+_timestamp: Final = (1980, 1, 1, 0, 0, 0)
+
+
+def parse_requirement(text: str) -> Tuple[str, str]:
+    match = re.fullmatch("\\s*([A-Za-z0-9][A-Za-z0-9._-]*)\\s*==\\s*([A-Za-z0-9.+!_-]+)\\s*", text)
+
+    if not match:
+        raise ValueError(f"Expected a requirement in the form of NAME==VERSION: {text}")
+
+    return match.group(1), match.group(2)
+
+
+def _entry(name: str) -> ZipInfo:
+    info = ZipInfo(name, date_time=_timestamp)
+
+    info.compress_type = ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+
+    return info
+
+
+def _escape(text: str) -> str:
+    return re.sub("[^\\w\\d.]+", "_", text)
+
+
+def _headers(items: Iterable[Tuple[str, str]]) -> bytes:
+    return "".join(map(lambda i: f"{i[0]}: {i[1]}\n", items)).encode("UTF-8")
+
+
+class WheelWriter(Output):
+
+    def __init__(self, root: Path, name: str, version: str) -> None:
+        self.root = root.resolve()
+        self.name = name
+        self.version = version
+
+        self.path = root / f"{_escape(name)}-{_escape(version)}-py3-none-any.whl"
+        self.dist_info = f"{_escape(name)}-{_escape(version)}.dist-info"
+
+        root.mkdir(parents=True, exist_ok=True)
+
+        self._archive = ZipFile(self.path, "w", compression=ZIP_DEFLATED)
+        self._entries: Dict[str, bytes] = dict()
+        self._packages: Set[str] = set()
+
+    def write(self, path: Path, data: bytes) -> bool:
+        name = path.resolve().relative_to(self.root).as_posix()
+        segments = name.split("/")
+
+        # Follow the layout of package/setup.py, which includes all stubs in each top-level package,
+        # but only the py.typed markers of the top-level packages.
+        if len(segments) < 2 or name in self._entries:
+            return False
+
+        if segments[-1] == "py.typed" and len(segments) > 2:
+            return False
+
+        self._packages.add(segments[0])
+        self._entries[name] = data
+
+        return True
+
+    def close(self) -> None:
+        metadata = [("Metadata-Version", "2.1"), ("Name", self.name), ("Version", self.version), *_metadata]
+
+        wheel = (
+            ("Wheel-Version", "1.0"),
+            ("Generator", f"bpystubgen ({bpystubgen.__version__})"),
+            ("Root-Is-Purelib", "true"),
+            ("Tag", "py3-none-any"))
+
+        # Stubs may be generated in a different order each time, so they are sorted to keep the archive reproducible.
+        entries = (
+            *sorted(self._entries.items()),
+            (f"{self.dist_info}/METADATA", _headers(metadata)),
+            (f"{self.dist_info}/WHEEL", _headers(wheel)),
+            (f"{self.dist_info}/top_level.txt", "".join(map(lambda p: p + "\n", sorted(self._packages))).encode()))
+
+        records = []
+
+        for (name, data) in entries:
+            self._archive.writestr(_entry(name), data)
+
+            digest = urlsafe_b64encode(sha256(data).digest()).rstrip(b"=").decode("ascii")
+            records.append(f"{name},sha256={digest},{len(data)}")
+
+        record = "".join(map(lambda r: r + "\n", (*records, f"{self.dist_info}/RECORD,,")))
+
+        self._archive.writestr(_entry(f"{self.dist_info}/RECORD"), record.encode("UTF-8"))
+        self._archive.close()
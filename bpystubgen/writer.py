@@ -1,117 +1,114 @@
 from logging import Logger, getLogger
 from typing import List
 
-from docutils.nodes import Node, SkipNode, Text, literal_block, system_message
+from docutils.nodes import Node, SkipNode, Text, document, literal_block, system_message
 from docutils.utils import Reporter
 from sphinx.writers.text import MAXWIDTH
+from sphinxcontrib.builders.rst import RstBuilder
 from sphinxcontrib.writers.rst import RstTranslator, RstWriter
 
-from bpystubgen.nodes import APIMember, Argument, AttributeRef, Class, ClassRef, Data, DataRef, DocString, Function, \
-    FunctionRef, FunctionScope, Import, MethodRef, Module, ModuleRef, Property, PropertyRef, Reference
+from bpystubgen.nodes import (APIMember, Argument, AttributeRef, Class, ClassRef, DataRef, DocString, Function,
+                              FunctionRef, FunctionScope, Import, MethodRef, Module, ModuleRef, Property, PropertyRef,
+                              Reference)
 
 
 class StubWriter(RstWriter):
 
     def translate(self) -> None:
-        visitor = StubTranslator(self.document, self.builder)
+        emitter = StubEmitter(self.document, self.builder)
 
-        self.document.walkabout(visitor)
-        self.output = visitor.body
+        self.output = emitter.emit()
 
 
-# noinspection PyPep8Naming, PyUnusedLocal
-class StubTranslator(RstTranslator):
-    logger: Logger = getLogger("StubTranslator")
-
-    def wrap(self, text: str, width: int = MAXWIDTH) -> List[str]:
-        # Disable wrapping.
-        return [text]
-
-    def visit_DocString(self, node: DocString) -> None:
-        self.new_state(0)
-        self.add_text("\"\"\"")
+class StubEmitter:
+    logger: Logger = getLogger("StubEmitter")
 
-    def depart_DocString(self, node: DocString) -> None:
-        self.add_text("\"\"\"")
-        self.end_state()
+    def __init__(self, doctree: document, builder: RstBuilder) -> None:
+        self.document = doctree
 
-    def visit_Module(self, node: Module) -> None:
-        self.new_state(0)
+        # Only docstrings and other nodes which are not part of the API are left to the translator, which is created
+        # for each document as it keeps the text it has translated.
+        self.translator = StubTranslator(doctree, builder)
+        self.indent: int = self.translator.indent
 
-    def depart_Module(self, node: Module) -> None:
-        self.end_state()
+        self.signatures_only = getattr(doctree.settings, "signatures_only", False)
+        self.lines: List[str] = []
 
-    def visit_Import(self, node: Import) -> None:
-        self.new_state(0)
-        self.add_text(node.astext())
-        self.end_state()
+    def emit(self) -> str:
+        self.lines = []
+        self.emit_node(self.document, 0)
 
-        raise SkipNode
+        return self.translator.nl.join(self.lines)
 
-    def depart_Import(self, node: Import) -> None:
-        pass
+    def emit_node(self, node: Node, indent: int) -> None:
+        if isinstance(node, APIMember):
+            self.emit_member(node, indent)
+        elif isinstance(node, Module) or isinstance(node, document):
+            for child in node.children:
+                self.emit_node(child, indent)
+        elif isinstance(node, Import):
+            self.add_line(node.astext(), indent)
+        elif isinstance(node, Argument) or isinstance(node, DocString) and self.signatures_only:
+            pass
+        else:
+            self.translate(node, indent)
 
-    def visit_APIMember(self, node: APIMember) -> None:
+    def emit_member(self, node: APIMember, indent: int) -> None:
         name = node.name
 
         if not name or not any(name):
             self.logger.warning("Ignoring a member node without a name: %s", node.astext())
-            raise SkipNode
+            return
 
-        self.new_state(0)
+        # Fix documentation errors.
+        if isinstance(node, Function) and isinstance(node.parent, Class) and node.scope == FunctionScope.Module:
+            node.scope = FunctionScope.Instance
 
         for line in node.signature.split("\n"):
-            self.new_state(0)
-            self.add_text(line)
-            self.end_state()
+            self.add_line(line, indent)
 
-        if node.has_body:
-            self.new_state(self.indent)
+        body_indent = indent + self.indent if node.has_body else indent
 
-    def depart_APIMember(self, node: APIMember) -> None:
-        if node.has_body:
-            self.end_state()
+        for child in node.children:
+            self.emit_node(child, body_indent)
 
-        self.end_state()
+        if isinstance(node, (Function, Property)) or isinstance(node, Class) and not any(node.members):
+            self.add_line("...", body_indent)
 
-    def visit_Data(self, node: Data) -> None:
-        self.visit_APIMember(node)
+    def add_line(self, text: str, indent: int) -> None:
+        self.lines.append(" " * indent + text if text else text)
+        self.lines.append("")
 
-    def depart_Data(self, node: Data) -> None:
-        self.depart_APIMember(node)
+    def translate(self, node: Node, indent: int) -> None:
+        translator = self.translator
+        translated = len(translator.states[0])
 
-    def visit_Property(self, node: Property) -> None:
-        self.visit_APIMember(node)
+        translator.new_state(indent)
 
-    def depart_Property(self, node: Property) -> None:
-        self.add_text("...")
-        self.depart_APIMember(node)
+        node.walkabout(translator)
+        translator.end_state()
 
-    def visit_Function(self, node: Function) -> None:
-        # Fix documentation errors.
-        if isinstance(node.parent, Class) and node.scope == FunctionScope.Module:
-            node.scope = FunctionScope.Instance
+        # The indentation of the new state is already included in the offsets of the lines added to the outer one.
+        for (offset, lines) in translator.states[0][translated:]:
+            prefix = " " * offset
+            self.lines.extend(map(lambda line: line and prefix + line, lines))
 
-        self.visit_APIMember(node)
 
-    def depart_Function(self, node: Function) -> None:
-        self.add_text("...")
-        self.depart_APIMember(node)
-
-    def visit_Class(self, node: Class) -> None:
-        self.visit_APIMember(node)
-
-    def depart_Class(self, node: Class) -> None:
-        if not any(node.members):
-            self.add_text("...")
+# noinspection PyPep8Naming, PyUnusedLocal
+class StubTranslator(RstTranslator):
+    logger: Logger = getLogger("StubTranslator")
 
-        self.depart_APIMember(node)
+    def wrap(self, text: str, width: int = MAXWIDTH) -> List[str]:
+        # Disable wrapping.
+        return [text]
 
-    def visit_Argument(self, node: Argument) -> None:
-        raise SkipNode
+    def visit_DocString(self, node: DocString) -> None:
+        self.new_state(0)
+        self.add_text("\"\"\"")
 
-    def depart_Argument(self, node: Argument) -> None:
-        pass
+    def depart_DocString(self, node: DocString) -> None:
+        self.add_text("\"\"\"")
+        self.end_state()
 
     def visit_Reference(self, node: Reference) -> None:
         self.add_text(node.astext())
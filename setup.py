@@ -1,11 +1,16 @@
+import re
+
 from setuptools import setup
 
 with open("README.md", "r") as fh:
     long_description = fh.read()
 
+with open("bpystubgen/__init__.py", "r") as fh:
+    version = re.search("^__version__: Final = \"([^\"]+)\"", fh.read(), re.MULTILINE).group(1)
+
 setup(
     name="bpystubgen",
-    version="0.2.7",
+    version=version,
     author="Xavier Cho",
     author_email="mysticfallband@gmail.com",
     description="A utility to generate Python API stubs from documentation files in reStructuredText format.",
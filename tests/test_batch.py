@@ -0,0 +1,68 @@
+import os
+import shutil
+from pathlib import Path
+
+from pytest import fixture, raises
+
+from bpystubgen.batch import build, parse_source
+
+
+@fixture
+def rst_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "rst"
+
+
+@fixture
+def stub_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "stub"
+
+
+def test_parse_source():
+    assert parse_source("docs/3.1") == ("3.1", Path("docs/3.1"))
+    assert parse_source("upbge-0.3=docs/0.3") == ("upbge-0.3", Path("docs/0.3"))
+
+    with raises(ValueError):
+        parse_source(".bpystubgen=docs/3.1")
+
+
+def test_build(rst_path: Path, stub_path: Path, tmp_path: Path):
+    old_dir = tmp_path / "docs" / "0.3.0"
+    new_dir = tmp_path / "docs" / "0.3.1"
+
+    shutil.copytree(rst_path, old_dir)
+    shutil.copytree(rst_path, new_dir)
+
+    (new_dir / "bge.logic.rst").unlink()
+
+    dest = tmp_path / "stubs"
+    sources = {"0.3.0": old_dir, "0.3.1": new_dir}
+
+    runners = build(sources, dest)
+
+    assert tuple(runners.keys()) == ("0.3.0", "0.3.1")
+
+    for path in filter(lambda p: p.is_file(), stub_path.glob("**/*")):
+        assert (dest / "0.3.0" / path.relative_to(stub_path)).read_text("UTF-8") == path.read_text("UTF-8")
+
+    # Identical stubs of both versions should refer to the same file.
+    assert os.path.samefile(dest / "0.3.0" / "bge" / "types.pyi", dest / "0.3.1" / "bge" / "types.pyi")
+
+    assert not (dest / "0.3.1" / "bge" / "logic.pyi").exists()
+    assert not os.path.samefile(dest / "0.3.0" / "bge" / "__init__.pyi", dest / "0.3.1" / "bge" / "__init__.pyi")
+
+    stored = tuple((dest / ".bpystubgen" / "store").glob("*/*"))
+    checksums = set(runners["0.3.0"].manifest.files.values()) | set(runners["0.3.1"].manifest.files.values())
+
+    assert len(stored) == len(checksums)
+
+    # The doctrees parsed for the first version should be reused for the second one.
+    assert any((dest / ".bpystubgen" / "cache").glob("*/*.pickle"))
+
+    # Files which are no longer used by any version should be removed from the store.
+    del sources["0.3.0"]
+
+    shutil.rmtree(dest / "0.3.0")
+
+    runners = build(sources, dest)
+
+    assert len(tuple((dest / ".bpystubgen" / "store").glob("*/*"))) == len(set(runners["0.3.1"].manifest.files.values()))
@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+
+from pytest import fixture, raises
+
+from benchmarks import measure
+from benchmarks.corpus import Corpus
+from benchmarks.suites import suites
+from benchmarks.typecheck import Checker, default_snippets, parse_costs, run_checker
+
+
+@fixture(scope="module")
+def corpus(tmp_path_factory) -> Corpus:
+    rst_path = Path(__file__).parent / "fixtures" / "rst"
+
+    return Corpus(rst_path, tmp_path_factory.mktemp("benchmarks"))
+
+
+def test_corpus(corpus: Corpus):
+    assert "list of :class:`bge.types.KX_Scene`" in corpus.type_expressions
+    assert "getCurrentScene()" in corpus.signatures
+
+    assert set(map(lambda m: m.name, corpus.modules)) == {
+        "bge", "bge.logic", "bge.types", "bgl", "mathutils", "mathutils.geometry"
+    }
+
+    assert set(map(lambda t: t[0], corpus.patch_targets)) == {
+        "bgl", "mathutils.Euler", "mathutils.Matrix", "mathutils.Quaternion", "mathutils.Vector"
+    }
+
+
+def test_suites(corpus: Corpus):
+    for (name, suite) in suites.items():
+        (func, items) = suite(corpus)
+
+        result = measure(name, func, items, number=1, repeat=2)
+
+        assert result.items > 0
+        assert len(result.timings) == 2
+        assert result.best > 0
+        assert result.throughput > 0
+
+        assert set(result.to_dict().keys()) == {
+            "items", "number", "best", "mean", "median", "throughput", "timings"
+        }
+
+
+@fixture
+def stub_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "stub"
+
+
+def test_default_snippets(stub_path: Path):
+    snippets = default_snippets(stub_path)
+
+    assert tuple(snippets.keys()) == ("import bge", "bge.types.KX_GameObject", "import bgl", "import mathutils")
+    assert snippets["bge.types.KX_GameObject"] == "import bge.types\n\nvalue: bge.types.KX_GameObject\n"
+
+
+def test_parse_costs(stub_path: Path):
+    costs = parse_costs(stub_path, repeat=1)
+
+    assert set(costs.keys()) == {"bge", "bge.logic", "bge.types", "bgl", "mathutils", "mathutils.geometry"}
+    assert all(map(lambda c: c > 0, costs.values()))
+
+
+def test_run_checker(stub_path: Path):
+    # Pretend to be a type checker which records the time spent on each module, like mypy does.
+    script = "import sys; open('timings.txt', 'w').write('bge 1500\\nbge.types 250000\\n')"
+
+    checker = Checker("fake", lambda stubs, work_dir, snippet: (sys.executable, "-c", script), "timings.txt")
+
+    (result, modules) = run_checker(checker, stub_path, "import bge\n", repeat=2)
+
+    assert result.name == "fake"
+    assert len(result.timings) == 2
+
+    assert modules == {"bge": 0.0015, "bge.types": 0.25}
+
+
+def test_run_checker_failure(stub_path: Path):
+    # Errors found in the snippet are reported with the exit code 1, which is not a failure.
+    checker = Checker("fake", lambda stubs, work_dir, snippet: (sys.executable, "-c", "import sys; sys.exit(1)"))
+
+    (result, _) = run_checker(checker, stub_path, "import bge\n", repeat=1)
+
+    assert len(result.timings) == 1
+
+    script = "import sys; print('invalid configuration', file=sys.stderr); sys.exit(2)"
+    checker = Checker("fake", lambda stubs, work_dir, snippet: (sys.executable, "-c", script))
+
+    with raises(RuntimeError, match="fake exited with code 2: invalid configuration"):
+        run_checker(checker, stub_path, "import bge\n", repeat=1)
+
+    checker = Checker("fake", lambda stubs, work_dir, snippet: (str(stub_path / "missing-checker"),))
+
+    with raises(RuntimeError, match="Failed to run fake"):
+        run_checker(checker, stub_path, "import bge\n", repeat=1)
@@ -0,0 +1,129 @@
+import shutil
+import stat
+import tempfile
+from pathlib import Path
+
+from docutils.frontend import OptionParser, Values
+from docutils.parsers.rst import Parser
+from pytest import MonkeyPatch, fixture
+from sphinx.application import Sphinx
+from sphinx.environment import BuildEnvironment
+
+from bpystubgen import nodes
+from bpystubgen.cache import DoctreeCache
+from bpystubgen.files import file_mode
+from bpystubgen.runner import Runner
+from bpystubgen.tasks import Task
+
+
+# noinspection DuplicatedCode
+@fixture
+def env() -> BuildEnvironment:
+    dest_path = Path(tempfile.tempdir) / "bpystubgen-test"
+    app = Sphinx(srcdir=".", confdir=None, outdir=str(dest_path), doctreedir=".", buildername="text")
+
+    yield app.env
+
+    shutil.rmtree(dest_path)
+
+
+@fixture
+def settings(env: BuildEnvironment) -> Values:
+    components = (Parser,)
+    settings = OptionParser(components=components).get_default_values()
+
+    settings.line_length_limit = 15000
+    settings.report_level = 5
+    settings.traceback = True
+    settings.env = env
+
+    return settings
+
+
+@fixture
+def rst_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "rst"
+
+
+@fixture
+def cache(tmp_path: Path) -> DoctreeCache:
+    return DoctreeCache(tmp_path / "cache")
+
+
+def test_key(rst_path: Path, cache: DoctreeCache, tmp_path: Path):
+    source = tmp_path / "bgl.rst"
+    shutil.copy(rst_path / "bgl.rst", source)
+
+    key = cache.key(source)
+
+    assert key == cache.key(source)
+    assert key != cache.key(source, "bgl")
+    assert key == cache.key(source, "not_a_patch")
+
+    source.write_text(source.read_text("UTF-8") + "\n", "UTF-8")
+
+    assert key != cache.key(source)
+
+
+def test_key_signatures_only(rst_path: Path, cache: DoctreeCache):
+    source = rst_path / "bgl.rst"
+
+    assert cache.key(source) != DoctreeCache(cache.directory, signatures_only=True).key(source)
+
+
+def test_save_and_load(rst_path: Path, cache: DoctreeCache, settings: Values, env: BuildEnvironment):
+    source = rst_path / "bge.types.KX_GameObject.rst"
+    doc = nodes.from_path(source, settings, env)
+
+    key = cache.key(source)
+
+    assert cache.load(key, settings) is None
+
+    cache.save(key, doc)
+
+    assert cache.path(key).exists()
+
+    # The cache may be shared with other users, so the entries must not be private to their owner.
+    assert stat.S_IMODE(cache.path(key).stat().st_mode) == file_mode()
+
+    loaded = cache.load(key, settings)
+
+    assert loaded and loaded.pformat() == doc.pformat()
+
+
+def test_load_corrupt_entry(cache: DoctreeCache, settings: Values):
+    path = cache.path("0123456789")
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"corrupt")
+
+    assert cache.load("0123456789", settings) is None
+
+
+def test_parse(rst_path: Path, cache: DoctreeCache, settings: Values, env: BuildEnvironment,
+               monkeypatch: MonkeyPatch):
+    task = Task.create(rst_path, "bgl.rst")["bgl"]
+    expected = task.parse(settings, env, cache).pformat()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The source should have been loaded from the cache.")
+
+    monkeypatch.setattr(nodes, "from_path", fail)
+
+    task = Task.create(rst_path, "bgl.rst")["bgl"]
+
+    assert task.parse(settings, env, cache).pformat() == expected
+
+
+def test_run(rst_path: Path, tmp_path: Path):
+    stub_path = Path(__file__).parent / "fixtures" / "stub"
+
+    for run in range(2):
+        dest_dir = tmp_path / f"output-{run}"
+
+        Runner(dest_dir, cache_dir=tmp_path / "cache").run(Task.create(rst_path))
+
+        for path in filter(lambda p: p.is_file(), stub_path.glob("**/*")):
+            generated = dest_dir / path.relative_to(stub_path)
+            assert generated.read_text("UTF-8") == path.read_text("UTF-8")
+
+    assert len(tuple((tmp_path / "cache").glob("*/*.pickle"))) == 7
@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+
+from pytest import approx, fixture
+
+from bpystubgen.costs import CostModel
+from bpystubgen.runner import Runner
+from bpystubgen.tasks import ModuleTask, ParserTask, Task
+
+
+@fixture
+def rst_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "rst"
+
+
+def create_task(path: Path, name: str, size: int) -> ParserTask:
+    task = ModuleTask(name)
+
+    task.source = path / f"{name}.rst"
+    task.source.write_text("x" * size, "UTF-8")
+
+    return task
+
+
+def test_order(tmp_path: Path):
+    small = create_task(tmp_path, "small", 100)
+    medium = create_task(tmp_path, "medium", 200)
+    large = create_task(tmp_path, "large", 400)
+
+    tasks = (small, medium, large)
+
+    model = CostModel(tmp_path / "costs.json")
+
+    # Without any timings, the tasks are ordered by the sizes of their sources.
+    assert model.order(tasks) == (large, medium, small)
+
+    # Those which have not been measured are estimated from the throughput of the others.
+    model = CostModel(tmp_path / "costs.json", {"small": 1.0, "medium": 0.5})
+
+    assert model.estimate(tasks)[large] == approx(2.0)
+    assert model.order(tasks) == (large, small, medium)
+
+
+def test_record(tmp_path: Path):
+    task = create_task(tmp_path, "bpy", 100)
+
+    model = CostModel(tmp_path / "costs.json")
+
+    model.record(task, 1.0)
+    assert model.timings == {"bpy": 1.0}
+
+    model.record(task, 2.0)
+    assert model.timings == {"bpy": 1.5}
+
+    model.save()
+
+    assert CostModel.load(tmp_path / "costs.json").timings == {"bpy": 1.5}
+
+
+def test_dispatch(rst_path: Path, tmp_path: Path):
+    root = Task.create(rst_path)
+    tasks = tuple(root)
+
+    runner = Runner(tmp_path, jobs=2)
+
+    scheduled = tuple(runner.dispatch(tasks, set(tasks)))
+    order = tuple(map(lambda s: s[0], scheduled))
+
+    assert set(order) == set(tasks)
+    assert len(order) == len(tasks)
+
+    # Each module is processed only after all of its children.
+    for (index, task) in enumerate(order):
+        assert all(map(lambda c: order.index(c) < index, task.values()))
+
+    parsed = set(map(lambda s: s[0], filter(lambda s: s[1], scheduled)))
+
+    assert any(parsed)
+    assert all(map(lambda t: t.doctree, parsed))
+
+
+def test_run(rst_path: Path, tmp_path: Path):
+    for jobs in (1, 2):
+        Runner(tmp_path, jobs=jobs).run(Task.create(rst_path))
+
+        data = json.loads((tmp_path / ".bpystubgen" / "costs.json").read_text("UTF-8"))
+        leaves = filter(lambda t: isinstance(t, ParserTask) and t.source, Task.create(rst_path))
+
+        assert set(data["timings"].keys()) == set(map(lambda t: t.full_name, leaves))
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+
+from docutils.parsers.rst import directives, roles
+from pytest import raises
+
+import bpystubgen
+from bpystubgen import nodes
+from bpystubgen.directives import ClassDirective
+
+
+def test_lazy_imports():
+    script = "; ".join((
+        "import sys",
+        "import bpystubgen.__main__",
+        "print(sorted(filter(lambda m: m in ('sphinx', 'sphinxcontrib.builders', 'pkg_resources'), sys.modules)))"
+    ))
+
+    output = subprocess.run((sys.executable, "-c", script), check=True, capture_output=True, text=True).stdout
+
+    assert output.strip() == "[]"
+
+
+def test_exports():
+    assert bpystubgen.Module is nodes.Module
+    assert bpystubgen.ClassDirective is ClassDirective
+
+    with raises(AttributeError):
+        assert bpystubgen.Task
+
+
+def test_register():
+    bpystubgen.register()
+
+    assert directives._directives["class"] is ClassDirective
+    assert "py:class" in roles._roles
@@ -0,0 +1,108 @@
+import json
+import shutil
+from pathlib import Path
+
+from pytest import fixture
+
+from bpystubgen.manifest import Manifest, write_file
+from bpystubgen.runner import Runner
+from bpystubgen.tasks import Task
+
+
+@fixture
+def rst_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "rst"
+
+
+def test_write_file(tmp_path: Path):
+    path = tmp_path / "module" / "__init__.pyi"
+
+    assert write_file(path, b"import bpy\n")
+    assert path.read_bytes() == b"import bpy\n"
+
+    assert not write_file(path, b"import bpy\n")
+    assert write_file(path, b"import bge\n")
+
+
+def test_manifest(tmp_path: Path):
+    manifest = Manifest(tmp_path)
+
+    assert manifest.write(tmp_path / "bge" / "py.typed", b"")
+    assert manifest.write(tmp_path / "bge" / "__init__.pyi", b"import bpy\n")
+    assert manifest.write(tmp_path / "bge" / "logic.pyi", b"import bge\n")
+
+    assert not manifest.write(tmp_path / "bge" / "py.typed", b"")
+
+    assert manifest.changed == ["bge/py.typed", "bge/__init__.pyi", "bge/logic.pyi"]
+
+    manifest.save()
+
+    manifest = Manifest.load(tmp_path)
+
+    assert not manifest.write(tmp_path / "bge" / "py.typed", b"")
+    assert manifest.write(tmp_path / "bge" / "__init__.pyi", b"import bge.logic\n")
+
+    assert manifest.prune() == ["bge/logic.pyi"]
+    assert not (tmp_path / "bge" / "logic.pyi").exists()
+
+    manifest.save()
+
+    data = json.loads(manifest.path.read_text("UTF-8"))
+
+    assert set(data["files"].keys()) == {"bge/__init__.pyi", "bge/py.typed"}
+    assert data["changed"] == ["bge/__init__.pyi"]
+    assert data["removed"] == ["bge/logic.pyi"]
+
+
+def test_prune_directories(tmp_path: Path):
+    manifest = Manifest(tmp_path)
+
+    manifest.write(tmp_path / "bge" / "types" / "__init__.pyi", b"")
+    manifest.write(tmp_path / "bge" / "__init__.pyi", b"")
+    manifest.save()
+
+    manifest = Manifest.load(tmp_path)
+
+    manifest.keep(tmp_path / "bge" / "__init__.pyi")
+
+    assert manifest.prune() == ["bge/types/__init__.pyi"]
+
+    assert not (tmp_path / "bge" / "types").exists()
+    assert (tmp_path / "bge").exists()
+
+
+def test_run(rst_path: Path, tmp_path: Path):
+    source_dir = tmp_path / "rst"
+    dest_dir = tmp_path / "stubs"
+
+    shutil.copytree(rst_path, source_dir)
+
+    runner = Runner(dest_dir)
+    runner.run(Task.create(source_dir))
+
+    stubs = set(filter(lambda p: p.endswith(".pyi"), runner.manifest.files.keys()))
+
+    assert set(runner.manifest.changed) == set(runner.manifest.files.keys())
+    assert len(stubs) == len(tuple(dest_dir.glob("**/*.pyi")))
+
+    timestamps = dict(map(lambda p: (p, (dest_dir / p).stat().st_mtime_ns), stubs))
+
+    runner = Runner(dest_dir)
+    runner.run(Task.create(source_dir))
+
+    assert not any(runner.manifest.changed)
+    assert timestamps == dict(map(lambda p: (p, (dest_dir / p).stat().st_mtime_ns), stubs))
+
+    (source_dir / "bge.logic.rst").unlink()
+
+    scene = source_dir / "bge.types.KX_Scene.rst"
+    scene.write_text(scene.read_text("UTF-8").replace("KX_Scene", "KX_Level"), "UTF-8")
+
+    runner = Runner(dest_dir)
+    runner.run(Task.create(source_dir))
+
+    # The parent module no longer imports the removed one.
+    assert set(runner.manifest.changed) == {"bge/__init__.pyi", "bge/types.pyi"}
+    assert runner.manifest.removed == ["bge/logic.pyi"]
+
+    assert not (dest_dir / "bge" / "logic.pyi").exists()
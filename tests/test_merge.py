@@ -0,0 +1,79 @@
+import shutil
+from pathlib import Path
+
+from pytest import fixture, raises
+
+from bpystubgen.manifest import Manifest
+from bpystubgen.merge import merge
+from bpystubgen.runner import Runner
+from bpystubgen.tasks import Task
+
+
+@fixture
+def rst_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "rst"
+
+
+@fixture
+def stub_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "stub"
+
+
+def test_merge(rst_path: Path, stub_path: Path, tmp_path: Path):
+    shard_dirs = tuple(map(lambda i: tmp_path / f"shard-{i}", range(1, 3)))
+
+    for (index, shard_dir) in enumerate(shard_dirs, start=1):
+        Runner(shard_dir).run(Task.create(rst_path, shard=(index, 2)))
+
+    single_dir = tmp_path / "single"
+
+    Runner(single_dir).run(Task.create(rst_path))
+
+    dest = tmp_path / "merged"
+
+    manifest = merge(shard_dirs, dest)
+
+    for path in filter(lambda p: p.is_file(), stub_path.glob("**/*")):
+        assert (dest / path.relative_to(stub_path)).read_text("UTF-8") == path.read_text("UTF-8")
+
+    assert manifest.files == Manifest.load(single_dir).previous
+    assert set(manifest.changed) == set(manifest.files.keys())
+
+    # Merging the same shards again should leave the output untouched.
+    manifest = merge(shard_dirs, dest)
+
+    assert not any(manifest.changed)
+    assert not any(manifest.removed)
+
+    # Modules which are no longer generated by any of the shards should be removed.
+    shutil.rmtree(shard_dirs[0])
+
+    Runner(shard_dirs[0]).run(Task.create(rst_path, shard=(3, 3)))
+
+    manifest = merge(shard_dirs, dest)
+
+    assert set(manifest.removed) == {"bge/__init__.pyi", "bge/logic.pyi", "bge/py.typed", "bge/types.pyi"}
+    assert not (dest / "bge").exists()
+
+
+def test_merge_conflict(tmp_path: Path):
+    for (name, content) in (("shard-1", b"import bpy\n"), ("shard-2", b"import bge\n")):
+        manifest = Manifest(tmp_path / name)
+        manifest.write(tmp_path / name / "bpy" / "__init__.pyi", content)
+        manifest.save()
+
+    with raises(ValueError):
+        merge((tmp_path / "shard-1", tmp_path / "shard-2"), tmp_path / "merged")
+
+    assert not (tmp_path / "merged").exists()
+
+
+def test_merge_modified(tmp_path: Path):
+    manifest = Manifest(tmp_path / "shard")
+    manifest.write(tmp_path / "shard" / "bpy" / "__init__.pyi", b"import bpy\n")
+    manifest.save()
+
+    (tmp_path / "shard" / "bpy" / "__init__.pyi").write_bytes(b"import bge\n")
+
+    with raises(ValueError):
+        merge((tmp_path / "shard",), tmp_path / "merged")
@@ -6,7 +6,7 @@ from docutils.parsers.rst import Parser
 from docutils.utils import new_document
 from pytest import fixture
 
-from bpystubgen.nodes import Argument, Class, Data, DataRef, DocString, Function, Module
+from bpystubgen.nodes import Argument, Class, Data, DataRef, DocString, Function, Import, Module
 
 
 @fixture
@@ -233,6 +233,64 @@ def test_sort_members():
     assert members == ("TypeB", "TypeE", "TypeC", "TypeA", "TypeD")
 
 
+def test_sort_members_with_others():
+    module = Module(name="bpy.types")
+
+    module += DocString(text="Test Module")
+    module += Data(name="data1")
+    module += Class(name="TypeB", base_types="bpy.types.TypeA")
+    module += Data(name="data2")
+    module += Class(name="TypeA")
+    module += Function(name="func")
+
+    module.sort_members()
+
+    children = tuple(map(lambda c: c.get("name") or c.tagname, module.children))
+
+    assert children == ("docstring", "data1", "TypeA", "TypeB", "data2", "func")
+    assert all(map(lambda c: c.parent is module, module.children))
+
+
+def test_split():
+    module = Module(name="bpy.types")
+
+    module += DocString(text="Test Module")
+    module += Class(name="TypeA")
+    module += Class(name="TypeB", base_types="bpy.types.TypeA")
+    module += Class(name="TypeC", base_types="bpy.types.TypeB")
+    module += Data(name="data", type="typing.List[bpy.types.TypeC]")
+
+    module.import_types()
+    module.insert(1, Import(module=".", types="ops"))
+
+    parts = module.split(2)
+
+    assert tuple(parts.keys()) == ("_TypeA", "_TypeC")
+
+    assert tuple(map(lambda m: m.name, parts["_TypeA"].members)) == ("TypeA", "TypeB")
+    assert tuple(map(lambda m: m.name, parts["_TypeC"].members)) == ("TypeC",)
+
+    assert all(map(lambda p: p.name == "bpy.types", parts.values()))
+    assert tuple(map(lambda m: m.name, module.members)) == ("data",)
+
+    assert tuple(map(lambda i: i.astext(), parts["_TypeA"].imports)) == ("import typing",)
+    assert tuple(map(lambda i: i.astext(), parts["_TypeC"].imports)) == (
+        "import typing",
+        "from ._TypeA import TypeB"
+    )
+
+    assert tuple(map(lambda i: i.astext(), module.imports)) == (
+        "from . import ops",
+        "import typing",
+        "from ._TypeA import TypeA as TypeA, TypeB as TypeB",
+        "from ._TypeC import TypeC as TypeC"
+    )
+
+    # Signatures should be the same as those in the module which is not split.
+    assert parts["_TypeC"].members[0].signature == "class TypeC(TypeB):"
+    assert module.members[0].signature == "data: typing.List[TypeC] = ..."
+
+
 def test_localise_name():
     module = Module(name="bpy")
 
@@ -271,3 +329,50 @@ def test_referred_types():
     module += data2
 
     assert module.referred_types == {"typing", "ClassA", "ClassB", "ClassC", "ClassD"}
+
+
+def test_referred_types_cached():
+    arg = Argument(name="arg1", type="ClassB")
+
+    func = Function(name="func")
+    func += arg
+
+    cls = Class(name="MyClass")
+    cls += func
+
+    module = Module(name="MyModule")
+    module += cls
+
+    types = module.referred_types
+
+    assert types == {"typing", "ClassB"}
+    assert module.referred_types is types
+
+    module += DocString(text="Test Module")
+
+    assert module.referred_types is types
+
+    arg.type = "ClassC"
+
+    assert module.referred_types == {"typing", "ClassC"}
+
+    cls.base_types = ("ClassD",)
+
+    assert module.referred_types == {"typing", "ClassC", "ClassD"}
+
+    arg["type"] = "ClassE"
+
+    assert module.referred_types == {"typing", "ClassE", "ClassD"}
+
+    data = Data(name="data", type="ClassF")
+    module.insert(0, data)
+
+    assert module.referred_types == {"typing", "ClassE", "ClassD", "ClassF"}
+
+    module.remove(cls)
+
+    assert module.referred_types == {"typing", "ClassF"}
+
+    module.pop(0)
+
+    assert module.referred_types == {"typing"}
@@ -1,3 +1,4 @@
+import pickle
 import shutil
 import tempfile
 from pathlib import Path
@@ -66,6 +67,32 @@ def test_from_path(rst_path: Path, settings: Values, env: BuildEnvironment):
     assert isinstance(members["applyForce"], Function)
 
 
+def test_signature_lines():
+    lines = (
+        "bge.logic",
+        "=========",
+        "",
+        ".. module:: bge.logic",
+        "",
+        "Some prose which has nothing to do with signatures.",
+        "",
+        ".. function:: getSceneList()",
+        "",
+        "   Gets a list of the current scenes loaded in the game engine.",
+        "",
+        "   :return: A list of scenes.",
+        "   :rtype: list of :class:`~bge.types.KX_Scene`",
+        "",
+        ".. note::",
+        "",
+        "   Neither is this.",
+        "",
+        "base class --- :class:`SCA_IObject`"
+    )
+
+    assert nodes.signature_lines(lines) == [3, 4, 7, 8, 9, 10, 11, 12, 13, 18]
+
+
 @mark.parametrize("node_type", (Module, Data, Property, Function, Argument))
 def test_named(node_type: Type[Named]):
     node = node_type()
@@ -148,6 +175,35 @@ def test_module():
     assert attr.module == module
 
 
+def test_reparent():
+    module1 = Module(name="module1")
+    module2 = Module(name="module2")
+
+    cls = Class(name="MyClass")
+    attr = Data(name="attr")
+
+    cls += attr
+    module1 += cls
+
+    assert (attr.full_name, attr.module) == ("module1.MyClass.attr", module1)
+
+    module1.remove(cls)
+    module2 += cls
+
+    assert (attr.full_name, attr.module) == ("module2.MyClass.attr", module2)
+
+    module2.name = "renamed"
+
+    assert attr.full_name == "renamed.MyClass.attr"
+
+    copy = pickle.loads(pickle.dumps(module2))
+
+    copy.name = "copy"
+
+    assert copy.children[0].children[0].full_name == "copy.MyClass.attr"
+    assert copy.children[0].children[0].module is copy
+
+
 def test_import():
     assert Import(module="bpy").astext() == "import bpy"
     assert Import(module="bpy.types", types="Camera").astext() == "from bpy.types import Camera"
@@ -164,6 +220,29 @@ def test_import():
     assert i.astext() == "from bpy.types import Camera, Object"
 
 
+def test_name_lists():
+    i = Import(module="bpy.types", types="Camera, Object")
+
+    assert i.types == ("Camera", "Object")
+    assert i.types is i.types
+
+    i["types"] = "Mesh"
+
+    assert i.types == ("Mesh",)
+
+    i.types = ()
+
+    assert i.types == ()
+
+    cls = Class(name="MyClass", base_types="ClassA,ClassB")
+
+    assert cls.base_types == ("ClassA", "ClassB")
+
+    cls.base_types = ("ClassC",)
+
+    assert cls.base_types == ("ClassC",)
+
+
 def test_members():
     bge = Module(name="bge")
     types = Module(name="types")
@@ -206,3 +285,19 @@ def test_references():
     assert ClassRef(text="bpy.types.Object").astext() == ":class:`bpy.types.Object`"
     assert ClassRef(text="~bpy.types.Object").astext() == ":class:`~bpy.types.Object`"
     assert ClassRef(text="!bpy.types.Object").astext() == ":class:`!bpy.types.Object`"
+
+
+# noinspection DuplicatedCode
+def test_dumps_and_loads(rst_path: Path, settings: Values, env: BuildEnvironment):
+    source = rst_path / "bge.types.KX_GameObject.rst"
+
+    doc = nodes.from_path(source, settings, env)
+    copy = nodes.loads(nodes.dumps(doc), settings)
+
+    assert doc.settings == settings
+    assert doc.reporter and doc.transformer
+
+    assert copy is not doc
+    assert copy.settings == settings
+    assert copy.reporter and copy.transformer
+    assert copy.pformat() == doc.pformat()
@@ -1,6 +1,12 @@
+import json
+import random
+from pathlib import Path
+
 from pytest import mark
 
-from bpystubgen.parser import parse_type
+from benchmarks.patterns import parse_with_patterns
+from bpystubgen.parser import TypeCache, TypeParser, TypeStats, _parse_type, parse_type, parse_types, type_cache, \
+    type_stats, type_table_signature
 
 
 @mark.parametrize("text", ("", "  ", "\n"))
@@ -291,3 +297,267 @@ def test_parse_union_types(prefix, bullet, blank_lines):
     text = "\n".join(lines)
 
     assert parse_type(text) == f"typing.Union[{', '.join(types)}]"
+
+
+def test_type_cache():
+    calls = []
+
+    def parse(text: str):
+        calls.append(text)
+        return text.upper() if text != "none" else None
+
+    cache = TypeCache(maxsize=2)
+
+    assert cache.get("a", parse) == "A"
+    assert cache.get("a", parse) == "A"
+    assert cache.get("none", parse) is None
+    assert cache.get("none", parse) is None
+
+    assert calls == ["a", "none"]
+    assert (cache.hits, cache.misses, len(cache)) == (2, 2, 2)
+    assert cache.hit_rate == 0.5
+
+    cache.get("a", parse)
+    cache.get("b", parse)
+
+    assert len(cache) == 2
+
+    # The least recently used entry ("none") should have been evicted.
+    cache.get("a", parse)
+    cache.get("none", parse)
+
+    assert calls == ["a", "none", "b", "none"]
+
+    cache.clear()
+
+    assert (cache.hits, cache.misses, len(cache)) == (0, 0, 0)
+    assert cache.hit_rate == 0.0
+
+
+@mark.parametrize("text", (
+        "boolean",
+        "float array of 3 items in [-inf, inf]",
+        ":class:`bpy.types.Object`",
+        "list of :class:`bge.types.KX_GameObject`",
+        "enum in ['A', 'B']",
+        ":class:`bge.types.KX_Scene` or string",
+        "int or None",
+        "not a type at all"
+))
+def test_parse_type_cached(text: str):
+    expected = _parse_type(text)
+
+    assert parse_type(text) == expected
+
+    hits = type_cache.hits
+
+    assert parse_type(text) == expected
+    assert type_cache.hits == hits + 1
+
+
+def test_parse_types():
+    (resolved, unresolved) = parse_types(("boolean", "not a type at all", "int or float", "boolean", "", "foo bar"))
+
+    assert resolved == {"boolean": "bool", "int or float": "typing.Union[int, float]"}
+    assert unresolved == ("not a type at all", "", "foo bar")
+
+
+def test_type_cache_save_and_load(tmp_path: Path):
+    path = tmp_path / "types.json"
+
+    cache = TypeCache()
+
+    cache.get("int", _parse_type)
+    cache.get("not a type at all", _parse_type)
+
+    assert cache.drain() == {"int": "int", "not a type at all": None}
+    assert not cache.drain()
+
+    cache.save(path)
+
+    loaded = TypeCache()
+
+    assert loaded.load(path) == 2
+    assert not loaded.drain()
+
+    assert loaded.get("int", lambda _: None) == "int"
+    assert loaded.get("not a type at all", lambda _: "int") is None
+    assert (loaded.hits, loaded.misses) == (2, 0)
+
+
+def test_type_cache_load_invalid(tmp_path: Path):
+    path = tmp_path / "types.json"
+
+    cache = TypeCache()
+
+    assert cache.load(path) == 0
+
+    path.write_text("{corrupt", "UTF-8")
+
+    assert cache.load(path) == 0
+
+    path.write_text(json.dumps({"signature": "outdated", "types": {"int": "str"}}), "UTF-8")
+
+    assert cache.load(path) == 0
+
+    path.write_text(json.dumps({"signature": type_table_signature, "types": {"int": "str"}}), "UTF-8")
+
+    assert cache.load(path) == 1
+    assert cache.get("int", _parse_type) == "str"
+
+
+@mark.parametrize("args", (
+        ("float array of 3 items", "array_of"),
+        ("list of :class:`bge.types.KX_GameObject`", "container_of"),
+        (":class:`bge.types.KX_Scene`", "reference"),
+        ("int or float", "union"),
+        ("enum in ['A', 'B']", "special_cases"),
+        ("one of...\n- :class:`~bge.types.KX_Scene`\n- :class:`~bge.types.KX_Camera`", "union_types"),
+        ("not a type at all", None)
+))
+def test_type_parser_rule(args):
+    (text, rule) = args
+
+    type_cache.clear()
+    type_stats.clear()
+
+    type_stats.enabled = True
+
+    try:
+        parse_type(text)
+        parse_type(text)
+    finally:
+        type_stats.enabled = False
+
+    if rule:
+        assert type_stats.expressions[rule] == 1
+        assert type_stats.timings[rule] > 0
+    else:
+        assert not any(type_stats.expressions)
+
+
+def test_type_stats():
+    stats = TypeStats()
+
+    stats.record("int", "int")
+
+    assert not any(stats.fields)
+
+    stats.enabled = True
+
+    stats.resolve("int", "simple")
+    stats.add_time("simple", 1.0)
+    stats.add_time("union", 0.5)
+
+    stats.record("int", "int")
+    stats.record("int", "int")
+    stats.record("float", "float")
+    stats.record("bitfield", None)
+    stats.record("Enumerated constant", None)
+    stats.record("Enumerated constant", None)
+
+    data = stats.drain()
+
+    assert not any(stats.fields)
+    assert data["resolved"] == {"int": "simple"}
+
+    merged = TypeStats()
+    merged.update(data)
+    merged.update(data)
+
+    assert merged.report(1) == {
+        "fields": {"total": 12, "resolved": 6, "unresolved": 6},
+        "rules": [
+            {"rule": "simple", "fields": 4, "expressions": 2, "time": 2.0},
+            {"rule": "cache", "fields": 2, "expressions": 0, "time": 0},
+            {"rule": "union", "fields": 0, "expressions": 0, "time": 1.0}
+        ],
+        "unresolved": [{"text": "Enumerated constant", "count": 4}]
+    }
+
+
+@mark.parametrize("text", (
+        "float array of 3 items in [-1, 1]",
+        "An int array of 2 items",
+        "float multi-dimensional array of 4 * 4 items in [-inf, inf]",
+        "list (3D vector of 3 floats)",
+        "list(vector of 2 float), default []",
+        "list[Object]",
+        "list[:class:`bpy.types.Object`] (readonly)",
+        "a list of :class:`~bge.types.KX_GameObject`",
+        "sequence of strings",
+        ":class:`bpy.types.Mesh` :class:`bpy_prop_collection` of :class:`bpy.types.MeshVertex`, (readonly)",
+        ":class:`bpy_prop_collection` of :class:`bpy.types.Object`'s",
+        ":class:`EXP_ListValue` of :class:`KX_GameObject`",
+        "A dict[str, :class:`bge.types.KX_GameObject`]",
+        "dictionary(string, int)",
+        ":class:`bge.types.KX_Scene` or string",
+        ":class:`~bpy.types.Object`: or None",
+        "int or float or None",
+        "unsigned int",
+        "float (optional)",
+        "4x4 :class:`mathutils.Matrix`",
+        "A 3x3 matrix",
+        "boolean, default False",
+        "enum in ['A', 'B']",
+        "one of...\n- :class:`~bge.types.KX_Scene`\n\n- :class:`KX_Camera <bge.types.KX_Camera>`",
+        "int\n- :class:`bge.types.KX_Scene`\n:class:`bge.types.KX_Camera` or None",
+        "int (optional\nvalue) in [0,\n1]",
+        "dict[str,\nint]\n",
+        "",
+        "list of",
+        "dict[str]",
+        "not a type at all"
+))
+def test_type_parser(text: str):
+    type_cache.clear()
+
+    expected = parse_with_patterns(text)
+
+    type_cache.clear()
+
+    assert TypeParser(text).parse() == expected
+
+
+def test_type_parser_random():
+    words = (
+        "a", "An", "int", "float", "floats", "string", "list", "dict", "set", "tuple", "of", "or", "None", "array",
+        "multi-dimensional", "items", "vector", "3D", "4x4", "matrix", "Matrix", "unsigned", "3", "*", "(", ")", "[",
+        "]", ",", ".", ":", "'s", ":class:`bpy.types.Object`", ":class:`~mathutils.Vector`",
+        ":class:`bpy_prop_collection`", ":class:`EXP_ListValue`")
+
+    rand = random.Random(0)
+
+    for _ in range(2000):
+        tokens = rand.choices(words, k=rand.randint(1, 9))
+        text = "".join(map(lambda t: t + rand.choice(("", " ", " ", "  ")), tokens)).strip()
+
+        type_cache.clear()
+
+        expected = parse_with_patterns(text)
+
+        type_cache.clear()
+
+        assert TypeParser(text).parse() == expected, text
+
+
+def test_type_parser_random_multiline():
+    words = (
+        "a", "int", "float", "floats", "list", "dict", "of", "or", "array", "items", "vector", "matrix", "in", "3",
+        "-", "*", "(", ")", "[", "]", ",", "'s", ":class:`bpy.types.Object`", ":class:`~mathutils.Vector <Vector>`",
+        ":class:`bpy_prop_collection`", ":class:`EXP_ListValue`")
+
+    rand = random.Random(0)
+
+    # Line breaks may appear anywhere, including in a list of union types.
+    for _ in range(5000):
+        tokens = rand.choices(words, k=rand.randint(1, 9))
+        text = "".join(map(lambda t: t + rand.choice(("", " ", "\n", "\n", " \n- ")), tokens))
+
+        type_cache.clear()
+
+        expected = parse_with_patterns(text)
+
+        type_cache.clear()
+
+        assert TypeParser(text).parse() == expected, text
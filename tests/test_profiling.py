@@ -0,0 +1,97 @@
+import csv
+import json
+import pickle
+from pathlib import Path
+
+from bpystubgen import profiling
+from bpystubgen.profiling import Profiler
+
+
+def test_measure():
+    profiler = Profiler()
+
+    with profiler.measure("bge.types", "parse"):
+        pass
+
+    with profiler.measure("bge.types", "parse"):
+        pass
+
+    with profiler.measure("bge.types", "write"):
+        pass
+
+    assert profiler.enabled
+    assert set(profiler.timings.keys()) == {"bge.types"}
+    assert set(profiler.timings["bge.types"].keys()) == {"parse", "write"}
+    assert profiler.timings["bge.types"]["parse"] > 0
+
+
+def test_measure_error():
+    profiler = Profiler()
+
+    try:
+        with profiler.measure("bgl", "parse"):
+            raise ValueError()
+    except ValueError:
+        pass
+
+    assert "parse" in profiler.timings["bgl"]
+
+
+def test_pickle_timings():
+    profiler = Profiler()
+
+    with profiler.measure("bgl", "parse"):
+        pass
+
+    timings = pickle.loads(pickle.dumps(profiler.timings))
+
+    assert timings["bgl"]["parse"] == profiler.timings["bgl"]["parse"]
+
+
+def test_disabled():
+    with profiling.disabled.measure("bgl", "parse"):
+        pass
+
+    assert not profiling.disabled.enabled
+    assert not any(profiling.disabled.timings)
+
+
+def test_totals_and_slowest():
+    profiler = Profiler()
+
+    profiler.update({"bge": {"parse": 1.0, "write": 0.5}, "bgl": {"parse": 3.0}})
+    profiler.update({"bge": {"parse": 2.0}})
+
+    totals = profiler.totals()
+
+    assert tuple(totals.keys()) == profiling.phases
+    assert totals["parse"] == 6.0
+    assert totals["write"] == 0.5
+    assert totals["merge"] == 0.0
+
+    assert profiler.slowest(1) == (("bge", 3.5),)
+    assert profiler.slowest(5) == (("bge", 3.5), ("bgl", 3.0))
+
+
+def test_save(tmp_path: Path):
+    profiler = Profiler()
+
+    profiler.update({"bge": {"parse": 1.0, "write": 0.5}, "bgl": {"parse": 3.0}})
+
+    (json_path, csv_path) = profiler.save(tmp_path / "profile", top=1)
+
+    assert json_path == tmp_path / "profile.json"
+    assert csv_path == tmp_path / "profile.csv"
+
+    report = json.loads(json_path.read_text("UTF-8"))
+
+    assert report["total"]["parse"] == 4.0
+    assert report["slowest"] == [{"task": "bgl", "total": 3.0, "parse": 3.0}]
+    assert report["tasks"]["bgl"] == {"parse": 3.0}
+
+    with csv_path.open(newline="", encoding="UTF-8") as file:
+        rows = list(csv.DictReader(file))
+
+    assert list(map(lambda r: r["task"], rows)) == ["bge", "bgl"]
+    assert float(rows[0]["total"]) == 1.5
+    assert float(rows[1]["write"]) == 0.0
@@ -0,0 +1,296 @@
+import ast
+import json
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from pytest import MonkeyPatch, fixture, mark
+
+from bpystubgen.parser import type_cache, type_stats, type_table_signature
+from bpystubgen.runner import Runner, _init_worker, _parse_in_worker, is_leaf, peak_memory, type_table_path
+from bpystubgen.tasks import ModuleTask, ParserTask, Task
+
+
+@fixture
+def rst_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "rst"
+
+
+@fixture
+def stub_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "stub"
+
+
+@fixture
+def dest_dir() -> Path:
+    path = Path(tempfile.mkdtemp(prefix="bpystubgen-test-"))
+
+    yield path
+
+    shutil.rmtree(path)
+
+
+def assert_same_tree(generated_dir: Path, expected_dir: Path) -> None:
+    expected_files = set(map(lambda p: p.relative_to(expected_dir), expected_dir.glob("**/*")))
+    generated_files = set(filter(lambda p: p.parts[0] != ".bpystubgen",
+                                 map(lambda p: p.relative_to(generated_dir), generated_dir.glob("**/*"))))
+
+    assert generated_files == expected_files
+
+    for path in filter(lambda p: not (expected_dir / p).is_dir(), expected_files):
+        assert (generated_dir / path).read_text("UTF-8") == (expected_dir / path).read_text("UTF-8")
+
+
+def strip_docstrings(source: str) -> str:
+    tree = ast.parse(source)
+
+    for node in ast.walk(tree):
+        body = getattr(node, "body", None)
+
+        if isinstance(body, list):
+            body[:] = list(filter(lambda n: not (isinstance(n, ast.Expr) and isinstance(n.value, ast.Constant)), body))
+
+    return ast.dump(tree)
+
+
+def test_is_leaf(rst_path: Path):
+    root = Task.create(rst_path)
+
+    leaves = set(map(lambda t: t.full_name, filter(is_leaf, root)))
+
+    assert leaves == {
+        "bge.logic",
+        "bge.types.KX_GameObject",
+        "bge.types.KX_PythonComponent",
+        "bge.types.KX_Scene",
+        "bgl",
+        "mathutils.geometry"
+    }
+
+
+def test_parse_in_worker(rst_path: Path, dest_dir: Path):
+    _init_worker(dest_dir, None, profile=True)
+
+    task = next(filter(lambda t: t.full_name == "bgl", Task.create(rst_path)))
+
+    # The result is sent back to the main process, so it must survive a round trip through pickle.
+    (data, elapsed, timings, _, _) = pickle.loads(pickle.dumps(_parse_in_worker(task)))
+
+    assert data
+    assert elapsed > 0
+    assert timings["bgl"]["parse"] > 0
+
+
+def record(scheduled: Iterator[Tuple[Task, bool]], results: List[Tuple[Task, bool]]) -> Iterator[Tuple[Task, bool]]:
+    for item in scheduled:
+        results.append(item)
+        yield item
+
+
+@mark.parametrize("jobs", (1, 2))
+def test_run(rst_path: Path, stub_path: Path, dest_dir: Path, monkeypatch: MonkeyPatch, jobs: int):
+    runner = Runner(dest_dir, jobs=jobs)
+
+    scheduled: List[Tuple[Task, bool]] = []
+    dispatch = runner.dispatch
+
+    monkeypatch.setattr(runner, "dispatch", lambda *args: record(dispatch(*args), scheduled))
+
+    assert runner.run(Task.create(rst_path)) == 9
+
+    assert_same_tree(dest_dir, stub_path)
+
+    # The output would be the same if the leaves were parsed again in the main process, so check it explicitly.
+    leaves = tuple(map(lambda s: s[1], filter(lambda s: is_leaf(s[0]) and s[0].source, scheduled)))
+
+    assert len(leaves) == (6 if jobs > 1 else 0)
+    assert all(leaves)
+    assert runner.fallbacks == 0
+
+
+@mark.parametrize("jobs", (1, 2))
+def test_run_signatures_only(rst_path: Path, stub_path: Path, dest_dir: Path, jobs: int):
+    Runner(dest_dir, jobs=jobs, signatures_only=True).run(Task.create(rst_path))
+
+    expected_files = set(map(lambda p: p.relative_to(stub_path), stub_path.glob("**/*.pyi")))
+
+    assert set(map(lambda p: p.relative_to(dest_dir), dest_dir.glob("**/*.pyi"))) == expected_files
+
+    for path in expected_files:
+        generated = (dest_dir / path).read_text("UTF-8")
+
+        assert '"""' not in generated
+        assert strip_docstrings(generated) == strip_docstrings((stub_path / path).read_text("UTF-8"))
+
+
+def definitions(root: Path) -> dict:
+    result = dict()
+
+    for path in root.glob("**/*.pyi"):
+        # Private modules are merged into the package which re-exports their contents.
+        segments = tuple(filter(lambda s: s != "__init__" and not s.startswith("_"),
+                                path.relative_to(root).with_suffix("").parts))
+
+        for node in filter(lambda n: isinstance(n, (ast.ClassDef, ast.FunctionDef)), ast.parse(path.read_text()).body):
+            result[".".join((*segments, node.name))] = ast.dump(node)
+
+    return result
+
+
+@mark.parametrize("jobs", (1, 2))
+def test_run_split(rst_path: Path, stub_path: Path, dest_dir: Path, jobs: int):
+    Runner(dest_dir, jobs=jobs, split_classes=1).run(Task.create(rst_path))
+
+    assert (dest_dir / "bge" / "types" / "_KX_GameObject.pyi").exists()
+    assert (dest_dir / "mathutils" / "_Vector.pyi").exists()
+
+    assert definitions(dest_dir) == definitions(stub_path)
+
+    package = (dest_dir / "mathutils" / "__init__.pyi").read_text("UTF-8")
+
+    assert "class " not in package
+    assert "from ._Vector import Vector as Vector" in package
+
+    assert "from ._Matrix import Matrix" in (dest_dir / "mathutils" / "_Vector.pyi").read_text("UTF-8")
+
+
+@mark.parametrize("jobs", (1, 2))
+def test_run_streaming(rst_path: Path, stub_path: Path, dest_dir: Path, jobs: int):
+    root = Task.create(rst_path)
+
+    Runner(dest_dir, jobs=jobs, streaming=True).run(root)
+
+    assert_same_tree(dest_dir, stub_path)
+
+    tasks = tuple(filter(lambda t: isinstance(t, ParserTask), root))
+
+    assert not any(filter(lambda t: t.doctree, tasks))
+
+    modules = dict(map(lambda t: (t.full_name, t.module_names), filter(lambda t: isinstance(t, ModuleTask), tasks)))
+
+    assert modules["bge"] == ("bge",)
+    assert modules["bge.types"] == ("bge.types",)
+    assert modules["mathutils.geometry"] == ("mathutils.geometry",)
+
+
+@mark.parametrize("jobs", (1, 2))
+def test_run_profile(rst_path: Path, stub_path: Path, dest_dir: Path, jobs: int):
+    runner = Runner(dest_dir, jobs=jobs, profile=True)
+    runner.run(Task.create(rst_path))
+
+    assert_same_tree(dest_dir, stub_path)
+
+    timings = runner.profiler.timings
+
+    assert timings["bge.types.KX_Scene"]["parse"] > 0
+    assert timings["bge.types"]["merge"] > 0
+    assert timings["bgl"]["write"] > 0
+
+
+@mark.parametrize("jobs", (1, 2))
+def test_run_type_table(rst_path: Path, stub_path: Path, dest_dir: Path, tmp_path: Path, jobs: int):
+    type_cache.clear()
+
+    Runner(dest_dir, jobs=jobs, cache_dir=tmp_path).run(Task.create(rst_path))
+
+    assert_same_tree(dest_dir, stub_path)
+
+    data = json.loads(type_table_path(tmp_path).read_text("UTF-8"))
+
+    assert data["signature"] == type_table_signature
+    assert data["types"]["list of :class:`bge.types.KX_Scene`"] == "typing.List[bge.types.KX_Scene]"
+
+    type_cache.clear()
+
+    Runner(dest_dir, cache_dir=tmp_path)
+
+    assert len(type_cache) == len(data["types"])
+
+
+@mark.parametrize("jobs", (1, 2))
+def test_run_track_types(rst_path: Path, stub_path: Path, dest_dir: Path, jobs: int):
+    type_cache.clear()
+
+    Runner(dest_dir, jobs=jobs, track_types=True).run(Task.create(rst_path))
+
+    assert_same_tree(dest_dir, stub_path)
+
+    report = type_stats.report()
+    rules = dict(map(lambda r: (r["rule"], r), report["rules"]))
+
+    assert report["fields"]["total"] == report["fields"]["resolved"] + report["fields"]["unresolved"]
+    assert report["unresolved"][0] == {"text": "Enumerated constant", "count": 69}
+
+    assert rules["simple"]["fields"] > 0
+    assert "cache" not in rules
+
+    Runner(dest_dir)
+
+    assert not type_stats.enabled
+
+
+def test_peak_memory():
+    assert peak_memory() > 0
+
+
+def test_run_incremental(rst_path: Path, stub_path: Path, dest_dir: Path, tmp_path: Path):
+    source_dir = tmp_path / "rst"
+    shutil.copytree(rst_path, source_dir)
+
+    runner = Runner(dest_dir, incremental=True)
+    runner.run(Task.create(source_dir))
+
+    assert (dest_dir / ".bpystubgen" / "state.json").exists()
+
+    runner = Runner(dest_dir, incremental=True)
+    (to_parse, to_generate) = runner.plan(tuple(Task.create(source_dir)))
+
+    assert not any(to_parse)
+    assert not any(to_generate)
+
+    scene = source_dir / "bge.types.KX_Scene.rst"
+    scene.write_text(scene.read_text("UTF-8") + "\n", "UTF-8")
+
+    (dest_dir / "bgl" / "__init__.pyi").unlink()
+
+    runner = Runner(dest_dir, incremental=True)
+    root = Task.create(source_dir)
+
+    (to_parse, to_generate) = runner.plan(tuple(root))
+
+    assert set(map(lambda t: t.full_name, to_generate)) == {"bge", "bge.types", "bgl"}
+    assert set(map(lambda t: t.full_name, to_parse)) == {
+        "bge",
+        "bge.logic",
+        "bge.types",
+        "bge.types.KX_GameObject",
+        "bge.types.KX_PythonComponent",
+        "bge.types.KX_Scene",
+        "bgl"
+    }
+
+    runner.run(root)
+
+    shutil.rmtree(dest_dir / ".bpystubgen")
+
+    assert_same_tree(dest_dir, stub_path)
+
+
+def test_run_incremental_mode(rst_path: Path, stub_path: Path, dest_dir: Path):
+    Runner(dest_dir, incremental=True, signatures_only=True).run(Task.create(rst_path))
+
+    # Stubs generated without docstrings should not be mistaken for the complete ones.
+    runner = Runner(dest_dir, incremental=True)
+    tasks = tuple(Task.create(rst_path))
+
+    (to_parse, to_generate) = runner.plan(tasks)
+
+    assert to_generate == set(filter(lambda t: isinstance(t, ModuleTask), tasks))
+
+    runner.run(Task.create(rst_path))
+
+    shutil.rmtree(dest_dir / ".bpystubgen")
+
+    assert_same_tree(dest_dir, stub_path)
@@ -0,0 +1,74 @@
+import os
+import stat
+from hashlib import sha256
+from pathlib import Path
+
+from bpystubgen import files
+from bpystubgen.manifest import write_file
+from bpystubgen.store import Store
+
+
+def test_link(tmp_path: Path):
+    store = Store(tmp_path / "store")
+
+    first = tmp_path / "3.0" / "bpy" / "__init__.pyi"
+    second = tmp_path / "3.1" / "bpy" / "__init__.pyi"
+
+    assert store.link(first, b"import bpy\n")
+    assert store.link(second, b"import bpy\n")
+
+    assert not store.link(first, b"import bpy\n")
+
+    assert os.path.samefile(first, second)
+    assert tuple(store) == (store.path(sha256(b"import bpy\n").hexdigest()),)
+
+    # An existing file with the same content is replaced with a link, but is not reported as changed.
+    third = tmp_path / "3.2" / "bpy" / "__init__.pyi"
+
+    write_file(third, b"import bpy\n")
+
+    assert not store.link(third, b"import bpy\n")
+    assert os.path.samefile(first, third)
+
+    # Writing to a linked file must not affect the others.
+    assert write_file(first, b"import bge\n")
+
+    assert second.read_bytes() == b"import bpy\n"
+    assert store.link(second, b"import bge\n")
+
+
+def test_prune(tmp_path: Path):
+    store = Store(tmp_path / "store")
+
+    path = tmp_path / "bpy.pyi"
+
+    store.link(path, b"import bpy\n")
+    store.link(path, b"import bge\n")
+
+    assert len(tuple(store)) == 2
+    assert store.prune() == 1
+
+    assert tuple(store) == (store.path(sha256(b"import bge\n").hexdigest()),)
+
+
+def test_mode(tmp_path: Path):
+    store = Store(tmp_path / "store")
+
+    linked = tmp_path / "linked" / "bpy.pyi"
+    written = tmp_path / "written" / "bpy.pyi"
+
+    store.link(linked, b"import bpy\n")
+    write_file(written, b"import bpy\n")
+
+    # Files in the store are created as temporary files, which are only readable by their owner by default.
+    assert stat.S_IMODE(linked.stat().st_mode) == stat.S_IMODE(written.stat().st_mode)
+
+
+def test_current_umask():
+    umask = os.umask(0o027)
+
+    try:
+        assert files._current_umask() == 0o027
+        assert os.umask(umask) == 0o027
+    finally:
+        os.umask(umask)
@@ -5,12 +5,12 @@ from pathlib import Path
 from docutils.frontend import OptionParser, Values
 from docutils.parsers.rst import Parser
 from docutils.writers import Writer
-from pytest import fixture
+from pytest import fixture, raises
 from sphinx.application import Sphinx
 from sphinxcontrib.builders.rst import RstBuilder
 
 from bpystubgen.nodes import Class, Data, Function, Module
-from bpystubgen.tasks import ClassTask, ModuleTask, ParserTask, Task
+from bpystubgen.tasks import ClassTask, ModuleTask, ParserTask, Task, partition
 from bpystubgen.writer import StubWriter
 
 
@@ -98,6 +98,32 @@ def test_create_with_pattern(rst_path: Path):
     assert set(bge.keys()) == {"logic", "types"}
 
 
+def test_create_shard(rst_path: Path):
+    names = lambda root: tuple(map(lambda t: t.full_name, root))
+
+    # The largest subtree (i.e. bge) should be assigned to a shard of its own.
+    assert set(Task.create(rst_path, shard=(1, 2)).keys()) == {"bge"}
+    assert set(Task.create(rst_path, shard=(2, 2)).keys()) == {"bgl", "mathutils"}
+
+    shards = tuple(map(lambda i: names(Task.create(rst_path, shard=(i, 3))), range(1, 4)))
+
+    assert shards == tuple(map(lambda i: names(Task.create(rst_path, shard=(i, 3))), range(1, 4)))
+    assert sorted(sum(shards, ())) == sorted(names(Task.create(rst_path)))
+
+    assert not any(Task.create(rst_path, shard=(4, 4)).keys())
+
+    with raises(ValueError):
+        Task.create(rst_path, shard=(0, 2))
+
+
+def test_partition(rst_path: Path):
+    root = Task.create(rst_path)
+
+    shards = partition(tuple(root.values()), 2)
+
+    assert tuple(map(lambda s: tuple(map(lambda t: t.name, s)), shards)) == (("bge",), ("bgl", "mathutils"))
+
+
 def test_full_name():
     grand_parent = Task("bge")
     parent = Task("types", grand_parent)
@@ -108,6 +134,43 @@ def test_full_name():
     assert child.full_name == "bge.types.KX_GameObject"
 
 
+def test_checksum(rst_path: Path, tmp_path: Path):
+    shutil.copytree(rst_path, tmp_path, dirs_exist_ok=True)
+
+    root = Task.create(tmp_path)
+
+    bge = root["bge"]
+    types = bge["types"]
+    scene = types["KX_Scene"]
+    logic = bge["logic"]
+
+    checksums = dict(map(lambda t: (t.full_name, t.checksum()), root))
+
+    assert len(set(checksums.values())) == len(checksums)
+    assert Task.create(tmp_path)["bge"].checksum() == checksums["bge"]
+
+    source = scene.source
+    source.write_text(source.read_text("UTF-8") + "\n", "UTF-8")
+
+    scene.invalidate()
+
+    assert scene.checksum() != checksums["bge.types.KX_Scene"]
+    assert types.checksum() != checksums["bge.types"]
+    assert bge.checksum() != checksums["bge"]
+
+    assert logic.checksum() == checksums["bge.logic"]
+    assert root["bgl"].checksum() == checksums["bgl"]
+
+
+def test_patch_names(rst_path: Path):
+    root = Task.create(rst_path)
+
+    assert root["bgl"].patch_names == ("bgl",)
+    assert root["mathutils"].patch_names == (
+        "mathutils.Euler", "mathutils.Matrix", "mathutils.Quaternion", "mathutils.Vector")
+    assert root["mathutils"]["geometry"].patch_names == ()
+
+
 def test_get_item():
     bge = Task("bge")
     types = Task("types", parent=bge)
@@ -151,6 +214,50 @@ def test_iter(rst_path: Path):
                      "mathutils")
 
 
+def test_registry(rst_path: Path):
+    root = Task.create(rst_path)
+    registry = root.registry
+
+    assert len(registry) == 9
+    assert tuple(registry) == tuple(root)
+    assert registry is root["bge"]["types"].registry
+
+    assert registry["bge.types.KX_Scene"] is root["bge"]["types"]["KX_Scene"]
+    assert registry.get("bge.types.KX_Camera") is None
+    assert "mathutils.geometry" in registry
+
+    assert tuple(map(lambda t: t.full_name, root["bge"])) == (
+        "bge.logic",
+        "bge.types.KX_GameObject",
+        "bge.types.KX_PythonComponent",
+        "bge.types.KX_Scene",
+        "bge.types")
+    assert not any(root["bgl"])
+
+    camera = ClassTask("KX_Camera", root["bge"]["types"])
+
+    assert root.registry is not registry
+    assert root.registry["bge.types.KX_Camera"] is camera
+    assert tuple(root["bge"]["types"])[-1] is camera
+
+
+def test_classes_and_submodules(rst_path: Path):
+    root = Task.create(rst_path)
+
+    bge = root["bge"]
+    types = bge["types"]
+
+    assert set(map(lambda t: t.name, types.classes)) == {"KX_GameObject", "KX_PythonComponent", "KX_Scene"}
+    assert not any(types.submodules)
+
+    assert set(map(lambda t: t.name, bge.submodules)) == {"logic", "types"}
+    assert not any(bge.classes)
+
+    ModuleTask("render", bge)
+
+    assert set(map(lambda t: t.name, bge.submodules)) == {"logic", "render", "types"}
+
+
 # noinspection DuplicatedCode
 def test_parse(rst_path: Path, settings: Values, app: Sphinx):
     modules = Task.create(rst_path, "bge.types.KX_GameObject.rst")
@@ -0,0 +1,71 @@
+from base64 import urlsafe_b64encode
+from hashlib import sha256
+from pathlib import Path
+from zipfile import ZipFile
+
+from pytest import fixture, mark, raises
+
+from bpystubgen.runner import Runner
+from bpystubgen.tasks import Task
+from bpystubgen.wheel import parse_requirement
+
+
+@fixture
+def rst_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "rst"
+
+
+@fixture
+def stub_path() -> Path:
+    return Path(__file__).parent / "fixtures" / "stub"
+
+
+def test_parse_requirement():
+    assert parse_requirement("blender-stubs==3.1.207") == ("blender-stubs", "3.1.207")
+    assert parse_requirement("upbge-stubs == 0.3.1.207dev42") == ("upbge-stubs", "0.3.1.207dev42")
+
+    with raises(ValueError):
+        parse_requirement("blender-stubs>=3.1")
+
+
+@mark.parametrize("jobs", (1, 2))
+def test_run(rst_path: Path, stub_path: Path, tmp_path: Path, jobs: int):
+    Runner(tmp_path, jobs=jobs, wheel="upbge-stubs==0.3.1.207").run(Task.create(rst_path))
+
+    # No intermediate files should be written to the output directory.
+    assert tuple(map(lambda p: p.name, tmp_path.iterdir())) == ("upbge_stubs-0.3.1.207-py3-none-any.whl",)
+
+    stubs = set(map(lambda p: p.relative_to(stub_path).as_posix(), stub_path.glob("**/*.pyi")))
+    markers = set(map(lambda p: p.relative_to(stub_path).as_posix(), stub_path.glob("*/py.typed")))
+
+    with ZipFile(tmp_path / "upbge_stubs-0.3.1.207-py3-none-any.whl") as archive:
+        names = set(archive.namelist())
+        dist_info = "upbge_stubs-0.3.1.207.dist-info"
+
+        assert names == stubs | markers | set(map(lambda n: f"{dist_info}/{n}",
+                                                  ("METADATA", "WHEEL", "top_level.txt", "RECORD")))
+
+        for name in stubs:
+            assert archive.read(name).decode("UTF-8") == (stub_path / name).read_text("UTF-8")
+
+        metadata = archive.read(f"{dist_info}/METADATA").decode("UTF-8")
+
+        assert "Name: upbge-stubs\n" in metadata
+        assert "Version: 0.3.1.207\n" in metadata
+
+        assert archive.read(f"{dist_info}/top_level.txt").decode("UTF-8") == "bge\nbgl\nmathutils\n"
+
+        records = archive.read(f"{dist_info}/RECORD").decode("UTF-8").splitlines()
+
+        assert len(records) == len(names)
+
+        for record in records:
+            (name, digest, size) = record.split(",")
+
+            if name.endswith("RECORD"):
+                continue
+
+            data = archive.read(name)
+
+            assert digest == "sha256=" + urlsafe_b64encode(sha256(data).digest()).rstrip(b"=").decode("ascii")
+            assert int(size) == len(data)